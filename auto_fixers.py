@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Auto Fixers Module
+Per-file fix plugins and a process-pool runner used by MergeAutomation
+"""
+
+import io
+import os
+import ast
+import sys
+import json
+import time
+import logging
+import pkgutil
+import tempfile
+import sysconfig
+import threading
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# A fix function receives the file content and returns the fixed content,
+# or None when the file needs no changes.
+FixFunction = Callable[[str], Optional[str]]
+
+
+@dataclass
+class Fixer:
+    """Data class describing a fix plugin"""
+    name: str
+    pattern: str
+    fix: FixFunction
+    description: str = ""
+    version: str = "1"  # bump when fix logic changes to invalidate cached results
+
+
+@dataclass
+class FixResult:
+    """Data class for the outcome of one fixer on one file"""
+    path: str
+    fixer: str
+    status: str  # 'changed', 'skipped', 'error'
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def changed(self) -> bool:
+        return self.status == 'changed'
+
+
+FIXERS: Dict[str, Fixer] = {}
+
+
+def register_fixer(name: str, pattern: str, description: str = "", version: str = "1"):
+    """Register a module-level fix function as a fixer plugin"""
+    def decorator(func: FixFunction) -> FixFunction:
+        FIXERS[name] = Fixer(name=name, pattern=pattern, fix=func, description=description, version=version)
+        return func
+    return decorator
+
+
+def get_fixer(name: str) -> Fixer:
+    """Look up a registered fixer by name"""
+    try:
+        return FIXERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown fixer: {name}")
+
+
+def atomic_write(path: str, content: str) -> None:
+    """Write content to path via a temp file in the same directory and rename"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except OSError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def apply_fix(fixer_name: str, fix: FixFunction, path: str) -> FixResult:
+    """Run a single fix function on a single file"""
+    start = time.perf_counter()
+    try:
+        with open(path, 'r') as f:
+            content = f.read()
+
+        new_content = fix(content)
+        if new_content is None or new_content == content:
+            return FixResult(path, fixer_name, 'skipped', time.perf_counter() - start)
+
+        atomic_write(path, new_content)
+        return FixResult(path, fixer_name, 'changed', time.perf_counter() - start)
+
+    except Exception as e:
+        return FixResult(path, fixer_name, 'error', time.perf_counter() - start, error=str(e))
+
+
+def _apply_fix_chunk(fixer_name: str, fix: FixFunction, paths: List[str]) -> List[FixResult]:
+    """Worker entry point: run a fixer over one batch of files"""
+    return [apply_fix(fixer_name, fix, path) for path in paths]
+
+
+class FixRunner:
+    """Run fixer plugins over many files in a process pool with chunked batches"""
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 64):
+        """Initialize fix runner"""
+        env_workers = os.getenv('FIX_WORKERS')
+        self.max_workers = max_workers or (int(env_workers) if env_workers else os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+
+    def run(self, fixer: Fixer, paths: List[str]) -> List[FixResult]:
+        """Apply a fixer to every path, returning one result per path in input order"""
+        chunks = [paths[i:i + self.chunk_size] for i in range(0, len(paths), self.chunk_size)]
+
+        # Forking a pool costs more than fixing a single batch inline
+        if self.max_workers <= 1 or len(chunks) <= 1:
+            results = []
+            for chunk in chunks:
+                results.extend(_apply_fix_chunk(fixer.name, fixer.fix, chunk))
+            return results
+
+        results = []
+        workers = min(self.max_workers, len(chunks))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+            futures = [pool.submit(_apply_fix_chunk, fixer.name, fixer.fix, chunk) for chunk in chunks]
+            for future in futures:
+                results.extend(future.result())
+        return results
+
+
+def _pool_context():
+    """Start workers from a clean server process: forking while other threads (e.g. the
+    two fixers of create_audit_fix_pr) hold locks can deadlock the child"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def summarize_results(results: List[FixResult]) -> Dict[str, float]:
+    """Summarize fix results by status"""
+    summary = {'changed': 0, 'skipped': 0, 'error': 0, 'elapsed': 0.0}
+    for result in results:
+        summary[result.status] += 1
+        summary['elapsed'] += result.elapsed
+    return summary
+
+
+def _stat_key(path: str) -> Optional[str]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"stat:{st.st_mtime_ns}:{st.st_size}"
+
+
+def file_keys(root: str, paths: List[str]) -> Dict[str, Optional[str]]:
+    """Content keys for paths (relative to root) without reading the files.
+
+    Files tracked and unmodified in git are keyed by blob hash, which stays
+    valid across fresh checkouts and worktrees. Modified, untracked and
+    non-git files fall back to mtime and size.
+    """
+    blobs: Dict[str, str] = {}
+    dirty = set()
+    try:
+        staged = subprocess.run(['git', 'ls-files', '-s', '-z'], cwd=root, check=True,
+                                capture_output=True, text=True).stdout
+        for entry in staged.split('\0'):
+            if entry:
+                meta, name = entry.split('\t', 1)
+                blobs[name] = meta.split()[1]
+        changed = subprocess.run(['git', 'ls-files', '-m', '-o', '--exclude-standard', '-z'], cwd=root,
+                                 check=True, capture_output=True, text=True).stdout
+        dirty = set(name for name in changed.split('\0') if name)
+    except (OSError, subprocess.CalledProcessError):
+        pass
+
+    keys = {}
+    for path in paths:
+        name = Path(path).as_posix()
+        if name in blobs and name not in dirty:
+            keys[path] = f"blob:{blobs[name]}"
+        else:
+            keys[path] = _stat_key(os.path.join(root, path))
+    return keys
+
+
+class FixCache:
+    """Persistent record of files a fixer already found nothing to do in"""
+
+    def __init__(self, cache_file: Optional[str] = None):
+        """Initialize fix cache"""
+        self.cache_file = os.path.abspath(cache_file or os.getenv('FIX_CACHE_FILE', '.auto_fix_cache.json'))
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, str]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Load cache entries from disk, starting empty if missing or corrupt"""
+        try:
+            with open(self.cache_file, 'r') as f:
+                self.entries = json.load(f).get('entries', {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self) -> None:
+        """Write cache entries to disk atomically"""
+        with self._lock:
+            data = json.dumps({'entries': self.entries}, sort_keys=True)
+        try:
+            atomic_write(self.cache_file, data)
+        except OSError as e:
+            logger.warning(f"Failed to save fix cache {self.cache_file}: {e}")
+
+    def _entry_key(self, fixer: Fixer, key: str) -> str:
+        return f"{fixer.version}:{key}"
+
+    def is_clean(self, fixer: Fixer, path: str, key: Optional[str]) -> bool:
+        """Check whether the fixer found nothing to do in this exact file content"""
+        if key is None:
+            return False
+        with self._lock:
+            return self.entries.get(fixer.name, {}).get(path) == self._entry_key(fixer, key)
+
+    def record(self, fixer: Fixer, path: str, key: Optional[str], clean: bool) -> None:
+        """Record a fix result; only clean files are remembered"""
+        with self._lock:
+            entries = self.entries.setdefault(fixer.name, {})
+            if clean and key is not None:
+                entries[path] = self._entry_key(fixer, key)
+            else:
+                entries.pop(path, None)
+
+
+@register_fixer('shell', '**/*.sh', 'Add error handling (set -e) to shell scripts')
+def fix_shell_script(content: str) -> Optional[str]:
+    """Insert `set -e` after the shebang of a shell script"""
+    lines = content.split('\n')
+    if not lines:
+        return None
+
+    # Check if already has set -e
+    if any('set -e' in line for line in lines[:10]):
+        return None
+
+    # Find shebang line
+    shebang_idx = -1
+    for i, line in enumerate(lines):
+        if line.startswith('#!'):
+            shebang_idx = i
+            break
+
+    if shebang_idx == -1:
+        return None
+
+    # Insert set -e after shebang
+    lines.insert(shebang_idx + 1, 'set -e')
+    return '\n'.join(lines)
+
+
+def _stdlib_module_names() -> frozenset:
+    """Top-level module names of the running interpreter's standard library"""
+    names = getattr(sys, 'stdlib_module_names', None)
+    if names is not None:
+        return frozenset(names)
+    # Python < 3.10: fall back to scanning the stdlib directory
+    stdlib_dir = sysconfig.get_paths()['stdlib']
+    found = {m.name for m in pkgutil.iter_modules([stdlib_dir])}
+    return frozenset(found | set(sys.builtin_module_names))
+
+
+STDLIB_MODULES = _stdlib_module_names()
+
+# Import section order (PEP 8, with __future__ first as the compiler requires)
+FUTURE, STDLIB, THIRD_PARTY, LOCAL = range(4)
+
+
+def classify_import(node: ast.stmt) -> int:
+    """Classify an import statement into a PEP 8 section"""
+    if isinstance(node, ast.ImportFrom):
+        if node.level:
+            return LOCAL
+        module = node.module or ''
+    else:
+        module = node.names[0].name
+
+    top_level = module.split('.')[0]
+    if top_level == '__future__':
+        return FUTURE
+    if top_level in STDLIB_MODULES:
+        return STDLIB
+    return THIRD_PARTY
+
+
+def _import_sort_key(node: ast.stmt, text: str):
+    if isinstance(node, ast.ImportFrom):
+        module = '.' * node.level + (node.module or '')
+    else:
+        module = node.names[0].name
+    return (module.lower(), isinstance(node, ast.ImportFrom), text)
+
+
+def _sorted_import_run(lines: List[str], run: List[ast.stmt]) -> str:
+    """Render one contiguous run of import statements as sorted PEP 8 sections"""
+    sections = {FUTURE: [], STDLIB: [], THIRD_PARTY: [], LOCAL: []}
+    cursor = run[0].lineno - 1
+    for node in run:
+        node_start = node.lineno - 1
+        # Comment lines between the previous import and this one travel with it
+        leading = [line for line in lines[cursor:node_start] if line.strip()]
+        text = ''.join(leading + lines[node_start:node.end_lineno])
+        if not text.endswith('\n'):
+            text += '\n'
+        sections[classify_import(node)].append((_import_sort_key(node, text), text))
+        cursor = node.end_lineno
+
+    groups = []
+    for section in (FUTURE, STDLIB, THIRD_PARTY, LOCAL):
+        if sections[section]:
+            groups.append(''.join(text for _, text in sorted(sections[section])))
+    return '\n'.join(groups)
+
+
+@register_fixer('python_imports', '**/*.py', 'Sort and group Python imports')
+def fix_python_imports(content: str) -> Optional[str]:
+    """Sort every module-level run of import statements into PEP 8 sections.
+
+    A run is a sequence of top-level imports with no other statement between
+    them, so imports never cross code they may depend on (sys.path tweaks,
+    try/except fallbacks). Statements keep their original text, including
+    multi-line parenthesized imports and trailing comments, and comment lines
+    stay attached to the import below them. Output is stable under re-runs.
+    """
+    body = ast.parse(content).body
+    lines = io.StringIO(content, newline='').readlines()
+
+    runs = []
+    previous = None
+    for node in body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            # Statements sharing a line (`import a; import b`) cannot be moved independently
+            if previous is not None and node.lineno <= previous.end_lineno:
+                return None
+            if runs and runs[-1][-1] is previous:
+                runs[-1].append(node)
+            else:
+                runs.append([node])
+        elif runs and runs[-1][-1] is previous and node.lineno <= previous.end_lineno:
+            return None
+        previous = node
+
+    # Replace bottom-up so earlier line numbers stay valid
+    changed = False
+    for run in reversed(runs):
+        start, end = run[0].lineno - 1, run[-1].end_lineno
+        old_block = ''.join(lines[start:end])
+        new_block = _sorted_import_run(lines, run)
+        if not old_block.endswith('\n'):
+            new_block = new_block[:-1]
+        if new_block != old_block:
+            lines[start:end] = [new_block]
+            changed = True
+
+    return ''.join(lines) if changed else None
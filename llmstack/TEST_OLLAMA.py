@@ -5,8 +5,12 @@ Test Ollama API with your installed models
 
 import requests
 import json
+import os
 import sys
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from service_probes import get_engine
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     import io
@@ -15,21 +19,18 @@ if sys.platform == 'win32':
 def test_ollama():
     """Test Ollama connectivity and model inference"""
     
-    # Check if Ollama is running
-    try:
-        response = requests.get("http://localhost:11434/api/tags")
-        if response.status_code == 200:
-            models = response.json()
-            print("✅ Ollama is running!")
-            print(f"📦 Available models: {len(models['models'])}")
-            for model in models['models']:
-                size_gb = model['size'] / (1024**3)
-                print(f"   - {model['name']}: {size_gb:.1f} GB")
-        else:
-            print("❌ Ollama API returned error")
-            return False
-    except Exception as e:
-        print(f"❌ Cannot connect to Ollama: {e}")
+    # Check if Ollama is running (shared probe engine; reuses a recent check)
+    probe = get_engine().check_sync(["ollama"])["ollama"]
+    if probe.ok:
+        print("✅ Ollama is running!")
+        print(f"📦 Available models: {probe.extra['model_count']}")
+        for model in probe.extra['models']:
+            print(f"   - {model}")
+    elif probe.status_code is not None:
+        print("❌ Ollama API returned error")
+        return False
+    else:
+        print(f"❌ Cannot connect to Ollama: {probe.detail}")
         return False
     
     # Test inference with a small model
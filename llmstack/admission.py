@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Admission Control - per-backend concurrency limits for the orchestrators
+Each backend (LocalAI, Ollama, ...) admits MAX_CONCURRENT_REQUESTS requests at
+a time; the rest wait in a bounded queue where interactive requests go ahead
+of batch ones. A full queue (or a wait longer than REQUEST_TIMEOUT) is
+rejected immediately with AdmissionRejected, which the web servers turn into
+HTTP 429. Works from threads (Flask) and coroutines (ASGI, httpx) alike.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+LANES = ("interactive", "batch")
+QUEUE_WAIT_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class AdmissionRejected(Exception):
+    """A backend is saturated: the request was not queued (HTTP 429)"""
+
+    def __init__(self, backend: str, lane: str, reason: str, retry_after: int = 1):
+        super().__init__(f"{backend} is busy ({reason}), retry later")
+        self.backend = backend
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+def request_priority(data: Dict[str, Any]) -> str:
+    """Priority lane from a request body: batch, or interactive by default"""
+    priority = data.get('priority', 'interactive')
+    return priority if priority in LANES else 'interactive'
+
+def rejection(error: AdmissionRejected) -> Tuple[Dict[str, Any], int, Dict[str, str]]:
+    """(JSON body, status, headers) of the HTTP 429 answer to a rejected request"""
+    body = {"success": False, "rejected": True, "error": str(error), "backend": error.backend}
+    return body, 429, {'Retry-After': str(error.retry_after)}
+
+class _Waiter:
+    """A queued request: woken through an Event (threads) or a Future (coroutines)"""
+
+    def __init__(self, lane: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.lane = lane
+        self.granted = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+
+class Slot:
+    """A held backend slot; use as a (async) context manager or call release() once done"""
+
+    def __init__(self, limiter: "BackendLimiter", lane: str, wait_seconds: float):
+        self.limiter = limiter
+        self.lane = lane
+        self.wait_seconds = wait_seconds
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.limiter._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+class BackendLimiter:
+    """Concurrency limit plus bounded priority queue for one backend"""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: Optional[float]):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = {lane: deque() for lane in LANES}
+        self._lock = threading.Lock()
+
+        # Metrics: queue wait histogram and rejections per lane
+        self.wait_counts = {lane: [0] * len(QUEUE_WAIT_BUCKETS_SECONDS) for lane in LANES}
+        self.wait_count = {lane: 0 for lane in LANES}
+        self.wait_sum = {lane: 0.0 for lane in LANES}
+        self.rejected = {lane: 0 for lane in LANES}
+
+    def queued(self, lane: Optional[str] = None) -> int:
+        return len(self._waiters[lane]) if lane else sum(len(q) for q in self._waiters.values())
+
+    def _enter(self, waiter: _Waiter) -> bool:
+        """Take a free slot or join the queue (lock held); True if admitted right away"""
+        if waiter.lane not in LANES:
+            raise ValueError(f"Unknown priority lane: {waiter.lane}")
+        # Nobody of equal or higher priority may be waiting ahead of us
+        ahead = len(self._waiters["interactive"]) + (len(self._waiters["batch"]) if waiter.lane == "batch" else 0)
+        if self.active < self.max_concurrent and not ahead:
+            self.active += 1
+            return True
+        if self.queued() >= self.max_queue:
+            self.rejected[waiter.lane] += 1
+            raise AdmissionRejected(self.name, waiter.lane, f"{self.queued()} requests queued")
+        self._waiters[waiter.lane].append(waiter)
+        return False
+
+    def _give_up(self, waiter: _Waiter) -> bool:
+        """Leave the queue after a timeout/cancel; True if a slot was granted meanwhile"""
+        with self._lock:
+            if not waiter.granted:
+                self._waiters[waiter.lane].remove(waiter)
+            return waiter.granted
+
+    def _admitted(self, lane: str, started: float) -> Slot:
+        waited = time.monotonic() - started
+        with self._lock:
+            self.wait_count[lane] += 1
+            self.wait_sum[lane] += waited
+            for i, bound in enumerate(QUEUE_WAIT_BUCKETS_SECONDS):
+                if waited <= bound:
+                    self.wait_counts[lane][i] += 1
+                    break
+        return Slot(self, lane, waited)
+
+    def _timed_out(self, lane: str) -> AdmissionRejected:
+        with self._lock:
+            self.rejected[lane] += 1
+        return AdmissionRejected(self.name, lane, f"no slot within {self.queue_timeout}s")
+
+    def _release(self):
+        """Hand the slot to the next waiter (interactive first) or free it"""
+        with self._lock:
+            for lane in LANES:
+                if self._waiters[lane]:
+                    waiter = self._waiters[lane].popleft()
+                    waiter.granted = True
+                    waiter.wake()
+                    return
+            self.active -= 1
+
+    def acquire(self, lane: str = "interactive") -> Slot:
+        """Blocking acquire for threaded callers"""
+        started = time.monotonic()
+        waiter = _Waiter(lane)
+        with self._lock:
+            admitted = self._enter(waiter)
+        if admitted:
+            return self._admitted(lane, started)
+        if not waiter.event.wait(self.queue_timeout) and not self._give_up(waiter):
+            raise self._timed_out(lane)
+        return self._admitted(lane, started)
+
+    async def aacquire(self, lane: str = "interactive") -> Slot:
+        """Acquire for coroutines: waiting in the queue does not block the event loop"""
+        started = time.monotonic()
+        waiter = _Waiter(lane, asyncio.get_running_loop())
+        with self._lock:
+            admitted = self._enter(waiter)
+        if admitted:
+            return self._admitted(lane, started)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not self._give_up(waiter):
+                raise self._timed_out(lane)
+        except asyncio.CancelledError:
+            if self._give_up(waiter):
+                self._release()
+            raise
+        return self._admitted(lane, started)
+
+class AdmissionController:
+    """Registry of per-backend limiters
+
+    Limits come from MAX_CONCURRENT_REQUESTS / MAX_QUEUED_REQUESTS / REQUEST_TIMEOUT
+    (config/llmstack.yaml), overridable per backend, e.g. MAX_CONCURRENT_OLLAMA=2.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None, max_queue: Optional[int] = None,
+                 queue_timeout: Optional[float] = None):
+        self.max_concurrent = max_concurrent or int(os.getenv("MAX_CONCURRENT_REQUESTS", "10"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("MAX_QUEUED_REQUESTS", "50"))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv("REQUEST_TIMEOUT", "30"))
+        self.limiters: Dict[str, BackendLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, backend: str) -> BackendLimiter:
+        with self._lock:
+            if backend not in self.limiters:
+                self.limiters[backend] = BackendLimiter(
+                    backend,
+                    int(os.getenv(f"MAX_CONCURRENT_{backend.upper()}", self.max_concurrent)),
+                    int(os.getenv(f"MAX_QUEUED_{backend.upper()}", self.max_queue)),
+                    self.queue_timeout
+                )
+            return self.limiters[backend]
+
+    def acquire(self, backend: str, lane: str = "interactive") -> Slot:
+        return self.limiter(backend).acquire(lane)
+
+    async def aacquire(self, backend: str, lane: str = "interactive") -> Slot:
+        return await self.limiter(backend).aacquire(lane)
+
+    def metrics_lines(self) -> List[str]:
+        """Prometheus exposition of queue waits, rejections and occupancy"""
+        limiters = sorted(self.limiters.items())
+        metric = "orchestrator_queue_wait_seconds"
+        lines = [f"# HELP {metric} Time requests waited for a backend slot", f"# TYPE {metric} histogram"]
+        for name, limiter in limiters:
+            for lane in LANES:
+                labels = f'backend="{name}",lane="{lane}"'
+                total = 0
+                for bound, n in zip(QUEUE_WAIT_BUCKETS_SECONDS, limiter.wait_counts[lane]):
+                    total += n
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {total}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {limiter.wait_count[lane]}')
+                lines.append(f'{metric}_sum{{{labels}}} {limiter.wait_sum[lane]:.6f}')
+                lines.append(f'{metric}_count{{{labels}}} {limiter.wait_count[lane]}')
+
+        lines += ["# HELP orchestrator_admission_rejected_total Requests rejected with 429",
+                  "# TYPE orchestrator_admission_rejected_total counter"]
+        lines += [f'orchestrator_admission_rejected_total{{backend="{name}",lane="{lane}"}} {limiter.rejected[lane]}'
+                  for name, limiter in limiters for lane in LANES]
+        lines += ["# HELP orchestrator_backend_active Requests currently holding a backend slot",
+                  "# TYPE orchestrator_backend_active gauge"]
+        lines += [f'orchestrator_backend_active{{backend="{name}"}} {limiter.active}' for name, limiter in limiters]
+        lines += ["# HELP orchestrator_backend_queued Requests waiting for a backend slot",
+                  "# TYPE orchestrator_backend_queued gauge"]
+        lines += [f'orchestrator_backend_queued{{backend="{name}",lane="{lane}"}} {limiter.queued(lane)}'
+                  for name, limiter in limiters for lane in LANES]
+        return lines
+
+_default_controller: Optional[AdmissionController] = None
+_default_controller_lock = threading.Lock()
+
+def get_admission() -> AdmissionController:
+    """Process-wide controller, so every orchestrator shares the same backend limits"""
+    global _default_controller
+    with _default_controller_lock:
+        if _default_controller is None:
+            _default_controller = AdmissionController()
+        return _default_controller
@@ -7,7 +7,8 @@ Integrates MemGPT, AutoGen, CAMEL-AI, and LocalAI
 import os
 import json
 import asyncio
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 import logging
 
@@ -40,7 +41,13 @@ except ImportError:
     CAMEL_AVAILABLE = False
 
 import requests
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+
+from response_cache import ResponseCache, get_response_cache
+from circuit_breaker import CircuitOpen, get_breakers, is_backend_failure
+from model_router import default_routes, openai_base_url
+from service_probes import get_engine
+from single_flight import SingleFlight
 
 @dataclass
 class AIConfig:
@@ -52,38 +59,242 @@ class AIConfig:
     max_tokens: int = 2048
     use_local: bool = True
 
+def failover_targets(names: str) -> List[Tuple[str, str, str]]:
+    """(backend, base URL, model) for a comma-separated list of registered inference servers"""
+    endpoints = get_engine().endpoints
+    models = dict(default_routes()["general"])
+    names = [name.strip() for name in names.split(",")]
+    return [(name, openai_base_url(endpoints[name]), models.get(name, "llama3.1:8b"))
+            for name in names if name in endpoints and name != "localai"]
+
 class LocalAIClient:
     """Client for LocalAI integration"""
     
     def __init__(self, config: AIConfig):
         self.config = config
+        # Per-request timeout for LocalAI and the failover servers (BACKEND_TIMEOUT seconds)
+        self.timeout = float(os.getenv("BACKEND_TIMEOUT", "30"))
         if config.use_local:
+            # No client-side retries: a failing LocalAI fails over (below) instead of stalling
             self.client = OpenAI(
                 api_key=config.openai_api_key,
-                base_url=config.localai_endpoint
+                base_url=config.localai_endpoint,
+                timeout=self.timeout,
+                max_retries=0
             )
         else:
             self.client = OpenAI(api_key=config.openai_api_key)
+        self._async_client = None
+        self._async_loop = None
+        # Exact-match cache for deterministic completions (shared process-wide)
+        self.cache = get_response_cache()
+        # Circuit breakers shared with the other orchestrators: while LocalAI's is open (or a
+        # request fails) requests go to the LOCALAI_FAILOVER servers, default Ollama
+        self.backend = "localai" if config.use_local else "openai"
+        self.breakers = get_breakers()
+        self.failover = failover_targets(os.getenv("LOCALAI_FAILOVER", "ollama"))
+        self._failover_clients = {}
+        # Identical requests in flight at the same time share one generation (SINGLE_FLIGHT=0 disables)
+        self.flights = SingleFlight(enabled=os.getenv("SINGLE_FLIGHT", "1") != "0")
+    
+    def _get_async_client(self) -> AsyncOpenAI:
+        """AsyncOpenAI client for the running event loop (its connection pool is loop-bound)"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            kwargs = ({"base_url": self.config.localai_endpoint, "timeout": self.timeout, "max_retries": 0}
+                      if self.config.use_local else {})
+            self._async_client = AsyncOpenAI(api_key=self.config.openai_api_key, **kwargs)
+            self._async_loop = loop
+        return self._async_client
+    
+    def _failover_client(self, backend: str, base_url: str, asynchronous: bool = False):
+        """OpenAI-compatible client for a failover server (async ones are loop-bound)"""
+        loop = asyncio.get_running_loop() if asynchronous else None
+        entry = self._failover_clients.get((backend, asynchronous))
+        if entry is None or entry[0] is not loop:
+            client_class = AsyncOpenAI if asynchronous else OpenAI
+            entry = (loop, client_class(api_key=self.config.openai_api_key, base_url=base_url,
+                                        timeout=self.timeout, max_retries=0))
+            self._failover_clients[(backend, asynchronous)] = entry
+        return entry[1]
+    
+    def _targets(self, asynchronous: bool = False):
+        """(backend, client, model) in failover order: LocalAI first"""
+        yield self.backend, self._get_async_client() if asynchronous else self.client, self.config.model_name
+        for backend, base_url, model in self.failover:
+            yield backend, self._failover_client(backend, base_url, asynchronous), model
+    
+    def _create(self, messages: List[Dict[str, str]], params: Dict[str, Any], **kwargs):
+        """(backend, response) from the first server whose circuit lets the request through
+        
+        Only backend failures move on to the next server; the request's own errors
+        (4xx) are raised as they are.
+        """
+        error = None
+        for backend, client, model in self._targets():
+            breaker = self.breakers.breaker(backend)
+            if not breaker.allow():
+                error = error or CircuitOpen(backend)
+                continue
+            try:
+                response = client.chat.completions.create(messages=messages, **dict(params, model=model), **kwargs)
+            except BaseException as e:
+                breaker.record_outcome(e)
+                if not is_backend_failure(e):
+                    raise
+                logger.warning(f"{backend} failed, trying the next backend: {e}")
+                error = e
+                continue
+            breaker.record_outcome()
+            return backend, response
+        raise error
+    
+    async def _acreate(self, messages: List[Dict[str, str]], params: Dict[str, Any], **kwargs):
+        """_create for coroutines"""
+        error = None
+        for backend, client, model in self._targets(asynchronous=True):
+            breaker = self.breakers.breaker(backend)
+            if not breaker.allow():
+                error = error or CircuitOpen(backend)
+                continue
+            try:
+                response = await client.chat.completions.create(messages=messages, **dict(params, model=model),
+                                                                **kwargs)
+            except BaseException as e:
+                # Cancellation too: a half-open trial must not stay taken
+                breaker.record_outcome(e)
+                if not is_backend_failure(e):
+                    raise
+                logger.warning(f"{backend} failed, trying the next backend: {e}")
+                error = e
+                continue
+            breaker.record_outcome()
+            return backend, response
+        raise error
+    
+    def _request_params(self, kwargs) -> Dict[str, Any]:
+        return {
+            "model": self.config.model_name,
+            "temperature": kwargs.get('temperature', self.config.temperature),
+            "max_tokens": kwargs.get('max_tokens', self.config.max_tokens)
+        }
     
-    def chat_completion(self, messages: List[Dict[str, str]], **kwargs):
-        """Create a chat completion"""
+    def _cache_key(self, messages: List[Dict[str, str]], params: Dict[str, Any], cache: Optional[bool]) -> Optional[str]:
+        """Cache key if this request may be cached (temperature 0, or cache=True)"""
+        if self.cache is None or not ResponseCache.cacheable(params["temperature"], cache):
+            return None
+        return ResponseCache.key(params["model"], messages, params["temperature"], params["max_tokens"])
+    
+    def cached_response(self, messages: List[Dict[str, str]], cache: Optional[bool] = None, **kwargs) -> Optional[str]:
+        """Cached completion for this request, without calling the backend"""
+        key = self._cache_key(messages, self._request_params(kwargs), cache)
+        return self.cache.get(key) if key else None
+    
+    def chat_completion(self, messages: List[Dict[str, str]], cache: Optional[bool] = None,
+                        cache_checked: bool = False, **kwargs):
+        """Create a chat completion (answered from the response cache when possible)
+        
+        cache_checked=True: the caller already missed in cached_response(), skip the lookup.
+        """
+        params = self._request_params(kwargs)
+        key = self._cache_key(messages, params, cache)
+        if key:
+            cached = None if cache_checked else self.cache.get(key)
+            if cached is not None:
+                return cached
+            self.cache.record_miss()
         try:
-            response = self.client.chat.completions.create(
-                model=self.config.model_name,
-                messages=messages,
-                temperature=kwargs.get('temperature', self.config.temperature),
-                max_tokens=kwargs.get('max_tokens', self.config.max_tokens)
-            )
-            return response.choices[0].message.content
+            return self.flights.do(self._flight_key(messages, params), lambda: self._fetch(messages, params, key))
         except Exception as e:
             logger.error(f"Error in chat completion: {e}")
             return None
     
+    @staticmethod
+    def _flight_key(messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+        return ResponseCache.key(params["model"], messages, params["temperature"], params["max_tokens"])
+    
+    def _fetch(self, messages: List[Dict[str, str]], params: Dict[str, Any], key: Optional[str]):
+        """Completion from the backends, stored in the cache under key"""
+        backend, response = self._create(messages, params)
+        content = response.choices[0].message.content
+        # Only LocalAI's own answers are cached: the key names its model
+        if key and content is not None and backend == self.backend:
+            self.cache.put(key, content, params["model"])
+        return content
+    
+    async def _afetch(self, messages: List[Dict[str, str]], params: Dict[str, Any], key: Optional[str]):
+        backend, response = await self._acreate(messages, params)
+        content = response.choices[0].message.content
+        if key and content is not None and backend == self.backend:
+            await asyncio.to_thread(self.cache.put, key, content, params["model"])
+        return content
+    
+    def stream_chat_completion(self, messages: List[Dict[str, str]], **kwargs):
+        """Iterator of completion text pieces as the backend produces them
+        (identical concurrent streams share one backend stream)"""
+        params = self._request_params(kwargs)
+        return self.flights.stream(self._flight_key(messages, params), lambda: self._stream_pieces(messages, params))
+    
+    def _stream_pieces(self, messages: List[Dict[str, str]], params: Dict[str, Any]):
+        _, stream = self._create(messages, params, stream=True)
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing early (client disconnected) releases the backend connection
+            stream.close()
+    
+    async def achat_completion(self, messages: List[Dict[str, str]], cache: Optional[bool] = None,
+                               cache_checked: bool = False, **kwargs):
+        """Create a chat completion without blocking the event loop (the cache is read in a thread)"""
+        params = self._request_params(kwargs)
+        key = self._cache_key(messages, params, cache)
+        if key:
+            cached = None if cache_checked else await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return cached
+            self.cache.record_miss()
+        try:
+            return await self.flights.ado(self._flight_key(messages, params),
+                                          lambda: self._afetch(messages, params, key))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in chat completion: {e}")
+            return None
+    
+    def astream_chat_completion(self, messages: List[Dict[str, str]], **kwargs):
+        """Async iterator of completion text pieces as the backend produces them
+        (identical concurrent streams share one backend stream; call from a coroutine)"""
+        params = self._request_params(kwargs)
+        return self.flights.astream(self._flight_key(messages, params), lambda: self._astream_pieces(messages, params))
+    
+    async def _astream_pieces(self, messages: List[Dict[str, str]], params: Dict[str, Any]):
+        _, stream = await self._acreate(messages, params, stream=True)
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+    
+    async def aclose(self):
+        """Close the async clients' connection pools"""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+            self._async_loop = None
+        for key, (loop, client) in list(self._failover_clients.items()):
+            if loop is not None:
+                await client.close()
+                del self._failover_clients[key]
+    
     def check_connection(self) -> bool:
         """Check if LocalAI is running"""
         try:
             if self.config.use_local:
-                response = requests.get(f"{self.config.localai_endpoint}/models")
+                response = requests.get(f"{self.config.localai_endpoint}/models", timeout=5)
                 return response.status_code == 200
             else:
                 # Check OpenAI connection
@@ -309,27 +520,43 @@ class UnifiedAIOrchestrator:
         self.autogen = AutoGenOrchestrator(self.config)
         self.camel = CAMELOrchestrator(self.config)
         
+        # Sync framework adapters (AutoGen/CAMEL/MemGPT) run here on the async path
+        self._adapter_pool = ThreadPoolExecutor(max_workers=int(os.getenv("AGENT_POOL_SIZE", "4")),
+                                                thread_name_prefix="framework")
+        self.agent_timeout = float(os.getenv("AGENT_TIMEOUT", "60"))
+        
         # Check connections
         self.check_status()
     
-    def check_status(self) -> Dict[str, bool]:
-        """Check status of all components"""
-        status = {
-            "localai": self.localai.check_connection(),
+    def framework_status(self) -> Dict[str, bool]:
+        """Availability of the optional frameworks (import-time only, no network)"""
+        return {
             "memgpt": MEMGPT_AVAILABLE,
             "autogen": AUTOGEN_AVAILABLE,
             "camel": CAMEL_AVAILABLE
         }
+    
+    def check_status(self) -> Dict[str, bool]:
+        """Check status of all components"""
+        status = {"localai": self.localai.check_connection(), **self.framework_status()}
         
         logger.info(f"System status: {status}")
         return status
     
-    def chat(self, message: str, framework: str = "localai") -> str:
+    def cached_chat(self, message: str, framework: str = "localai", cache: Optional[bool] = None) -> Optional[str]:
+        """Cached answer, if any (only LocalAI completions are cached; the frameworks keep state)"""
+        if framework.lower() != "localai":
+            return None
+        return self.localai.cached_response([{"role": "user", "content": message}], cache)
+    
+    def chat(self, message: str, framework: str = "localai", cache: Optional[bool] = None,
+             cache_checked: bool = False) -> str:
         """Chat using specified framework"""
         framework = framework.lower()
         
         if framework == "localai":
-            return self.localai.chat_completion([{"role": "user", "content": message}])
+            return self.localai.chat_completion([{"role": "user", "content": message}], cache=cache,
+                                                cache_checked=cache_checked)
         elif framework == "memgpt":
             return self.memgpt.chat(message)
         elif framework == "autogen":
@@ -351,15 +578,33 @@ class UnifiedAIOrchestrator:
         
         return results
     
-    async def async_multi_agent(self, task: str, agents: List[str] = None):
-        """Execute task with multiple agents asynchronously"""
+    async def achat(self, message: str, framework: str = "localai", timeout: Optional[float] = None,
+                    cache: Optional[bool] = None, cache_checked: bool = False) -> str:
+        """Async chat: native async for LocalAI, the bounded adapter pool for sync frameworks"""
+        framework = framework.lower()
+        timeout = self.agent_timeout if timeout is None else timeout
+        
+        if framework == "localai":
+            call = self.localai.achat_completion([{"role": "user", "content": message}], cache=cache,
+                                                 cache_checked=cache_checked)
+        else:
+            # A timed-out or cancelled adapter call is abandoned; its worker finishes in the background
+            call = asyncio.get_running_loop().run_in_executor(self._adapter_pool, self.chat, message, framework)
+        return await asyncio.wait_for(call, timeout)
+    
+    async def async_multi_agent(self, task: str, agents: List[str] = None, timeout: Optional[float] = None):
+        """Execute task with multiple agents concurrently (None for agents that time out)"""
         agents = agents or ["localai", "autogen", "camel"]
         
         async def process_agent(agent: str):
-            return agent, self.chat(task, framework=agent)
+            try:
+                return agent, await self.achat(task, framework=agent, timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"{agent} timed out")
+                return agent, None
         
-        tasks = [process_agent(agent) for agent in agents]
-        results = await asyncio.gather(*tasks)
+        # Cancelling the caller cancels every in-flight agent call
+        results = await asyncio.gather(*(process_agent(agent) for agent in agents))
         
         return dict(results)
 
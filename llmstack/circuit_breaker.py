@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Circuit Breakers - fail fast instead of waiting on a dead inference backend
+Every backend has one breaker, shared by all orchestrators in the process.
+After BREAKER_FAILURES consecutive failures it opens: requests skip the
+backend at once and fail over to the next one. A background thread probes
+open backends through the shared probe engine; once a probe succeeds the
+breaker goes half-open and lets one trial request through, whose outcome
+closes or re-opens it.
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from service_probes import ProbeEngine, get_engine
+from admission import AdmissionRejected
+
+logger = logging.getLogger(__name__)
+
+STATES = ("closed", "half_open", "open")
+
+class CircuitOpen(Exception):
+    """A backend's breaker is open: the request was not sent"""
+
+    def __init__(self, backend: str):
+        super().__init__(f"{backend} is unavailable (circuit open)")
+        self.backend = backend
+
+def status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of a backend's error reply (openai.APIStatusError, httpx.HTTPStatusError), else None"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Errors that count against a backend's circuit: not the request's own 4xx, nor a request never sent"""
+    if isinstance(error, (CircuitOpen, AdmissionRejected)) or not isinstance(error, Exception):
+        return False
+    status = status_code(error)
+    return status is None or status >= 500
+
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` consecutive failures -> half_open -> closed/open"""
+
+    def __init__(self, name: str, failure_threshold: int = 3, trial_timeout: float = 30.0,
+                 on_open: Optional[Callable[["CircuitBreaker"], None]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.trial_timeout = trial_timeout
+        self.on_open = on_open
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.opened_total = 0
+        self._trial_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """May a request be sent now? Half-open admits one trial at a time"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            # A trial that never reported back (cancelled) does not block recovery forever
+            if self.state == "half_open" and (self._trial_at is None or now - self._trial_at > self.trial_timeout):
+                self._trial_at = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._trial_at = None
+            if self.state != "closed":
+                logger.info(f"Circuit for {self.name} closed")
+                self.state = "closed"
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_at = None
+            if self.state == "open" or (self.state == "closed" and self.failures < self.failure_threshold):
+                return
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.opened_total += 1
+        logger.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+        if self.on_open:
+            self.on_open(self)
+
+    def release(self) -> None:
+        """Free a half-open trial that ended without an answer (not admitted, cancelled)"""
+        with self._lock:
+            self._trial_at = None
+
+    def record_outcome(self, error: Optional[BaseException] = None) -> None:
+        """Record how a request this breaker allowed ended; every exit path must report
+
+        A reply, even the caller's own 4xx, shows the backend is up; backend
+        failures count towards opening; anything else only frees the trial.
+        """
+        if error is not None and is_backend_failure(error):
+            self.record_failure()
+        elif error is None or status_code(error) is not None:
+            self.record_success()
+        else:
+            self.release()
+
+    def half_open(self) -> None:
+        """Let a trial request through (the backend answered a recovery probe)"""
+        with self._lock:
+            if self.state == "open":
+                self.state = "half_open"
+                self._trial_at = None
+
+class BreakerRegistry:
+    """Per-backend breakers plus the background thread that probes open ones
+
+    BREAKER_FAILURES (default 3) consecutive failures open a breaker; open
+    backends are probed every BREAKER_PROBE_INTERVAL seconds (default 5).
+    Backends the probe engine does not know go half-open after
+    BREAKER_RESET_SECONDS (default 30) instead.
+    """
+
+    def __init__(self, failure_threshold: Optional[int] = None, probe_interval: Optional[float] = None,
+                 reset_timeout: Optional[float] = None, probes: Optional[ProbeEngine] = None):
+        self.failure_threshold = failure_threshold or int(os.getenv("BREAKER_FAILURES", "3"))
+        self.probe_interval = probe_interval if probe_interval is not None else float(
+            os.getenv("BREAKER_PROBE_INTERVAL", "5"))
+        self.reset_timeout = reset_timeout if reset_timeout is not None else float(
+            os.getenv("BREAKER_RESET_SECONDS", "30"))
+        self.probes = probes or get_engine()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._recovery: Optional[threading.Thread] = None
+
+    def breaker(self, backend: str) -> CircuitBreaker:
+        with self._lock:
+            if backend not in self.breakers:
+                self.breakers[backend] = CircuitBreaker(backend, self.failure_threshold, self.reset_timeout,
+                                                        on_open=self._opened)
+            return self.breakers[backend]
+
+    def allow(self, backend: str) -> bool:
+        return self.breaker(backend).allow()
+
+    def record(self, backend: str, ok: bool) -> None:
+        breaker = self.breaker(backend)
+        breaker.record_success() if ok else breaker.record_failure()
+
+    def _opened(self, breaker: CircuitBreaker) -> None:
+        """Start the recovery thread on the first open breaker; it exits once all are closed"""
+        with self._lock:
+            if self._recovery is None or not self._recovery.is_alive():
+                self._recovery = threading.Thread(target=self._recovery_loop, name="breaker-recovery", daemon=True)
+                self._recovery.start()
+
+    def _recovery_loop(self) -> None:
+        while True:
+            time.sleep(self.probe_interval)
+            with self._lock:
+                if all(b.state == "closed" for b in self.breakers.values()):
+                    self._recovery = None
+                    return
+            self.recover_once()
+
+    def recover_once(self) -> None:
+        """Probe every open backend; those that answer go half-open"""
+        open_breakers = [b for b in list(self.breakers.values()) if b.state == "open"]
+        probeable = [b.name for b in open_breakers if b.name in self.probes.endpoints]
+        try:
+            results = self.probes.check_sync(probeable, timeout=2.0, max_age=0) if probeable else {}
+        except Exception as e:
+            logger.warning(f"Recovery probe failed: {e}")
+            results = {}
+        now = time.monotonic()
+        for breaker in open_breakers:
+            if breaker.name in results:
+                if results[breaker.name].ok:
+                    breaker.half_open()
+            elif breaker.name not in self.probes.endpoints and now - breaker.opened_at >= self.reset_timeout:
+                breaker.half_open()
+
+    def metrics_lines(self) -> List[str]:
+        """Prometheus exposition of breaker states and how often each opened"""
+        breakers = sorted(self.breakers.items())
+        lines = ["# HELP orchestrator_circuit_state Backend circuit state (0 closed, 1 half-open, 2 open)",
+                 "# TYPE orchestrator_circuit_state gauge"]
+        lines += [f'orchestrator_circuit_state{{backend="{name}"}} {STATES.index(b.state)}' for name, b in breakers]
+        lines += ["# HELP orchestrator_circuit_opened_total Times a backend circuit opened",
+                  "# TYPE orchestrator_circuit_opened_total counter"]
+        lines += [f'orchestrator_circuit_opened_total{{backend="{name}"}} {b.opened_total}' for name, b in breakers]
+        return lines
+
+_default_registry: Optional[BreakerRegistry] = None
+_default_registry_lock = threading.Lock()
+
+def get_breakers() -> BreakerRegistry:
+    """Process-wide registry, so every orchestrator sees the same backend health"""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = BreakerRegistry()
+        return _default_registry
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Model Router - latency-aware choice among the local inference servers
+Each task type has equivalent (backend, model) candidates on Ollama, LM Studio,
+vLLM and LocalAI. The router keeps live latency and error statistics per
+candidate and ranks the healthy ones by expected latency, inflated by how busy
+the backend's admission queue is, so load spills over to the other servers
+instead of piling up on one.
+"""
+
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from service_probes import ProbeEngine, ServiceEndpoint, get_engine
+from admission import AdmissionController, get_admission
+
+INFERENCE_BACKENDS = ("ollama", "lmstudio", "vllm", "localai")
+
+def default_routes() -> Dict[str, List[Tuple[str, str]]]:
+    """Equivalent (backend, model) candidates per task type, preferred first
+
+    Ollama serves a model per task; LM Studio, vLLM and LocalAI serve whatever
+    LMSTUDIO_MODEL / VLLM_MODEL / LOCALAI_MODEL name.
+    """
+    others = [
+        ("lmstudio", os.getenv("LMSTUDIO_MODEL", "auto")),
+        ("vllm", os.getenv("VLLM_MODEL", "microsoft/Phi-3-mini-4k-instruct")),
+        ("localai", os.getenv("LOCALAI_MODEL", "gpt-3.5-turbo")),
+    ]
+    return {
+        "code": [("ollama", "dolphin-mistral:latest")] + others,
+        "reasoning": [("ollama", "deepseek-r1:8b")] + others,
+        "general": [("ollama", "llama3.1:8b")] + others,
+    }
+
+def openai_base_url(endpoint: ServiceEndpoint) -> str:
+    """OpenAI-compatible base URL of a registered inference server"""
+    base = endpoint.base_url.rstrip("/")
+    return base + "/v1" if endpoint.kind == "ollama" else base
+
+@dataclass
+class Candidate:
+    """Data class for one (backend, model) choice and its live statistics"""
+    backend: str
+    model: str
+    latency_ms: Optional[float] = None  # moving average of successful requests
+    error_rate: float = 0.0  # moving average of failures (1) against successes (0)
+    requests: int = 0
+    errors: int = 0
+
+class ModelRouter:
+    """Ranks candidates by expected latency; thread-safe
+
+    Backends the shared probe engine last saw down are skipped, unless no
+    candidate is up. A candidate without samples is expected to be as fast as
+    the best measured one, so idle servers get tried and measured.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, List[Tuple[str, str]]]] = None,
+                 probes: Optional[ProbeEngine] = None, admission: Optional[AdmissionController] = None,
+                 alpha: float = 0.3, health_max_age: Optional[float] = None):
+        self.probes = probes or get_engine()
+        self.admission = admission or get_admission()
+        self.alpha = alpha
+        self.health_max_age = health_max_age if health_max_age is not None else float(
+            os.getenv("ROUTER_HEALTH_MAX_AGE", "60"))
+        self.routes = {task: [Candidate(backend, model) for backend, model in candidates]
+                       for task, candidates in (routes or default_routes()).items()}
+        self._lock = threading.Lock()
+
+    def base_url(self, backend: str) -> str:
+        """OpenAI-compatible base URL of a backend, from the shared service registry"""
+        return openai_base_url(self.probes.endpoints[backend])
+
+    def backends(self, task_type: str) -> List[str]:
+        return list(dict.fromkeys(c.backend for c in self.routes.get(task_type, self.routes["general"])))
+
+    async def ensure_health(self, client: Optional[httpx.AsyncClient] = None, task_type: str = "general") -> None:
+        """Probe the task's backends if none has a result younger than health_max_age"""
+        backends = self.backends(task_type)
+        if not self.probes.cached(backends, self.health_max_age):
+            await self.probes.check(backends, client=client, timeout=2.0, max_age=self.health_max_age)
+
+    def load(self, backend: str) -> float:
+        """Requests holding or waiting for the backend's slots, per slot"""
+        limiter = self.admission.limiter(backend)
+        return (limiter.active + limiter.queued()) / limiter.max_concurrent
+
+    def rank(self, task_type: str) -> List[Candidate]:
+        """Candidates for a task type (unknown types route as "general"), best first"""
+        candidates = self.routes.get(task_type, self.routes["general"])
+        health = self.probes.cached([c.backend for c in candidates], self.health_max_age)
+        up = [c for c in candidates if c.backend in health and health[c.backend].ok]
+        # Nothing known to be up: keep the configured preference order
+        pool = up or candidates
+        loads = {backend: self.load(backend) for backend in {c.backend for c in pool}}
+        with self._lock:
+            measured = [c.latency_ms for c in pool if c.latency_ms is not None]
+            prior = min(measured) if measured else 0.0
+            # Ties (e.g. nothing measured yet) go to the least loaded, then the preferred backend
+            scores = {id(c): ((c.latency_ms if c.latency_ms is not None else prior) * (1 + loads[c.backend])
+                              / (1 - min(c.error_rate, 0.9)), loads[c.backend]) for c in pool}
+        return sorted(pool, key=lambda c: scores[id(c)])
+
+    def record(self, candidate: Candidate, latency: float, ok: bool) -> None:
+        """Fold one finished request (latency in seconds) into the candidate's statistics"""
+        with self._lock:
+            candidate.requests += 1
+            if ok:
+                latency_ms = latency * 1000
+                candidate.latency_ms = latency_ms if candidate.latency_ms is None else (
+                    self.alpha * latency_ms + (1 - self.alpha) * candidate.latency_ms)
+            else:
+                candidate.errors += 1
+            candidate.error_rate = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * candidate.error_rate
+
+    def stats(self) -> Dict[str, List[Dict[str, object]]]:
+        with self._lock:
+            return {task: [{"backend": c.backend, "model": c.model,
+                            "latency_ms": round(c.latency_ms, 1) if c.latency_ms is not None else None,
+                            "error_rate": round(c.error_rate, 3), "requests": c.requests, "errors": c.errors}
+                           for c in candidates]
+                    for task, candidates in self.routes.items()}
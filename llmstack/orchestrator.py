@@ -5,10 +5,18 @@ Simple Orchestrator - Routes requests to appropriate AI services
 
 import asyncio
 import httpx
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
+import os
 import sys
 import io
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from service_probes import get_engine, status_map
+from admission import AdmissionRejected, get_admission
+from model_router import Candidate, ModelRouter
+from circuit_breaker import CircuitOpen, get_breakers, is_backend_failure
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -24,98 +32,93 @@ class FreeAgentOrchestrator:
             "prometheus": "http://localhost:9090"
         }
         self.client = httpx.AsyncClient(timeout=30.0)
+        # Per-backend concurrency limits shared with the other orchestrators in this process
+        self.admission = get_admission()
+        # Non-model tasks go to a fixed service; model tasks to the router's best inference server
+        self.service_routes = {
+            "workflow": "flowise",  # Use visual workflow
+            "development": "openhands"  # Use coding agent
+        }
+        self.router = ModelRouter(admission=self.admission)
+        # Per-backend circuit breakers, shared with the other orchestrators in this process
+        self.breakers = get_breakers()
     
     async def check_health(self) -> Dict[str, bool]:
         """Check which services are available"""
-        health = {}
-        
-        # Check Ollama
-        try:
-            response = await self.client.get(f"{self.endpoints['ollama']}/models")
-            health["ollama"] = response.status_code == 200
-        except:
-            health["ollama"] = False
-        
-        # Check Flowise
-        try:
-            response = await self.client.get("http://localhost:3001")
-            health["flowise"] = response.status_code == 200
-        except:
-            health["flowise"] = False
-        
-        # Check OpenHands
-        try:
-            response = await self.client.get("http://localhost:3002/health")
-            health["openhands"] = response.status_code == 200
-        except:
-            health["openhands"] = False
-        
-        # Check Grafana
-        try:
-            response = await self.client.get("http://localhost:3003/api/health")
-            health["grafana"] = response.status_code == 200
-        except:
-            health["grafana"] = False
-        
-        # Check Prometheus
-        try:
-            response = await self.client.get("http://localhost:9090/-/ready")
-            health["prometheus"] = response.status_code == 200
-        except:
-            health["prometheus"] = False
-        
-        return health
+        # Shared registry and result set: a recent check by any consumer is reused
+        results = await get_engine().check(
+            ["ollama", "flowise", "openhands", "grafana", "prometheus"], client=self.client, timeout=5.0
+        )
+        return status_map(results)
     
-    async def route_request(self, prompt: str, task_type: str = "general") -> str:
-        """Route to appropriate service based on task"""
-        routing = {
-            "code": "ollama",  # Use dolphin-mistral for code
-            "reasoning": "ollama",  # Use deepseek-r1 for reasoning
-            "general": "ollama",  # Use llama3.1 for general
-            "workflow": "flowise",  # Use visual workflow
-            "development": "openhands"  # Use coding agent
-        }
+    async def route_request(self, prompt: str, task_type: str = "general", priority: str = "interactive") -> str:
+        """Route to appropriate service based on task (queued behind the backend's concurrency limit)
         
-        endpoint = self.endpoints.get(routing.get(task_type, "ollama"))
-        
-        # Select model based on task type
-        model_map = {
-            "code": "dolphin-mistral:latest",
-            "reasoning": "deepseek-r1:8b",
-            "general": "llama3.1:8b"
-        }
-        
-        model = model_map.get(task_type, "llama3.1:8b")
+        Workflow and development tasks go to Flowise and OpenHands; every other task
+        goes to the fastest healthy inference server for it (Ollama, LM Studio, vLLM,
+        LocalAI). A full queue, an open circuit or a backend failure moves on to the
+        next server; the errors are returned only when every server failed. The
+        request's own errors (4xx) are returned at once.
+        """
+        if task_type in self.service_routes:
+            backend = self.service_routes[task_type]
+            targets = [(self.endpoints[backend], backend, "llama3.1:8b", None)]
+        else:
+            await self.router.ensure_health(self.client, task_type)
+            targets = [(self.router.base_url(c.backend), c.backend, c.model, c)
+                       for c in self.router.rank(task_type)]
         
+        errors = []
+        for endpoint, backend, model, candidate in targets:
+            try:
+                return await self._complete(endpoint, backend, model, prompt, priority, candidate)
+            except (AdmissionRejected, CircuitOpen) as e:
+                errors.append(str(e))
+            except Exception as e:
+                errors.append(f"{backend}: {str(e) or type(e).__name__}")
+                if not is_backend_failure(e):
+                    break
+        return f"Error: {'; '.join(errors)}"
+    
+    async def _complete(self, endpoint: str, backend: str, model: str, prompt: str, priority: str,
+                        candidate: Optional[Candidate] = None) -> str:
+        """One chat completion; raises instead of waiting on a backend whose circuit is open"""
+        breaker = self.breakers.breaker(backend)
+        if not breaker.allow():
+            raise CircuitOpen(backend)
+        started = time.monotonic()
         try:
-            response = await self.client.post(
-                f"{endpoint}/chat/completions",
-                json={
-                    "model": model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.7,
-                    "max_tokens": 500
-                }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data["choices"][0]["message"]["content"]
-            else:
-                return f"Error: {response.status_code}"
-        except Exception as e:
-            return f"Error: {str(e)}"
+            slot = await self.admission.aacquire(backend, priority)
+            started = time.monotonic()
+            async with slot:
+                response = await self.client.post(
+                    f"{endpoint}/chat/completions",
+                    json={
+                        "model": model,
+                        "messages": [{"role": "user", "content": prompt}],
+                        "temperature": 0.7,
+                        "max_tokens": 500
+                    }
+                )
+            response.raise_for_status()
+            content = response.json()["choices"][0]["message"]["content"]
+        except BaseException as e:
+            # Every exit reports, so a half-open trial is never left taken
+            breaker.record_outcome(e)
+            if candidate and is_backend_failure(e):
+                self.router.record(candidate, time.monotonic() - started, False)
+            raise
+        
+        breaker.record_outcome()
+        if candidate:
+            self.router.record(candidate, time.monotonic() - started, True)
+        return content
     
     async def list_models(self) -> List[str]:
         """List available models from Ollama"""
-        try:
-            response = await self.client.get("http://localhost:11434/api/tags")
-            if response.status_code == 200:
-                models = response.json()["models"]
-                return [m["name"] for m in models]
-        except:
-            pass
-        return []
+        # The Ollama health probe already fetches /api/tags
+        result = (await get_engine().check(["ollama"], client=self.client, timeout=5.0))["ollama"]
+        return result.extra.get("models", []) if result.ok else []
     
     async def close(self):
         """Clean up resources"""
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Response Cache - exact-match cache for deterministic completions
+Completions are keyed by a hash of (model, messages, temperature, max_tokens)
+and kept in an in-memory LRU backed by a SQLite file, both with a TTL. Only
+temperature-0 requests are cached unless the caller opts in.
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_created ON responses (created);
+"""
+
+class ResponseCache:
+    """In-memory LRU in front of an on-disk store; thread-safe
+
+    The SQLite file is only opened (and created) by the first lookup or store.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1024, ttl: float = 86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self.conn = None
+
+    def _store(self) -> Optional[sqlite3.Connection]:
+        """The on-disk store, opened on first use (lock held); None without a path"""
+        if self.conn is None and self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.executescript(CACHE_SCHEMA)
+            self.conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+            self.conn.commit()
+        return self.conn
+
+    @staticmethod
+    def key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        payload = json.dumps([model, messages, temperature, max_tokens], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def cacheable(temperature: float, opt_in: Optional[bool] = None) -> bool:
+        """Deterministic (temperature 0) requests are cached unless opt_in is False"""
+        return opt_in if opt_in is not None else temperature == 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response or None; misses are counted by record_miss() when the backend is asked"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits["memory"] += 1
+                return entry[0]
+            self._entries.pop(key, None)
+            conn = self._store()
+            if conn is not None:
+                row = conn.execute("SELECT response, created FROM responses WHERE key = ? AND created >= ?",
+                                   (key, now - self.ttl)).fetchone()
+                if row is not None:
+                    self._remember(key, row[0], row[1])
+                    self.hits["disk"] += 1
+                    return row[0]
+            return None
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def put(self, key: str, response: str, model: str = "") -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+            conn = self._store()
+            if conn is not None:
+                conn.execute("INSERT OR REPLACE INTO responses (key, model, response, created) VALUES (?, ?, ?, ?)",
+                             (key, model, response, now))
+                conn.commit()
+
+    def _remember(self, key: str, response: str, created: float) -> None:
+        """Insert into the LRU (lock held), evicting the least recently used entry"""
+        self._entries[key] = (response, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def close(self) -> None:
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        hits = sum(self.hits.values())
+        lookups = hits + self.misses
+        return {
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "entries": len(self._entries)
+        }
+
+    def metrics_lines(self) -> List[str]:
+        """Prometheus exposition of lookups by outcome and the hit ratio"""
+        stats = self.stats()
+        metric = "orchestrator_response_cache_lookups_total"
+        lines = [f"# HELP {metric} Response cache lookups by outcome", f"# TYPE {metric} counter"]
+        lines += [f'{metric}{{result="hit",tier="{tier}"}} {n}' for tier, n in sorted(self.hits.items())]
+        lines.append(f'{metric}{{result="miss",tier="none"}} {self.misses}')
+        lines += ["# HELP orchestrator_response_cache_hit_ratio Share of cacheable requests answered from cache",
+                  "# TYPE orchestrator_response_cache_hit_ratio gauge",
+                  f"orchestrator_response_cache_hit_ratio {stats['hit_ratio'] or 0}",
+                  "# HELP orchestrator_response_cache_entries Responses held in memory",
+                  "# TYPE orchestrator_response_cache_entries gauge",
+                  f"orchestrator_response_cache_entries {stats['entries']}"]
+        return lines
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide cache configured from the environment (None when RESPONSE_CACHE=0)"""
+    global _default_cache
+    if os.getenv("RESPONSE_CACHE", "1") == "0":
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                os.getenv("RESPONSE_CACHE_FILE", os.path.join(".llm_cache", "responses.sqlite3")),
+                max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+                ttl=float(os.getenv("RESPONSE_CACHE_TTL", "86400"))
+            )
+        return _default_cache
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Semantic Cache - answers paraphrased prompts from earlier responses
+Each prompt is embedded with the locally configured embedding model and
+compared (cosine similarity) against an in-process index of earlier prompts
+for the same route; a neighbour above the threshold returns its answer.
+Opt-in: SEMANTIC_CACHE=1, limited to the routes in SEMANTIC_CACHE_ROUTES.
+"""
+
+import os
+import time
+import math
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+Embedder = Callable[[str], List[float]]
+
+class LocalAIEmbedder:
+    """Embeds text through an OpenAI-compatible /embeddings endpoint (LocalAI or Ollama)"""
+
+    def __init__(self, client, model: str):
+        self.client = client
+        self.model = model
+
+    def __call__(self, text: str) -> List[float]:
+        return self.client.embeddings.create(model=self.model, input=text).data[0].embedding
+
+class SemanticCache:
+    """In-process nearest-neighbour index of (prompt embedding -> answer), per route
+
+    Entries expire after `ttl` seconds; beyond `max_entries` the least recently
+    used entry is evicted. Thread-safe; the embedder is called outside the lock.
+    """
+
+    def __init__(self, embedder: Embedder, threshold: float = 0.92, max_entries: int = 512,
+                 ttl: float = 86400, routes: Optional[Iterable[str]] = None):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.routes = set(routes) if routes is not None else {"localai"}
+        # route -> list of [unit vector, answer, prompt, created, last_used]
+        self._entries: Dict[str, List[list]] = {}
+        self._matrices: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def enabled_for(self, route: str, opt_in: Optional[bool] = None) -> bool:
+        """Routes listed at construction use the cache; opt_in overrides per request"""
+        return opt_in if opt_in is not None else route in self.routes
+
+    def embed(self, text: str) -> Optional[List[float]]:
+        """Unit-length embedding, or None if the embedding model is unavailable"""
+        try:
+            vector = [float(x) for x in self.embedder(text)]
+        except Exception as e:
+            logger.warning(f"Embedding failed, skipping semantic cache: {e}")
+            return None
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def lookup(self, prompt: str, route: str) -> Tuple[Optional[str], Optional[List[float]]]:
+        """(cached answer or None, prompt embedding to pass to store())"""
+        vector = self.embed(prompt)
+        if vector is None:
+            return None, None
+        now = time.time()
+        with self._lock:
+            self._expire(route, now)
+            entries = self._entries.get(route, [])
+            best, similarity = None, -1.0
+            if entries:
+                scores = self._similarities(route, vector)
+                best = max(range(len(entries)), key=scores.__getitem__)
+                similarity = scores[best]
+            if best is not None and similarity >= self.threshold:
+                entries[best][4] = now
+                self.hits += 1
+                return entries[best][1], vector
+            self.misses += 1
+            return None, vector
+
+    def store(self, prompt: str, route: str, answer: str, vector: Optional[List[float]] = None) -> None:
+        vector = vector or self.embed(prompt)
+        if vector is None or not answer:
+            return
+        now = time.time()
+        with self._lock:
+            self._entries.setdefault(route, []).append([vector, answer, prompt, now, now])
+            self._matrices.pop(route, None)
+            self._evict()
+
+    def _similarities(self, route: str, vector: List[float]) -> List[float]:
+        """Cosine similarity against every entry of the route (vectors are unit length)"""
+        entries = self._entries[route]
+        if not NUMPY_AVAILABLE:
+            return [sum(a * b for a, b in zip(entry[0], vector)) for entry in entries]
+        if route not in self._matrices:
+            self._matrices[route] = np.array([entry[0] for entry in entries])
+        matrix = self._matrices[route]
+        if matrix.shape[1] != len(vector):
+            return [-1.0] * len(entries)
+        return (matrix @ np.array(vector)).tolist()
+
+    def _expire(self, route: str, now: float) -> None:
+        entries = self._entries.get(route, [])
+        fresh = [entry for entry in entries if now - entry[3] < self.ttl]
+        if len(fresh) != len(entries):
+            self.evictions += len(entries) - len(fresh)
+            self._entries[route] = fresh
+            self._matrices.pop(route, None)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries across routes beyond max_entries (lock held)"""
+        total = sum(len(entries) for entries in self._entries.values())
+        while total > self.max_entries:
+            route, index = min(((route, i) for route, entries in self._entries.items() for i in range(len(entries))),
+                               key=lambda item: self._entries[item[0]][item[1]][4])
+            del self._entries[route][index]
+            self._matrices.pop(route, None)
+            self.evictions += 1
+            total -= 1
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "entries": sum(len(entries) for entries in self._entries.values()),
+            "evictions": self.evictions
+        }
+
+    def metrics_lines(self) -> List[str]:
+        stats = self.stats()
+        return [
+            "# HELP orchestrator_semantic_cache_lookups_total Semantic cache lookups by outcome",
+            "# TYPE orchestrator_semantic_cache_lookups_total counter",
+            f'orchestrator_semantic_cache_lookups_total{{result="hit"}} {self.hits}',
+            f'orchestrator_semantic_cache_lookups_total{{result="miss"}} {self.misses}',
+            "# HELP orchestrator_semantic_cache_hit_ratio Share of semantic lookups answered from cache",
+            "# TYPE orchestrator_semantic_cache_hit_ratio gauge",
+            f"orchestrator_semantic_cache_hit_ratio {stats['hit_ratio'] or 0}",
+            "# HELP orchestrator_semantic_cache_entries Prompts in the semantic index",
+            "# TYPE orchestrator_semantic_cache_entries gauge",
+            f"orchestrator_semantic_cache_entries {stats['entries']}",
+        ]
+
+def semantic_cache_from_env(client) -> Optional[SemanticCache]:
+    """SemanticCache over the configured embedding model, or None unless SEMANTIC_CACHE=1"""
+    if os.getenv("SEMANTIC_CACHE", "0") != "1":
+        return None
+    routes = [route.strip() for route in os.getenv("SEMANTIC_CACHE_ROUTES", "localai").split(",") if route.strip()]
+    return SemanticCache(
+        LocalAIEmbedder(client, os.getenv("SEMANTIC_CACHE_EMBEDDING_MODEL", "text-embedding-ada-002")),
+        threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+        max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "512")),
+        ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "86400")),
+        routes=routes
+    )
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Single Flight - one upstream generation for identical in-flight requests
+The first caller for a key makes the upstream call; callers arriving with
+the same key while it runs attach to it and share its result (or error).
+Streams are fanned out: every subscriber gets all pieces, including those
+produced before it attached. Works from threads and coroutines alike.
+"""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+class _Flight:
+    """A call in progress and the pieces/result it has produced so far"""
+
+    def __init__(self):
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.pieces: List[Any] = []
+        self.done = False
+        self.subscribers = 0
+        self.finished = threading.Event()
+        self.changed = threading.Condition()
+        # Coroutine flights: the upstream task and its wake-up event
+        self.task: Optional[asyncio.Task] = None
+        self.wakeup: Optional[asyncio.Event] = None
+
+class SingleFlight:
+    """Coalesces identical concurrent calls; enabled=False calls straight through"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[Any, _Flight] = {}
+        self._lock = threading.Lock()
+        self.calls = 0  # upstream calls made
+        self.coalesced = 0  # callers served by another caller's upstream call
+
+    def _join(self, key) -> Tuple[_Flight, bool]:
+        """The flight for key and whether this caller leads it (lock held)"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            self.calls += 1
+            return flight, True
+        self.coalesced += 1
+        return flight, False
+
+    def _land(self, key, flight: _Flight) -> None:
+        """Stop attaching new callers to a finished or abandoned flight"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def do(self, key, fn: Callable[[], Any]) -> Any:
+        """fn(), unless an identical call is running: then wait for and share its result"""
+        if not self.enabled:
+            return fn()
+        with self._lock:
+            flight, leader = self._join(("call", key))
+        if not leader:
+            flight.finished.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            self._land(("call", key), flight)
+            flight.finished.set()
+
+    async def ado(self, key, coro_fn: Callable[[], Any]) -> Any:
+        """do() for coroutines; the upstream call is cancelled once every waiter is"""
+        if not self.enabled:
+            return await coro_fn()
+        loop_key = ("acall", id(asyncio.get_running_loop()), key)
+        with self._lock:
+            flight, leader = self._join(loop_key)
+            if leader:
+                flight.task = asyncio.get_running_loop().create_task(coro_fn())
+                flight.task.add_done_callback(lambda _: self._land(loop_key, flight))
+            flight.subscribers += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            with self._lock:
+                flight.subscribers -= 1
+                abandoned = flight.subscribers == 0
+            if abandoned:
+                self._land(loop_key, flight)
+                flight.task.cancel()
+            raise
+
+    def stream(self, key, factory: Callable[[], Iterator[Any]]) -> Iterator[Any]:
+        """Pieces of factory()'s iterator, produced once for all identical concurrent streams"""
+        if not self.enabled:
+            return factory()
+        with self._lock:
+            flight, leader = self._join(("stream", key))
+            with flight.changed:
+                flight.subscribers += 1
+        if leader:
+            threading.Thread(target=self._pump, args=(("stream", key), flight, factory),
+                             name="single-flight", daemon=True).start()
+        return self._subscribe(flight)
+
+    def _pump(self, key, flight: _Flight, factory: Callable[[], Iterator[Any]]) -> None:
+        """Drive the upstream iterator, publishing pieces until it ends or nobody listens"""
+        upstream = None
+        try:
+            upstream = factory()
+            for piece in upstream:
+                with self._lock, flight.changed:
+                    if not flight.subscribers:
+                        # Everyone disconnected: release the backend, attach nobody new
+                        self._flights.pop(key, None)
+                        break
+                    flight.pieces.append(piece)
+                    flight.changed.notify_all()
+        except Exception as e:
+            flight.error = e
+        finally:
+            if upstream is not None and hasattr(upstream, "close"):
+                upstream.close()
+            self._land(key, flight)
+            with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
+
+    @staticmethod
+    def _subscribe(flight: _Flight) -> Iterator[Any]:
+        index = 0
+        try:
+            while True:
+                with flight.changed:
+                    while index >= len(flight.pieces) and not flight.done:
+                        flight.changed.wait()
+                    if index < len(flight.pieces):
+                        piece = flight.pieces[index]
+                    elif flight.error is not None:
+                        raise flight.error
+                    else:
+                        return
+                index += 1
+                yield piece
+        finally:
+            with flight.changed:
+                flight.subscribers -= 1
+
+    def astream(self, key, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """stream() for async iterators; the upstream is closed once every subscriber is gone"""
+        if not self.enabled:
+            return factory()
+        loop = asyncio.get_running_loop()
+        loop_key = ("astream", id(loop), key)
+        with self._lock:
+            flight, leader = self._join(loop_key)
+            if leader:
+                flight.wakeup = asyncio.Event()
+                flight.task = loop.create_task(self._apump(loop_key, flight, factory))
+            flight.subscribers += 1
+        return self._asubscribe(loop_key, flight)
+
+    async def _apump(self, key, flight: _Flight, factory: Callable[[], AsyncIterator[Any]]) -> None:
+        upstream = factory()
+        try:
+            async for piece in upstream:
+                flight.pieces.append(piece)
+                self._wake(flight)
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            self._land(key, flight)
+            self._wake(flight)
+            if hasattr(upstream, "aclose"):
+                await upstream.aclose()
+
+    @staticmethod
+    def _wake(flight: _Flight) -> None:
+        wakeup, flight.wakeup = flight.wakeup, asyncio.Event()
+        wakeup.set()
+
+    async def _asubscribe(self, key, flight: _Flight) -> AsyncIterator[Any]:
+        index = 0
+        try:
+            while True:
+                if index < len(flight.pieces):
+                    index += 1
+                    yield flight.pieces[index - 1]
+                elif flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                else:
+                    await flight.wakeup.wait()
+        finally:
+            with self._lock:
+                flight.subscribers -= 1
+                abandoned = flight.subscribers == 0 and not flight.done
+            if abandoned:
+                self._land(key, flight)
+                flight.task.cancel()
+
+    def metrics_lines(self) -> List[str]:
+        return [
+            "# HELP orchestrator_single_flight_requests_total Completion requests by whether they reached the backend",
+            "# TYPE orchestrator_single_flight_requests_total counter",
+            f'orchestrator_single_flight_requests_total{{result="upstream"}} {self.calls}',
+            f'orchestrator_single_flight_requests_total{{result="coalesced"}} {self.coalesced}',
+        ]
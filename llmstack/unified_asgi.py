@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+ASGI serving mode for the Unified AI Orchestrator
+Same routes and web UI as the Flask server, but slow LLM calls are awaited
+coroutines instead of blocked threads. Needs fastapi and uvicorn.
+
+    python unified_orchestrator.py --asgi
+    uvicorn unified_asgi:create_app --factory --port 5000
+"""
+
+import json
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+import uvicorn
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from admission import AdmissionRejected, rejection, request_priority
+
+def rejected_response(error: AdmissionRejected) -> JSONResponse:
+    """HTTP 429 for a request turned away by admission control"""
+    body, status, headers = rejection(error)
+    return JSONResponse(body, status_code=status, headers=headers)
+
+def create_app(system=None, index_html: Optional[str] = None) -> FastAPI:
+    """Build the ASGI app around a UnifiedSystemOrchestrator (the module-level one by default)"""
+    if system is None or index_html is None:
+        import unified_orchestrator
+        system = system or unified_orchestrator.orchestrator
+        index_html = index_html or unified_orchestrator.INDEX_HTML
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        system.start_status_refresher()
+        yield
+        # Runs after in-flight requests have drained (or the grace period ran out)
+        system.stop_status_refresher()
+        await system.ai_orchestrator.localai.aclose()
+
+    app = FastAPI(title="Unified AI Orchestrator", lifespan=lifespan)
+
+    @app.get('/', response_class=HTMLResponse)
+    async def index():
+        """Web interface"""
+        return index_html
+
+    @app.get('/status')
+    async def get_status():
+        """Get system status (served from the background-refreshed snapshot)"""
+        return system.status_snapshot()
+
+    @app.get('/metrics', response_class=PlainTextResponse)
+    async def get_metrics():
+        """Prometheus metrics (backend queue waits, admission, circuit breakers and response caches)"""
+        return "\n".join(system.metrics_lines()) + "\n"
+
+    @app.post('/execute')
+    async def execute_task(request: Request):
+        """Execute a task"""
+        data = await request.json()
+        try:
+            return await system.aroute_task(data.get('task', ''), routing_strategy=data.get('framework', 'auto'),
+                                            priority=request_priority(data), cache=data.get('cache'),
+                                            semantic=data.get('semantic_cache'))
+        except AdmissionRejected as e:
+            return rejected_response(e)
+
+    @app.post('/execute/stream')
+    async def execute_task_stream(request: Request):
+        """Execute a task, streaming tokens as Server-Sent Events"""
+        data = await request.json()
+
+        # Pull the "admitted" event before answering, so a full backend queue is a 429
+        stream = system.astream_task(data.get('task', ''), routing_strategy=data.get('framework', 'auto'),
+                                     priority=request_priority(data))
+        try:
+            admitted = await stream.__anext__()
+        except AdmissionRejected as e:
+            return rejected_response(e)
+
+        async def events():
+            try:
+                yield f"event: {admitted[0]}\ndata: {json.dumps(admitted[1])}\n\n"
+                async for event, payload in stream:
+                    yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+            finally:
+                await stream.aclose()
+
+        return StreamingResponse(events(), media_type='text/event-stream',
+                                 headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @app.post('/collaborate')
+    async def collaborate(request: Request):
+        """Multi-agent collaboration"""
+        data = await request.json()
+        return await system.amulti_agent_collaboration(
+            data.get('task', ''), data.get('agents', None),
+            agent_timeouts=data.get('agent_timeouts'),
+            deadline=data.get('deadline'),
+            quorum=data.get('quorum'),
+            priority=request_priority(data),
+            cache=data.get('cache')
+        )
+
+    return app
+
+def serve(system=None, index_html: Optional[str] = None, host: str = '0.0.0.0', port: int = 5000):
+    """Run the ASGI app until Ctrl+C/SIGTERM, then drain in-flight requests"""
+    config = uvicorn.Config(
+        create_app(system, index_html), host=host, port=port,
+        timeout_graceful_shutdown=float(os.getenv("ORCHESTRATOR_SHUTDOWN_GRACE", "30")),
+        log_level="info"
+    )
+    uvicorn.Server(config).run()
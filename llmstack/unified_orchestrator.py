@@ -12,7 +12,10 @@ from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 from datetime import datetime
 import logging
-from flask import Flask, jsonify, request, render_template_string
+import time
+import itertools
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from flask import Flask, Response, jsonify, request, render_template_string, stream_with_context
 import threading
 
 # Configure logging
@@ -22,9 +25,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Import the AI frameworks integration
+# Import the AI frameworks integration and the shared service probes (repository root)
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ai_frameworks_integration import UnifiedAIOrchestrator, AIConfig
+from service_probes import get_engine, status_map
+from admission import AdmissionRejected, get_admission, rejection, request_priority
+from semantic_cache import semantic_cache_from_env
 
 # Flask app for web interface
 app = Flask(__name__)
@@ -53,57 +60,41 @@ class UnifiedSystemOrchestrator:
         )
         self.ai_orchestrator = UnifiedAIOrchestrator(config)
         
-        # Service endpoints
-        self.endpoints = {
-            "localai": "http://localhost:8080",
-            "ollama": "http://localhost:11434",
-            "flowise": "http://localhost:3001",
-            "llmstack": "http://localhost:3000",
-            "grafana": "http://localhost:3003",
-            "prometheus": "http://localhost:9090"
-        }
+        # Service endpoints come from the shared registry, probed by the process-wide engine
+        self.probes = get_engine()
+        self.endpoints = {name: endpoint.base_url for name, endpoint in self.probes.endpoints.items()}
         
         # System status
         self.status = SystemStatus()
         self.update_status()
-    
-    def update_status(self):
-        """Update system status"""
-        import requests
-        
-        # Check each service
-        services_status = {}
         
-        # Check LocalAI
-        try:
-            r = requests.get(f"{self.endpoints['localai']}/models", timeout=2)
-            services_status['localai'] = r.status_code == 200
-        except:
-            services_status['localai'] = False
-        
-        # Check Ollama
-        try:
-            r = requests.get(f"{self.endpoints['ollama']}/api/tags", timeout=2)
-            services_status['ollama'] = r.status_code == 200
-        except:
-            services_status['ollama'] = False
+        # Cached snapshot kept fresh by a background refresher, so /status never blocks on probes
+        self.refresh_interval = float(os.getenv("STATUS_REFRESH_SECONDS", "5"))
+        self._snapshot = self.get_status_dict()
+        self._snapshot_at = time.monotonic()
+        self._snapshot_lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._refresher_stop = threading.Event()
         
-        # Check Flowise
-        try:
-            r = requests.get(self.endpoints['flowise'], timeout=2)
-            services_status['flowise'] = r.status_code == 200
-        except:
-            services_status['flowise'] = False
+        # Agent fan-out for multi_agent_collaboration: per-agent timeout, overall deadline, quorum
+        self.agent_timeout = float(os.getenv("COLLAB_AGENT_TIMEOUT", "30"))
+        self.collab_deadline = float(os.getenv("COLLAB_DEADLINE", "45"))
+        # Per-backend concurrency limits, shared with every orchestrator in the process
+        self.admission = get_admission()
+        # Opt-in (SEMANTIC_CACHE=1) nearest-neighbour cache for paraphrased prompts
+        self.semantic_cache = semantic_cache_from_env(self.ai_orchestrator.localai.client)
         
-        # Check LLMStack
-        try:
-            r = requests.get(self.endpoints['llmstack'], timeout=2)
-            services_status['llmstack'] = r.status_code == 200
-        except:
-            services_status['llmstack'] = False
+        self._agent_pool = ThreadPoolExecutor(max_workers=int(os.getenv("COLLAB_MAX_WORKERS", "8")),
+                                              thread_name_prefix="agent")
+    
+    def update_status(self, max_age: Optional[float] = None):
+        """Update system status"""
+        # One concurrent round through the shared engine; results younger than its ttl are reused
+        services_status = status_map(self.probes.check_sync(["localai", "ollama", "flowise", "llmstack"],
+                                                            timeout=2, max_age=max_age))
         
-        # Update framework status
-        framework_status = self.ai_orchestrator.check_status()
+        # Framework availability is import-time only; LocalAI is covered by the probe above
+        framework_status = self.ai_orchestrator.framework_status()
         
         # Update system status
         self.status.localai = services_status.get('localai', False)
@@ -134,8 +125,62 @@ class UnifiedSystemOrchestrator:
             "last_check": self.status.last_check.isoformat() if self.status.last_check else None
         }
     
-    def route_task(self, task: str, routing_strategy: str = "auto") -> Dict[str, Any]:
-        """Route task to appropriate framework or service"""
+    def refresh_snapshot(self) -> Dict[str, Any]:
+        """Probe once and swap in a new cached status snapshot"""
+        snapshot = self.update_status(max_age=self.refresh_interval / 2)
+        with self._snapshot_lock:
+            self._snapshot = snapshot
+            self._snapshot_at = time.monotonic()
+        return snapshot
+    
+    def _refresh_loop(self):
+        """Background refresher: re-probe every refresh_interval until stopped"""
+        while not self._refresher_stop.wait(self.refresh_interval):
+            try:
+                self.refresh_snapshot()
+            except Exception as e:
+                logger.error(f"Status refresh failed: {e}")
+    
+    def start_status_refresher(self):
+        """Start the background status refresher (no-op if already running)"""
+        with self._snapshot_lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher_stop.clear()
+            self._refresher = threading.Thread(target=self._refresh_loop, name="status-refresher", daemon=True)
+            self._refresher.start()
+    
+    def stop_status_refresher(self):
+        """Stop the background status refresher"""
+        self._refresher_stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=self.refresh_interval + 5)
+            self._refresher = None
+    
+    def status_snapshot(self) -> Dict[str, Any]:
+        """Cached status plus staleness metadata; never probes on the caller's thread"""
+        self.start_status_refresher()
+        with self._snapshot_lock:
+            snapshot, checked_at = self._snapshot, self._snapshot_at
+        age = time.monotonic() - checked_at
+        return {
+            **snapshot,
+            "age_seconds": round(age, 3),
+            "refresh_interval": self.refresh_interval,
+            "stale": age > 2 * self.refresh_interval
+        }
+    
+    def metrics_lines(self) -> List[str]:
+        """Prometheus lines for /metrics: admission control, circuit breakers, coalescing and the response caches"""
+        localai = self.ai_orchestrator.localai
+        lines = self.admission.metrics_lines() + localai.breakers.metrics_lines() + localai.flights.metrics_lines()
+        for cache in (localai.cache, self.semantic_cache):
+            if cache:
+                lines += cache.metrics_lines()
+        return lines
+    
+    def select_framework(self, task: str, routing_strategy: str = "auto") -> str:
+        """Pick the framework for a task"""
         
         # Analyze task to determine best framework
         task_lower = task.lower()
@@ -143,21 +188,81 @@ class UnifiedSystemOrchestrator:
         # Routing logic
         if routing_strategy == "auto":
             if "remember" in task_lower or "memory" in task_lower:
-                framework = "memgpt"
+                return "memgpt"
             elif "collaborate" in task_lower or "team" in task_lower:
-                framework = "autogen"
+                return "autogen"
             elif "role" in task_lower or "play" in task_lower:
-                framework = "camel"
+                return "camel"
             elif "code" in task_lower or "program" in task_lower:
-                framework = "autogen"
+                return "autogen"
             else:
-                framework = "localai"
-        else:
-            framework = routing_strategy
+                return "localai"
+        return routing_strategy
+    
+    def backend_for(self, framework: str) -> str:
+        """Backend whose concurrency limit a framework's requests count against"""
+        # MemGPT, AutoGen and CAMEL are all configured against the LocalAI endpoint
+        return "localai"
+    
+    def _cached_result(self, task: str, framework: str, cache: Optional[bool]) -> Optional[Dict[str, Any]]:
+        """Answer from the response cache, without taking a backend slot"""
+        cached = self.ai_orchestrator.cached_chat(task, framework, cache)
+        if cached is None:
+            return None
+        return {
+            "success": True,
+            "framework": framework,
+            "result": cached,
+            "cached": True,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def _semantic_result(self, task: str, framework: str, semantic: Optional[bool]):
+        """(answer of a similar earlier prompt or None, prompt embedding) from the semantic cache
+        
+        semantic=None uses the route's configured enablement; True/False override it.
+        """
+        if self.semantic_cache is None or not self.semantic_cache.enabled_for(framework, semantic):
+            return None, None
+        answer, vector = self.semantic_cache.lookup(task, framework)
+        if answer is None:
+            return None, vector
+        return {
+            "success": True,
+            "framework": framework,
+            "result": answer,
+            "cached": "semantic",
+            "timestamp": datetime.now().isoformat()
+        }, vector
+    
+    def _remember_semantic(self, task: str, framework: str, result, vector) -> None:
+        """Index a fresh answer under the prompt embedding computed by the lookup"""
+        if vector is not None and isinstance(result, str) and not result.startswith("Error:"):
+            self.semantic_cache.store(task, framework, result, vector)
+    
+    def route_task(self, task: str, routing_strategy: str = "auto", priority: str = "interactive",
+                   cache: Optional[bool] = None, semantic: Optional[bool] = None) -> Dict[str, Any]:
+        """Route task to appropriate framework or service
+        
+        Cache hits return at once. Otherwise waits for a slot on the backend;
+        raises AdmissionRejected (HTTP 429) when its queue is full. cache=True
+        caches a non-zero temperature LocalAI answer, cache=False bypasses the cache.
+        semantic=True/False turns the semantic cache on/off for this request.
+        """
+        framework = self.select_framework(task, routing_strategy)
+        cached = self._cached_result(task, framework, cache)
+        if cached:
+            return cached
+        cached, vector = self._semantic_result(task, framework, semantic)
+        if cached:
+            return cached
+        slot = self.admission.acquire(self.backend_for(framework), priority)
         
         # Execute task
         try:
-            result = self.ai_orchestrator.chat(task, framework=framework)
+            # _cached_result already missed: no second lookup
+            result = self.ai_orchestrator.chat(task, framework=framework, cache=cache, cache_checked=True)
+            self._remember_semantic(task, framework, result, vector)
             return {
                 "success": True,
                 "framework": framework,
@@ -172,40 +277,297 @@ class UnifiedSystemOrchestrator:
                 "framework": framework,
                 "timestamp": datetime.now().isoformat()
             }
+        finally:
+            slot.release()
     
-    def multi_agent_collaboration(self, task: str, agents: List[str] = None):
-        """Execute task with multiple agents collaborating"""
-        agents = agents or ["autogen", "camel", "localai"]
+    async def aroute_task(self, task: str, routing_strategy: str = "auto", priority: str = "interactive",
+                          cache: Optional[bool] = None, semantic: Optional[bool] = None) -> Dict[str, Any]:
+        """route_task for the async server: awaits the backend instead of blocking a thread"""
+        framework = self.select_framework(task, routing_strategy)
+        # The SQLite lookup and the embedding call are blocking, keep them off the event loop
+        cached = await asyncio.to_thread(self._cached_result, task, framework, cache)
+        if cached:
+            return cached
+        cached, vector = await asyncio.to_thread(self._semantic_result, task, framework, semantic)
+        if cached:
+            return cached
+        slot = await self.admission.aacquire(self.backend_for(framework), priority)
+        
+        try:
+            result = await self.ai_orchestrator.achat(task, framework=framework, cache=cache, cache_checked=True)
+            self._remember_semantic(task, framework, result, vector)
+            return {
+                "success": True,
+                "framework": framework,
+                "result": result,
+                "timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"Error routing task: {e}")
+            return {
+                "success": False,
+                "error": str(e) or type(e).__name__,
+                "framework": framework,
+                "timestamp": datetime.now().isoformat()
+            }
+        finally:
+            slot.release()
+    
+    def stream_task(self, task: str, routing_strategy: str = "auto", priority: str = "interactive"):
+        """Route a task and yield ("token", text) events as they arrive, then ("done", stats)
+        
+        The first event, ("admitted", ...), comes once a backend slot is held; pulling
+        it raises AdmissionRejected if the backend queue is full. LocalAI streams
+        from the OpenAI-compatible backend; the other frameworks have no token
+        stream, so their whole answer arrives as a single event. Tokens are
+        counted as streamed content chunks.
+        """
+        framework = self.select_framework(task, routing_strategy)
+        started = time.monotonic()
+        first_token_at = None
+        tokens = 0
         
+        with self.admission.acquire(self.backend_for(framework), priority) as slot:
+            yield "admitted", {"framework": framework, "queue_wait_ms": round(slot.wait_seconds * 1000, 1)}
+            try:
+                if framework == "localai":
+                    pieces = self.ai_orchestrator.localai.stream_chat_completion([{"role": "user", "content": task}])
+                else:
+                    pieces = iter([self.ai_orchestrator.chat(task, framework=framework) or ""])
+                for piece in pieces:
+                    if first_token_at is None:
+                        first_token_at = time.monotonic()
+                    tokens += 1
+                    yield "token", piece
+            except Exception as e:
+                logger.error(f"Error streaming task: {e}")
+                yield "error", {"error": str(e), "framework": framework}
+        
+        yield "done", self._stream_stats(framework, started, first_token_at, tokens)
+    
+    async def astream_task(self, task: str, routing_strategy: str = "auto", priority: str = "interactive"):
+        """Async generator version of stream_task for the async server"""
+        framework = self.select_framework(task, routing_strategy)
+        started = time.monotonic()
+        first_token_at = None
+        tokens = 0
+        
+        async with await self.admission.aacquire(self.backend_for(framework), priority) as slot:
+            yield "admitted", {"framework": framework, "queue_wait_ms": round(slot.wait_seconds * 1000, 1)}
+            try:
+                if framework == "localai":
+                    pieces = self.ai_orchestrator.localai.astream_chat_completion([{"role": "user", "content": task}])
+                else:
+                    pieces = self._single_piece(self.ai_orchestrator.achat(task, framework=framework))
+                async for piece in pieces:
+                    if first_token_at is None:
+                        first_token_at = time.monotonic()
+                    tokens += 1
+                    yield "token", piece
+            except Exception as e:
+                logger.error(f"Error streaming task: {e}")
+                yield "error", {"error": str(e) or type(e).__name__, "framework": framework}
+        
+        yield "done", self._stream_stats(framework, started, first_token_at, tokens)
+    
+    @staticmethod
+    async def _single_piece(call):
+        """Adapt a whole-answer coroutine to the token stream interface"""
+        yield await call or ""
+    
+    @staticmethod
+    def _stream_stats(framework: str, started: float, first_token_at: Optional[float], tokens: int) -> Dict[str, Any]:
+        """Closing statistics for a streamed task"""
+        finished = time.monotonic()
+        generating = finished - (first_token_at or finished)
+        return {
+            "framework": framework,
+            "tokens": tokens,
+            "ttft_ms": round((first_token_at - started) * 1000, 1) if first_token_at else None,
+            "total_ms": round((finished - started) * 1000, 1),
+            # Rate over the generation phase (after the first token); None for single-chunk answers
+            "tokens_per_second": round((tokens - 1) / generating, 2) if tokens > 1 and generating > 0 else None,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def multi_agent_collaboration(self, task: str, agents: List[str] = None,
+                                  agent_timeouts: Optional[Dict[str, float]] = None,
+                                  deadline: Optional[float] = None, quorum: Optional[int] = None,
+                                  priority: str = "interactive", cache: Optional[bool] = None):
+        """Execute task with multiple agents collaborating
+        
+        Agents run concurrently. Each gets its own timeout (agent_timeouts, else
+        agent_timeout); waiting stops at the overall deadline, or as soon as
+        `quorum` agents have succeeded. Synthesis uses whatever finished in time.
+        """
+        agents, limits, quorum = self._collaboration_policy(agents, agent_timeouts, deadline, quorum)
+        started = time.monotonic()
+        cutoffs = {agent: started + limit for agent, limit in limits.items()}
+        
+        def run_agent(agent: str):
+            logger.info(f"Processing with {agent}...")
+            agent_started = time.monotonic()
+            try:
+                result = self.route_task(task, routing_strategy=agent, priority=priority, cache=cache)
+            except AdmissionRejected as e:
+                result = self._rejected_result(agent, e)
+            return result, agent_started, time.monotonic()
+        
+        futures = {self._agent_pool.submit(run_agent, agent): agent for agent in agents}
+        pending = set(futures)
         results = {}
-        for agent in agents:
+        timings = {}
+        succeeded = 0
+        
+        while pending and succeeded < quorum:
+            now = time.monotonic()
+            # Agents past their own cutoff are abandoned (their late result is discarded)
+            for future in [f for f in pending if cutoffs[futures[f]] <= now]:
+                agent = futures[future]
+                pending.discard(future)
+                future.cancel()
+                timings[agent] = {"status": "timeout", "elapsed_ms": round((now - started) * 1000, 1)}
+                results[agent] = {"success": False, "error": "timed out", "framework": agent}
+            if not pending:
+                break
+            done, _ = wait(pending, timeout=min(cutoffs[futures[f]] for f in pending) - now,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                agent = futures[future]
+                pending.discard(future)
+                # run_agent reports errors in the result, so result() does not raise
+                result, agent_started, finished = future.result()
+                results[agent] = result
+                succeeded += bool(result.get("success"))
+                timings[agent] = {
+                    "status": self._agent_status(result),
+                    "elapsed_ms": round((finished - agent_started) * 1000, 1),
+                    "queued_ms": round((agent_started - started) * 1000, 1)
+                }
+        
+        # Quorum reached before the stragglers finished
+        for future in pending:
+            agent = futures[future]
+            future.cancel()
+            timings[agent] = {"status": "skipped", "elapsed_ms": round((time.monotonic() - started) * 1000, 1)}
+        
+        # Use LocalAI to synthesize (only if at least one agent answered in time)
+        synthesis_started = time.monotonic()
+        final_result = None
+        if succeeded:
+            try:
+                with self.admission.acquire(self.backend_for("localai"), priority):
+                    final_result = self.ai_orchestrator.chat(self._synthesis_prompt(task, results), framework="localai",
+                                                             cache=cache)
+            except AdmissionRejected as e:
+                logger.warning(f"Synthesis skipped: {e}")
+        
+        return self._collaboration_result(results, final_result, timings, started, synthesis_started)
+    
+    async def amulti_agent_collaboration(self, task: str, agents: List[str] = None,
+                                         agent_timeouts: Optional[Dict[str, float]] = None,
+                                         deadline: Optional[float] = None, quorum: Optional[int] = None,
+                                         priority: str = "interactive", cache: Optional[bool] = None):
+        """multi_agent_collaboration for the async server (same policy, agents are coroutines)"""
+        agents, limits, quorum = self._collaboration_policy(agents, agent_timeouts, deadline, quorum)
+        started = time.monotonic()
+        
+        async def run_agent(agent: str):
             logger.info(f"Processing with {agent}...")
-            result = self.route_task(task, routing_strategy=agent)
-            results[agent] = result
+            try:
+                return await asyncio.wait_for(
+                    self.aroute_task(task, routing_strategy=agent, priority=priority, cache=cache), limits[agent]
+                )
+            except AdmissionRejected as e:
+                return self._rejected_result(agent, e)
         
-        # Synthesize results
+        tasks = {asyncio.ensure_future(run_agent(agent)): agent for agent in agents}
+        pending = set(tasks)
+        results = {}
+        timings = {}
+        succeeded = 0
+        
+        try:
+            while pending and succeeded < quorum:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    agent = tasks[future]
+                    elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+                    if isinstance(future.exception(), asyncio.TimeoutError):
+                        timings[agent] = {"status": "timeout", "elapsed_ms": elapsed_ms}
+                        results[agent] = {"success": False, "error": "timed out", "framework": agent}
+                        continue
+                    results[agent] = future.result()
+                    succeeded += bool(results[agent].get("success"))
+                    timings[agent] = {"status": self._agent_status(results[agent]), "elapsed_ms": elapsed_ms}
+        finally:
+            # Quorum reached (or caller cancelled) before the stragglers finished
+            for future in pending:
+                future.cancel()
+                timings[tasks[future]] = {"status": "skipped", "elapsed_ms": round((time.monotonic() - started) * 1000, 1)}
+        
+        synthesis_started = time.monotonic()
+        final_result = None
+        if succeeded:
+            try:
+                async with await self.admission.aacquire(self.backend_for("localai"), priority):
+                    final_result = await self.ai_orchestrator.achat(self._synthesis_prompt(task, results),
+                                                                    framework="localai", cache=cache)
+            except AdmissionRejected as e:
+                logger.warning(f"Synthesis skipped: {e}")
+        
+        return self._collaboration_result(results, final_result, timings, started, synthesis_started)
+    
+    def _collaboration_policy(self, agents, agent_timeouts, deadline, quorum):
+        """Resolve collaboration defaults: agent list, per-agent time limit (capped by the deadline), quorum"""
+        agents = agents or ["autogen", "camel", "localai"]
+        agent_timeouts = agent_timeouts or {}
+        deadline = self.collab_deadline if deadline is None else deadline
+        limits = {agent: min(agent_timeouts.get(agent, self.agent_timeout), deadline) for agent in agents}
+        return agents, limits, len(agents) if quorum is None else quorum
+    
+    @staticmethod
+    def _rejected_result(agent: str, error: AdmissionRejected) -> Dict[str, Any]:
+        """Result for an agent turned away by admission control"""
+        return {"success": False, "rejected": True, "error": str(error), "framework": agent}
+    
+    @staticmethod
+    def _agent_status(result: Dict[str, Any]) -> str:
+        """Per-agent status for the timing breakdown"""
+        if result.get("rejected"):
+            return "rejected"
+        return "ok" if result.get("success") else "error"
+    
+    @staticmethod
+    def _synthesis_prompt(task: str, results: Dict[str, Dict[str, Any]]) -> str:
+        """Prompt asking LocalAI to combine the successful agent answers"""
         synthesis_prompt = f"Synthesize these responses to '{task}':\n"
         for agent, result in results.items():
             if result.get('success'):
-                synthesis_prompt += f"\n{agent}: {result.get('result', 'No result')[:200]}..."
-        
-        # Use LocalAI to synthesize
-        final_result = self.ai_orchestrator.chat(synthesis_prompt, framework="localai")
-        
+                synthesis_prompt += f"\n{agent}: {(result.get('result') or 'No result')[:200]}..."
+        return synthesis_prompt
+    
+    @staticmethod
+    def _collaboration_result(results, final_result, timings, started: float, synthesis_started: float) -> Dict[str, Any]:
+        """Collaboration response with the per-agent and per-phase timing breakdown"""
+        finished = time.monotonic()
         return {
             "individual_results": results,
             "synthesis": final_result,
+            "timings": {
+                "agents": timings,
+                "fan_out_ms": round((synthesis_started - started) * 1000, 1),
+                "synthesis_ms": round((finished - synthesis_started) * 1000, 1),
+                "total_ms": round((finished - started) * 1000, 1)
+            },
             "timestamp": datetime.now().isoformat()
         }
 
 # Global orchestrator instance
 orchestrator = UnifiedSystemOrchestrator()
 
-# Flask routes
-@app.route('/')
-def index():
-    """Web interface"""
-    html = '''
+# Web interface (shared by the Flask and ASGI servers)
+INDEX_HTML = '''
     <!DOCTYPE html>
     <html>
     <head>
@@ -261,14 +623,44 @@ def index():
                 const task = document.getElementById('task').value;
                 const framework = document.getElementById('framework').value;
                 
-                const response = await fetch('/execute', {
+                // Stream tokens into the page as they arrive (Server-Sent Events over POST)
+                const response = await fetch('/execute/stream', {
                     method: 'POST',
                     headers: {'Content-Type': 'application/json'},
                     body: JSON.stringify({task, framework})
                 });
                 
-                const result = await response.json();
-                document.getElementById('result').innerHTML = '<pre>' + JSON.stringify(result, null, 2) + '</pre>';
+                const resultDiv = document.getElementById('result');
+                if (!response.ok) {
+                    // e.g. 429 when the backend queue is full
+                    resultDiv.innerHTML = '<pre>' + JSON.stringify(await response.json(), null, 2) + '</pre>';
+                    return;
+                }
+                resultDiv.innerHTML = '<pre id="output"></pre><p id="stats"></p>';
+                const output = document.getElementById('output');
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                while (true) {
+                    const {done, value} = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, {stream: true});
+                    const events = buffer.split('\\n\\n');
+                    buffer = events.pop();
+                    for (const raw of events) {
+                        const event = (raw.match(/^event: (.*)$/m) || [])[1] || 'message';
+                        const data = JSON.parse((raw.match(/^data: (.*)$/m) || [])[1]);
+                        if (event === 'token') {
+                            output.textContent += data;
+                        } else if (event === 'done') {
+                            document.getElementById('stats').textContent =
+                                `${data.framework}: first token ${data.ttft_ms} ms, ` +
+                                `${data.tokens_per_second ?? '-'} tokens/s, total ${data.total_ms} ms`;
+                        } else if (event === 'error') {
+                            output.textContent += `\\n[error] ${data.error}`;
+                        }
+                    }
+                }
             }
             
             // Auto-refresh status every 5 seconds
@@ -304,12 +696,27 @@ def index():
     </body>
     </html>
     '''
-    return render_template_string(html)
+
+# Flask routes
+@app.route('/')
+def index():
+    """Web interface"""
+    return render_template_string(INDEX_HTML)
+
+def rejected_response(error: AdmissionRejected):
+    """HTTP 429 for a request turned away by admission control"""
+    body, status, headers = rejection(error)
+    return jsonify(body), status, headers
 
 @app.route('/status')
 def get_status():
-    """Get system status"""
-    return jsonify(orchestrator.update_status())
+    """Get system status (served from the background-refreshed snapshot)"""
+    return jsonify(orchestrator.status_snapshot())
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus metrics (backend queue waits, admission, circuit breakers and response caches)"""
+    return Response("\n".join(orchestrator.metrics_lines()) + "\n", mimetype='text/plain; version=0.0.4')
 
 @app.route('/execute', methods=['POST'])
 def execute_task():
@@ -318,9 +725,37 @@ def execute_task():
     task = data.get('task', '')
     framework = data.get('framework', 'auto')
     
-    result = orchestrator.route_task(task, routing_strategy=framework)
+    try:
+        result = orchestrator.route_task(task, routing_strategy=framework, priority=request_priority(data),
+                                         cache=data.get('cache'), semantic=data.get('semantic_cache'))
+    except AdmissionRejected as e:
+        return rejected_response(e)
     return jsonify(result)
 
+@app.route('/execute/stream', methods=['POST'])
+def execute_task_stream():
+    """Execute a task, streaming tokens as Server-Sent Events"""
+    data = request.json
+    task = data.get('task', '')
+    framework = data.get('framework', 'auto')
+    
+    # Pull the "admitted" event before answering, so a full backend queue is a 429
+    stream = orchestrator.stream_task(task, routing_strategy=framework, priority=request_priority(data))
+    try:
+        admitted = next(stream)
+    except AdmissionRejected as e:
+        return rejected_response(e)
+    
+    def events():
+        try:
+            for event, payload in itertools.chain([admitted], stream):
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            stream.close()
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/collaborate', methods=['POST'])
 def collaborate():
     """Multi-agent collaboration"""
@@ -328,7 +763,14 @@ def collaborate():
     task = data.get('task', '')
     agents = data.get('agents', None)
     
-    result = orchestrator.multi_agent_collaboration(task, agents)
+    result = orchestrator.multi_agent_collaboration(
+        task, agents,
+        agent_timeouts=data.get('agent_timeouts'),
+        deadline=data.get('deadline'),
+        quorum=data.get('quorum'),
+        priority=request_priority(data),
+        cache=data.get('cache')
+    )
     return jsonify(result)
 
 def run_flask():
@@ -352,15 +794,25 @@ def main():
     print()
     print("=" * 60)
     
-    # Start Flask in background
-    flask_thread = threading.Thread(target=run_flask, daemon=True)
-    flask_thread.start()
+    # ASGI mode (--asgi or ORCHESTRATOR_SERVER=asgi) serves requests as coroutines
+    use_asgi = "--asgi" in sys.argv or os.getenv("ORCHESTRATOR_SERVER", "flask").lower() == "asgi"
+    if use_asgi:
+        try:
+            from unified_asgi import serve
+        except ImportError as e:
+            print(f"\n⚠ ASGI mode needs fastapi and uvicorn ({e}); using Flask")
+            use_asgi = False
     
-    print("\n✓ Web interface started at: http://localhost:5000")
+    # Keep the cached status fresh, then start Flask in background
+    orchestrator.start_status_refresher()
+    if not use_asgi:
+        flask_thread = threading.Thread(target=run_flask, daemon=True)
+        flask_thread.start()
+        print("\n✓ Web interface started at: http://localhost:5000")
     
     # Check initial status
     print("\nChecking system status...")
-    status = orchestrator.update_status()
+    status = orchestrator.refresh_snapshot()
     
     print("\nServices:")
     for service, online in status['services'].items():
@@ -378,12 +830,23 @@ def main():
     print("\nPress Ctrl+C to exit")
     print("=" * 60)
     
+    if use_asgi:
+        # Blocks until Ctrl+C/SIGTERM, then drains in-flight requests before returning
+        try:
+            serve(orchestrator, INDEX_HTML)
+        except KeyboardInterrupt:
+            # uvicorn re-raises the signal once shutdown has completed
+            pass
+        print("\nShutting down...")
+        return
+    
     # Keep running
     try:
-        while True:
-            asyncio.run(asyncio.sleep(1))
+        while flask_thread.is_alive():
+            flask_thread.join(1)
     except KeyboardInterrupt:
         print("\nShutting down...")
+        orchestrator.stop_status_refresher()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
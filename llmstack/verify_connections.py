@@ -5,14 +5,22 @@ Verify all services are connected and configured
 
 import requests
 import json
+import os
 import time
 import sys
 import io
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from service_probes import ProbeResult, get_engine
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
+def _failure_text(probe: ProbeResult) -> str:
+    """Describe a failed probe the way this report always has"""
+    return "NOT RESPONDING" if probe.status_code is not None else f"ERROR - {probe.detail}"
+
 def check_service_connections():
     """Check and configure all service connections"""
     
@@ -22,116 +30,99 @@ def check_service_connections():
     
     results = {}
     
+    # Probe every service concurrently through the shared engine (reusing a recent check)
+    engine = get_engine()
+    probes = engine.check_sync(["ollama", "flowise", "openhands", "grafana", "prometheus"], timeout=5)
+    
     # 1. Check Ollama
     print("\n1. Checking Ollama API...")
-    try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        if response.status_code == 200:
-            models = response.json()["models"]
-            print(f"✓ Ollama: CONNECTED - {len(models)} models available")
-            results['ollama'] = True
-        else:
-            print("✗ Ollama: NOT RESPONDING")
-            results['ollama'] = False
-    except Exception as e:
-        print(f"✗ Ollama: ERROR - {e}")
+    probe = probes["ollama"]
+    if probe.ok:
+        print(f"✓ Ollama: CONNECTED - {probe.extra['model_count']} models available")
+        results['ollama'] = True
+    else:
+        print(f"✗ Ollama: {_failure_text(probe)}")
         results['ollama'] = False
     
     # 2. Check Flowise
     print("\n2. Checking Flowise...")
-    try:
-        response = requests.get("http://localhost:3001", timeout=5)
-        if response.status_code == 200:
-            print("✓ Flowise: CONNECTED")
-            results['flowise'] = True
-            
-            # Configure Flowise to use Ollama
-            print("  Configuring Ollama connection in Flowise...")
-            config_data = {
-                "baseUrl": "http://host.docker.internal:11434",
-                "apiKey": "ollama"
-            }
-            print("  Configuration ready for Ollama models")
-        else:
-            print("✗ Flowise: NOT RESPONDING")
-            results['flowise'] = False
-    except Exception as e:
-        print(f"✗ Flowise: ERROR - {e}")
+    probe = probes["flowise"]
+    if probe.ok:
+        print("✓ Flowise: CONNECTED")
+        results['flowise'] = True
+        
+        # Configure Flowise to use Ollama
+        print("  Configuring Ollama connection in Flowise...")
+        config_data = {
+            "baseUrl": "http://host.docker.internal:11434",
+            "apiKey": "ollama"
+        }
+        print("  Configuration ready for Ollama models")
+    else:
+        print(f"✗ Flowise: {_failure_text(probe)}")
         results['flowise'] = False
     
     # 3. Check OpenHands
     print("\n3. Checking OpenHands...")
-    try:
-        response = requests.get("http://localhost:3002/health", timeout=5)
-        if response.status_code == 200:
-            print("✓ OpenHands: CONNECTED")
-            results['openhands'] = True
-            
-            # Configure OpenHands to use Ollama
-            print("  Configuring Ollama connection in OpenHands...")
-            config = {
-                "llm_provider": "ollama",
-                "llm_api_base": "http://localhost:11434/v1",
-                "llm_model": "dolphin-mistral:latest"
-            }
-            print("  Configuration ready for coding tasks")
-        else:
-            print("✗ OpenHands: NOT RESPONDING")
-            results['openhands'] = False
-    except Exception as e:
-        print(f"✗ OpenHands: ERROR - {e}")
+    probe = probes["openhands"]
+    if probe.ok:
+        print("✓ OpenHands: CONNECTED")
+        results['openhands'] = True
+        
+        # Configure OpenHands to use Ollama
+        print("  Configuring Ollama connection in OpenHands...")
+        config = {
+            "llm_provider": "ollama",
+            "llm_api_base": "http://localhost:11434/v1",
+            "llm_model": "dolphin-mistral:latest"
+        }
+        print("  Configuration ready for coding tasks")
+    else:
+        print(f"✗ OpenHands: {_failure_text(probe)}")
         results['openhands'] = False
     
     # 4. Check Grafana
     print("\n4. Checking Grafana...")
-    try:
-        response = requests.get("http://localhost:3003/api/health", timeout=5)
-        if response.status_code == 200:
-            print("✓ Grafana: CONNECTED")
-            results['grafana'] = True
-            
-            # Setup Prometheus data source
-            print("  Configuring Prometheus data source...")
-            grafana_auth = ("admin", "admin")
-            datasource_config = {
-                "name": "Prometheus",
-                "type": "prometheus",
-                "access": "proxy",
-                "url": "http://prometheus:9090",
-                "isDefault": True
-            }
-            
-            try:
-                # Try to add data source
-                response = requests.post(
-                    "http://localhost:3003/api/datasources",
-                    json=datasource_config,
-                    auth=grafana_auth,
-                    timeout=5
-                )
-                if response.status_code in [200, 409]:  # 409 means already exists
-                    print("  ✓ Prometheus data source configured")
-            except:
-                print("  ⚠ Could not auto-configure Prometheus")
-        else:
-            print("✗ Grafana: NOT RESPONDING")
-            results['grafana'] = False
-    except Exception as e:
-        print(f"✗ Grafana: ERROR - {e}")
+    probe = probes["grafana"]
+    if probe.ok:
+        print("✓ Grafana: CONNECTED")
+        results['grafana'] = True
+        
+        # Setup Prometheus data source
+        print("  Configuring Prometheus data source...")
+        grafana_auth = ("admin", "admin")
+        datasource_config = {
+            "name": "Prometheus",
+            "type": "prometheus",
+            "access": "proxy",
+            "url": "http://prometheus:9090",
+            "isDefault": True
+        }
+        
+        try:
+            # Try to add data source
+            response = requests.post(
+                f"{engine.endpoints['grafana'].base_url}/api/datasources",
+                json=datasource_config,
+                auth=grafana_auth,
+                timeout=5
+            )
+            if response.status_code in [200, 409]:  # 409 means already exists
+                print("  ✓ Prometheus data source configured")
+        except:
+            print("  ⚠ Could not auto-configure Prometheus")
+    else:
+        print(f"✗ Grafana: {_failure_text(probe)}")
         results['grafana'] = False
     
     # 5. Check Prometheus
     print("\n5. Checking Prometheus...")
-    try:
-        response = requests.get("http://localhost:9090/-/ready", timeout=5)
-        if response.status_code == 200:
-            print("✓ Prometheus: CONNECTED")
-            results['prometheus'] = True
-        else:
-            print("✗ Prometheus: NOT RESPONDING")
-            results['prometheus'] = False
-    except Exception as e:
-        print(f"✗ Prometheus: ERROR - {e}")
+    probe = probes["prometheus"]
+    if probe.ok:
+        print("✓ Prometheus: CONNECTED")
+        results['prometheus'] = True
+    else:
+        print(f"✗ Prometheus: {_failure_text(probe)}")
         results['prometheus'] = False
     
     # 6. Test Ollama API connectivity from services
@@ -140,7 +131,8 @@ def check_service_connections():
     # Test Ollama API endpoint
     try:
         test_prompt = {"model": "llama3.1:8b", "messages": [{"role": "user", "content": "test"}], "max_tokens": 5}
-        response = requests.post("http://localhost:11434/v1/chat/completions", json=test_prompt, timeout=10)
+        response = requests.post(f"{engine.endpoints['ollama'].base_url}/v1/chat/completions",
+                                 json=test_prompt, timeout=10)
         if response.status_code == 200:
             print("✓ Ollama API: WORKING")
             results['ollama_api'] = True
@@ -5,11 +5,16 @@ Auto-create merge requests for code fixes and improvements
 """
 
 import os
+import shutil
 import subprocess
 import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Optional, Dict
 from github_automation import GitHubAPI, MergeRequest
+from auto_fixers import FixCache, FixResult, FixRunner, apply_fix, file_keys, get_fixer, summarize_results
 
 logger = logging.getLogger(__name__)
 
@@ -21,44 +26,68 @@ class MergeAutomation:
         """Initialize merge automation"""
         self.github = GitHubAPI(github_token, repo)
         self.dry_run = os.getenv('DRY_RUN', 'false').lower() == 'true'
+        self.fix_runner = FixRunner()
+        self.fix_cache = FixCache()
+        self._fetched_bases = set()
+        self._fetch_lock = threading.Lock()
     
-    def create_fix_branch(self, branch_name: str, base_branch: str = 'main') -> bool:
-        """Create a new branch for fixes"""
+    def fetch_base(self, base_branch: str = 'main') -> bool:
+        """Fetch the base branch once so every fix worktree starts from the same commit"""
+        with self._fetch_lock:
+            if base_branch in self._fetched_bases:
+                return True
+            try:
+                subprocess.run(['git', 'fetch', 'origin', base_branch], check=True, capture_output=True)
+                self._fetched_bases.add(base_branch)
+                return True
+            except subprocess.CalledProcessError as e:
+                logger.error(f"Failed to fetch {base_branch}: {e}")
+                return False
+    
+    def create_fix_worktree(self, branch_name: str, base_branch: str = 'main') -> Optional[str]:
+        """Create a fix branch in its own temporary worktree, leaving the current checkout alone"""
+        if not self.fetch_base(base_branch):
+            return None
+        
+        worktree = tempfile.mkdtemp(prefix='auto-fix-')
         try:
-            # Ensure we're on the base branch
-            subprocess.run(['git', 'checkout', base_branch], check=True, capture_output=True)
-            
-            # Pull latest changes
-            subprocess.run(['git', 'pull', 'origin', base_branch], check=True, capture_output=True)
-            
-            # Create new branch
-            subprocess.run(['git', 'checkout', '-b', branch_name], check=True, capture_output=True)
-            
-            logger.info(f"Created new branch: {branch_name}")
-            return True
+            subprocess.run(['git', 'worktree', 'add', '-b', branch_name, worktree, f'origin/{base_branch}'],
+                           check=True, capture_output=True)
+            logger.info(f"Created branch {branch_name} in worktree {worktree}")
+            return worktree
             
         except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to create branch {branch_name}: {e}")
-            return False
+            logger.error(f"Failed to create worktree for {branch_name}: {e}")
+            shutil.rmtree(worktree, ignore_errors=True)
+            return None
     
-    def commit_changes(self, message: str, files: Optional[List[str]] = None) -> bool:
-        """Commit changes to current branch"""
+    def remove_worktree(self, worktree: str) -> None:
+        """Remove a temporary fix worktree"""
         try:
-            # Add files
+            subprocess.run(['git', 'worktree', 'remove', '--force', worktree], check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            logger.warning(f"Failed to remove worktree {worktree}: {e}")
+            shutil.rmtree(worktree, ignore_errors=True)
+            subprocess.run(['git', 'worktree', 'prune'], capture_output=True)
+    
+    def commit_changes(self, message: str, files: Optional[List[str]] = None, cwd: Optional[str] = None) -> bool:
+        """Commit changes to current branch (of the worktree at cwd, if given)"""
+        try:
+            # Add files in one invocation, streaming NUL-separated paths over stdin
             if files:
-                for file in files:
-                    subprocess.run(['git', 'add', file], check=True, capture_output=True)
+                subprocess.run(['git', '--literal-pathspecs', 'add', '--pathspec-from-file=-', '--pathspec-file-nul'],
+                               input='\0'.join(files).encode(), check=True, capture_output=True, cwd=cwd)
             else:
-                subprocess.run(['git', 'add', '.'], check=True, capture_output=True)
+                subprocess.run(['git', 'add', '.'], check=True, capture_output=True, cwd=cwd)
             
-            # Check if there are any changes to commit
-            result = subprocess.run(['git', 'diff', '--cached'], capture_output=True, text=True)
-            if not result.stdout.strip():
+            # Check if there are any changes to commit (exit code 0 means nothing staged)
+            result = subprocess.run(['git', 'diff', '--cached', '--quiet'], capture_output=True, cwd=cwd)
+            if result.returncode == 0:
                 logger.info("No changes to commit")
                 return False
             
             # Commit changes
-            subprocess.run(['git', 'commit', '-m', message], check=True, capture_output=True)
+            subprocess.run(['git', 'commit', '-m', message], check=True, capture_output=True, cwd=cwd)
             
             logger.info(f"Committed changes: {message}")
             return True
@@ -67,10 +96,10 @@ class MergeAutomation:
             logger.error(f"Failed to commit changes: {e}")
             return False
     
-    def push_branch(self, branch_name: str) -> bool:
+    def push_branch(self, branch_name: str, cwd: Optional[str] = None) -> bool:
         """Push branch to origin"""
         try:
-            subprocess.run(['git', 'push', 'origin', branch_name], check=True, capture_output=True)
+            subprocess.run(['git', 'push', 'origin', branch_name], check=True, capture_output=True, cwd=cwd)
             logger.info(f"Pushed branch: {branch_name}")
             return True
             
@@ -78,6 +107,32 @@ class MergeAutomation:
             logger.error(f"Failed to push branch {branch_name}: {e}")
             return False
     
+    def build_fix_branch(self, branch_name: str, fixer_name: str, commit_msg: str,
+                         base_branch: str = 'main') -> List[str]:
+        """Apply a fixer in a temporary worktree, then commit and push the branch.
+        
+        ``commit_msg`` may reference ``{count}``. Returns the fixed files, or an
+        empty list if nothing was fixed or any git step failed.
+        """
+        worktree = self.create_fix_worktree(branch_name, base_branch)
+        if not worktree:
+            return []
+        
+        try:
+            fixed_files = self.run_fixer(fixer_name, root=worktree)
+            if not fixed_files:
+                return []
+            
+            if not self.commit_changes(commit_msg.format(count=len(fixed_files)), fixed_files, cwd=worktree):
+                return []
+            
+            if not self.push_branch(branch_name, cwd=worktree):
+                return []
+            
+            return fixed_files
+        finally:
+            self.remove_worktree(worktree)
+    
     def auto_fix_shell_scripts(self) -> Optional[str]:
         """Automatically fix shell script issues and create PR"""
         branch_name = "auto-fix/shell-scripts-error-handling"
@@ -86,29 +141,14 @@ class MergeAutomation:
             logger.info(f"[DRY RUN] Would create branch {branch_name} and fix shell scripts")
             return None
         
-        # Create branch
-        if not self.create_fix_branch(branch_name):
-            return None
-        
-        # Find and fix shell scripts
-        fixed_files = []
-        shell_scripts = list(Path('.').glob('**/*.sh'))
-        
-        for script in shell_scripts:
-            if self._fix_shell_script(script):
-                fixed_files.append(str(script))
+        # Fix shell scripts on a branch in its own worktree
+        fixed_files = self.build_fix_branch(
+            branch_name, 'shell',
+            "Fix shell scripts: Add error handling (set -e) to {count} scripts"
+        )
         
         if not fixed_files:
-            logger.info("No shell script fixes needed")
-            return None
-        
-        # Commit changes
-        commit_msg = f"Fix shell scripts: Add error handling (set -e) to {len(fixed_files)} scripts"
-        if not self.commit_changes(commit_msg, fixed_files):
-            return None
-        
-        # Push branch
-        if not self.push_branch(branch_name):
+            logger.info("No shell script fixes pushed")
             return None
         
         # Create pull request
@@ -146,29 +186,14 @@ This is an automated fix generated by the PC Automation Tools.""",
             logger.info(f"[DRY RUN] Would create branch {branch_name} and fix Python imports")
             return None
         
-        # Create branch
-        if not self.create_fix_branch(branch_name):
-            return None
-        
-        # Find and fix Python files
-        fixed_files = []
-        python_files = list(Path('.').glob('**/*.py'))
-        
-        for py_file in python_files:
-            if self._fix_python_imports(py_file):
-                fixed_files.append(str(py_file))
+        # Fix Python files on a branch in its own worktree
+        fixed_files = self.build_fix_branch(
+            branch_name, 'python_imports',
+            "Fix Python imports: Sort and organize imports in {count} files"
+        )
         
         if not fixed_files:
-            logger.info("No Python import fixes needed")
-            return None
-        
-        # Commit changes
-        commit_msg = f"Fix Python imports: Sort and organize imports in {len(fixed_files)} files"
-        if not self.commit_changes(commit_msg, fixed_files):
-            return None
-        
-        # Push branch
-        if not self.push_branch(branch_name):
+            logger.info("No Python import fixes pushed")
             return None
         
         # Create pull request
@@ -199,142 +224,61 @@ This is an automated fix generated by the PC Automation Tools.""",
             logger.error(f"Failed to create PR: {e}")
             return None
     
+    def run_fixer(self, fixer_name: str, paths: Optional[List[str]] = None, root: str = '.') -> List[str]:
+        """Run a fixer plugin over its candidate files and return the changed paths relative to root"""
+        fixer = get_fixer(fixer_name)
+        if paths is None:
+            paths = [str(p.relative_to(root)) for p in Path(root).glob(fixer.pattern)]
+        
+        # Skip files whose content this fixer already found clean, without reading them
+        keys = file_keys(root, paths)
+        pending = [p for p in paths if not self.fix_cache.is_clean(fixer, p, keys[p])]
+        
+        results = self.fix_runner.run(fixer, [os.path.join(root, p) for p in pending])
+        self._log_fix_results(results)
+        
+        for path, result in zip(pending, results):
+            self.fix_cache.record(fixer, path, keys[path], clean=result.status == 'skipped')
+        self.fix_cache.save()
+        
+        summary = summarize_results(results)
+        logger.info(f"Fixer {fixer_name}: {summary['changed']} changed, {summary['skipped']} skipped, "
+                    f"{summary['error']} errors, {len(paths) - len(pending)} cached clean "
+                    f"({summary['elapsed']:.2f}s of work)")
+        
+        return [os.path.relpath(r.path, root) for r in results if r.changed]
+    
+    def _log_fix_results(self, results: List[FixResult]) -> None:
+        """Log per-file fix results"""
+        for result in results:
+            if result.status == 'changed':
+                logger.info(f"Applied {result.fixer} fix: {result.path}")
+            elif result.status == 'error':
+                logger.error(f"Failed to apply {result.fixer} fix to {result.path}: {result.error}")
+    
     def _fix_shell_script(self, script_path: Path) -> bool:
         """Fix a single shell script by adding error handling"""
-        try:
-            with open(script_path, 'r') as f:
-                content = f.read()
-            
-            lines = content.split('\n')
-            if not lines:
-                return False
-            
-            # Check if already has set -e
-            has_set_e = any('set -e' in line for line in lines[:10])
-            if has_set_e:
-                return False
-            
-            # Find shebang line
-            shebang_idx = -1
-            for i, line in enumerate(lines):
-                if line.startswith('#!'):
-                    shebang_idx = i
-                    break
-            
-            if shebang_idx == -1:
-                return False
-            
-            # Insert set -e after shebang
-            lines.insert(shebang_idx + 1, 'set -e')
-            
-            # Write back
-            with open(script_path, 'w') as f:
-                f.write('\n'.join(lines))
-            
-            logger.info(f"Fixed shell script: {script_path}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to fix shell script {script_path}: {e}")
-            return False
+        result = apply_fix('shell', get_fixer('shell').fix, str(script_path))
+        self._log_fix_results([result])
+        return result.changed
     
     def _fix_python_imports(self, py_file: Path) -> bool:
         """Fix Python imports in a file"""
-        try:
-            with open(py_file, 'r') as f:
-                content = f.read()
-            
-            lines = content.split('\n')
-            
-            # Find import section
-            import_start = -1
-            import_end = -1
-            
-            for i, line in enumerate(lines):
-                if line.startswith('import ') or line.startswith('from '):
-                    if import_start == -1:
-                        import_start = i
-                    import_end = i
-                elif import_start != -1 and line.strip() and not line.startswith('#'):
-                    break
-            
-            if import_start == -1:
-                return False
-            
-            # Extract and sort imports
-            import_lines = lines[import_start:import_end + 1]
-            
-            # Separate different types of imports
-            standard_imports = []
-            third_party_imports = []
-            local_imports = []
-            
-            for line in import_lines:
-                if not line.strip() or line.startswith('#'):
-                    continue
-                
-                # Simple heuristic for categorizing imports
-                if any(lib in line for lib in ['os', 'sys', 'json', 'datetime', 'pathlib', 'subprocess']):
-                    standard_imports.append(line)
-                elif line.startswith('from .') or line.startswith('import .'):
-                    local_imports.append(line)
-                else:
-                    third_party_imports.append(line)
-            
-            # Sort each category
-            standard_imports.sort()
-            third_party_imports.sort()
-            local_imports.sort()
-            
-            # Combine with proper spacing
-            new_imports = []
-            if standard_imports:
-                new_imports.extend(standard_imports)
-                new_imports.append('')
-            if third_party_imports:
-                new_imports.extend(third_party_imports)
-                new_imports.append('')
-            if local_imports:
-                new_imports.extend(local_imports)
-                new_imports.append('')
-            
-            # Remove trailing empty line if it exists
-            if new_imports and new_imports[-1] == '':
-                new_imports.pop()
-            
-            # Check if changes are needed
-            if new_imports == import_lines:
-                return False
-            
-            # Replace import section
-            new_lines = lines[:import_start] + new_imports + lines[import_end + 1:]
-            
-            # Write back
-            with open(py_file, 'w') as f:
-                f.write('\n'.join(new_lines))
-            
-            logger.info(f"Fixed Python imports: {py_file}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to fix Python imports {py_file}: {e}")
-            return False
+        result = apply_fix('python_imports', get_fixer('python_imports').fix, str(py_file))
+        self._log_fix_results([result])
+        return result.changed
     
     def create_audit_fix_pr(self) -> List[str]:
         """Create PRs for all automatic fixes based on audit findings"""
-        created_prs = []
-        
-        # Auto-fix shell scripts
-        shell_pr = self.auto_fix_shell_scripts()
-        if shell_pr:
-            created_prs.append(shell_pr)
-        
-        # Auto-fix Python imports
-        python_pr = self.auto_fix_python_imports()
-        if python_pr:
-            created_prs.append(python_pr)
+        # Each fixer builds its branch in its own worktree, so they can run side by side
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [
+                pool.submit(self.auto_fix_shell_scripts),
+                pool.submit(self.auto_fix_python_imports),
+            ]
+            results = [f.result() for f in futures]
         
-        return created_prs
+        return [url for url in results if url]
 
 
 def main():
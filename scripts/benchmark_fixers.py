@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the MergeAutomation fixer plugins over a large Python corpus
+
+Copies the corpus (default: the running interpreter's standard library) to a
+scratch directory, runs a fixer over it twice and reports throughput. The
+second pass must change nothing, which checks the fixer is idempotent.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import sysconfig
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from auto_fixers import FixRunner, get_fixer, summarize_results
+
+
+def copy_corpus(source: Path, dest: Path, pattern: str, limit: int) -> list:
+    """Copy matching files into dest, returning the copied paths"""
+    paths = []
+    for src in sorted(source.glob(pattern)):
+        if limit and len(paths) >= limit:
+            break
+        if not src.is_file() or 'site-packages' in src.parts:
+            continue
+        target = dest / f"{len(paths):06d}_{src.name}"
+        shutil.copyfile(src, target)
+        paths.append(str(target))
+    return paths
+
+
+def run_pass(runner: FixRunner, fixer_name: str, paths: list) -> dict:
+    """Run one fixer pass and return summary statistics"""
+    start = time.perf_counter()
+    results = runner.run(get_fixer(fixer_name), paths)
+    wall = time.perf_counter() - start
+    summary = summarize_results(results)
+    summary['wall'] = wall
+    summary['files_per_sec'] = len(paths) / wall if wall else 0.0
+    return summary
+
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Benchmark fixer plugins over a file corpus')
+    parser.add_argument('--fixer', default='python_imports', help='Fixer plugin to benchmark')
+    parser.add_argument('--corpus', default=sysconfig.get_paths()['stdlib'],
+                        help='Directory to use as corpus (default: Python stdlib)')
+    parser.add_argument('--limit', type=int, default=0, help='Maximum number of files (0 = all)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Process pool size')
+    parser.add_argument('--chunk-size', type=int, default=64, help='Files per worker batch')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  FIXER BENCHMARK")
+    print("=" * 60)
+
+    fixer = get_fixer(args.fixer)
+    with tempfile.TemporaryDirectory() as scratch:
+        paths = copy_corpus(Path(args.corpus), Path(scratch), fixer.pattern, args.limit)
+        print(f"Corpus: {len(paths)} files from {args.corpus}")
+        print(f"Fixer: {fixer.name} ({args.workers} workers, chunks of {args.chunk_size})\n")
+
+        runner = FixRunner(max_workers=args.workers, chunk_size=args.chunk_size)
+        for label in ("Pass 1", "Pass 2"):
+            stats = run_pass(runner, args.fixer, paths)
+            print(f"{label}: {stats['wall']:.2f}s wall, {stats['files_per_sec']:.0f} files/s, "
+                  f"{stats['changed']} changed, {stats['skipped']} skipped, {stats['error']} errors")
+
+    print()
+    if stats['changed']:
+        print(f"✗ Fixer is not idempotent: {stats['changed']} files changed on the second pass")
+        return 1
+    print("✓ Second pass changed nothing")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,11 +2,17 @@
 """
 Performance benchmark script for LLMStack deployment
 """
+import sys
 import time
 import asyncio
 import httpx
 import statistics
 import json
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from service_probes import get_engine
 
 async def benchmark_endpoint(endpoint: str, model: str, num_requests: int = 10):
     """Benchmark a model endpoint"""
@@ -65,34 +71,29 @@ async def benchmark_endpoint(endpoint: str, model: str, num_requests: int = 10):
     
     return None
 
+# Display name -> service in the shared registry (service_probes.py)
+BENCHMARK_SERVICES = {
+    "Ollama": "ollama",
+    "LM Studio": "lmstudio",
+    "vLLM": "vllm",
+    "LLMStack": "llmstack",
+    "Flowise": "flowise",
+    "OpenHands": "openhands"
+}
+
 async def system_health_check():
     """Check system health before benchmarking"""
-    client = httpx.AsyncClient(timeout=5.0)
-    
-    services = {
-        "Ollama": "http://localhost:11434/api/tags",
-        "LM Studio": "http://localhost:1234/v1/models",
-        "vLLM": "http://localhost:8000/v1/models",
-        "LLMStack": "http://localhost:3000/api/health",
-        "Flowise": "http://localhost:3001",
-        "OpenHands": "http://localhost:3002/health"
-    }
+    # One concurrent round through the shared probe engine
+    results = await get_engine().check(BENCHMARK_SERVICES.values(), timeout=5.0)
     
     print("🔍 System Health Check:")
     health = {}
     
-    for service, url in services.items():
-        try:
-            response = await client.get(url)
-            is_healthy = response.status_code in [200, 404]  # 404 can be OK for some endpoints
-            health[service] = is_healthy
-            status = "✓ Online" if is_healthy else "✗ Offline"
-            print(f"  {service}: {status}")
-        except:
-            health[service] = False
-            print(f"  {service}: ✗ Offline")
+    for service, name in BENCHMARK_SERVICES.items():
+        health[service] = results[name].ok
+        status = "✓ Online" if health[service] else "✗ Offline"
+        print(f"  {service}: {status}")
     
-    await client.aclose()
     return health
 
 async def main():
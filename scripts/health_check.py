@@ -4,13 +4,28 @@ Unified Health Check Utility for pc-automation-tools
 
 Features:
 - Probes LocalAI/OpenAI-compatible endpoint (/models), Ollama (/api/tags), vLLM (/v1/models),
-  Flowise (/), Prometheus (/api/v1/status/runtimeinfo), Grafana (/api/health)
+  Flowise (/), Prometheus (/-/ready), Grafana (/api/health) through the shared
+  registry and probe engine in service_probes.py
 - JSON structured output (stdout)
 - Optional Prometheus metrics export (--prometheus-export <file>)
 - Optional CI gating (--fail-on-down)
-- Optional persistent report storage (--save-dir, --retain)
+- Optional persistent report storage in one SQLite time-series file (--save-dir/--store,
+  --retain, --store-max-mb) with 1m/1h/1d rollups and range queries (--query)
 - Optional automatic issue reporting for down services (--auto-report --issue-repo <owner/repo>)
 - Deduplicated issue creation via signature caching
+- Continuous daemon mode (--daemon --interval) with one pooled HTTP client,
+  jittered scheduling, rolling in-memory state and incremental JSONL reports
+- Built-in Prometheus /metrics endpoint in daemon mode (--metrics-port): latency
+  histograms, up gauges, probe-error counters and model counts from memory
+- Adaptive per-service scheduling in daemon mode: learned timeouts, exponential
+  backoff with fast-fail for down services, faster probes for flapping ones
+- Auto-reported incidents deduplicated in one SQLite state file, with expiry
+  (--incident-ttl) and auto-resolve when the service recovers; issues created over
+  one pooled client, with wide outages grouped into a single issue
+- Optional deep inference probes (--inference-probe): rate-limited 1-token streaming
+  chat completions recording time-to-first-token, total latency and cold loads
+- Rolling per-service p50/p90/p99 latency over configurable windows (--latency-windows)
+  from bounded-memory log-bucketed sketches, in JSON state and /metrics
 """
 from __future__ import annotations
 import os
@@ -19,28 +34,39 @@ import json
 import time
 import argparse
 import hashlib
-from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any, List
+import math
+import random
+import signal
+import sys
+from collections import deque
+from dataclasses import dataclass, asdict, field, fields
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Deque, Sequence, Tuple
 
 import httpx
 
-DEFAULT_TIMEOUT = float(os.getenv("TIMEOUT_SECONDS", "8"))
+from health_store import HealthStore, IncidentStore, ROLLUP_RESOLUTIONS, open_store
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from service_probes import DEFAULT_TIMEOUT, ProbeEngine, ProbeResult, ServiceEndpoint
+
 ISSUE_STATE_DIR = os.getenv("HEALTH_ISSUE_STATE_DIR", ".health_issue_state")
+INCIDENT_STATE_FILE = os.getenv("HEALTH_INCIDENT_STATE", os.path.join(ISSUE_STATE_DIR, "incidents.sqlite3"))
+COLD_START_SECONDS = float(os.getenv("INFERENCE_COLD_START_SECONDS", "5"))
 
-@dataclass
-class EndpointResult:
-    name: str
-    url: str
-    ok: bool
-    status_code: Optional[int] = None
-    latency_ms: Optional[float] = None
-    detail: Optional[str] = None
-    extra: Dict[str, Any] = None
+# Probe results come from the shared engine; the old name is kept for callers
+EndpointResult = ProbeResult
 
 @dataclass
 class HealthReport:
     timestamp: float
     results: List[EndpointResult]
+    # Services not probed this round whose result is carried over from their last probe
+    cached: List[str] = field(default_factory=list)
+
+    def fresh_results(self) -> List[EndpointResult]:
+        return [r for r in self.results if r.name not in self.cached]
 
     def summary(self) -> Dict[str, Any]:
         total = len(self.results)
@@ -53,71 +79,383 @@ class HealthReport:
         }
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        data = {
             "timestamp": self.timestamp,
             "summary": self.summary(),
             "results": [asdict(r) for r in self.results]
         }
+        if self.cached:
+            data["cached"] = list(self.cached)
+        return data
 
-class HealthChecker:
-    def __init__(self) -> None:
-        self.endpoints = {
-            "localai": os.getenv("LOCALAI_BASE_URL") or os.getenv("OPENAI_BASE_URL") or "http://localhost:8080/v1",
-            "ollama": os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            "vllm": os.getenv("VLLM_BASE_URL", "http://localhost:8000"),
-            "flowise": os.getenv("FLOWISE_BASE_URL", "http://localhost:3000"),
-            "prometheus": os.getenv("PROMETHEUS_BASE_URL", "http://localhost:9090"),
-            "grafana": os.getenv("GRAFANA_BASE_URL", "http://localhost:3001"),
-        }
+def _delta_content(line: str) -> str:
+    """Text of a streamed chat completion chunk line; empty for role-only deltas, [DONE] and non-data lines."""
+    if not line.startswith("data:"):
+        return ""
+    try:
+        choices = json.loads(line[5:]).get("choices") or [{}]
+        return choices[0].get("delta", {}).get("content") or ""
+    except (ValueError, AttributeError):
+        return ""
 
-    async def _check_openai_compatible(self, client: httpx.AsyncClient, name: str, base_url: str) -> EndpointResult:
-        url = base_url.rstrip("/") + "/models"
-        start = time.perf_counter()
-        try:
-            resp = await client.get(url, timeout=DEFAULT_TIMEOUT)
-            latency = (time.perf_counter() - start) * 1000
-            ok = resp.status_code == 200 and "data" in resp.json()
-            detail = None
-            extra = {}
-            if ok:
-                models = resp.json().get("data", [])
-                extra["model_count"] = len(models)
-                if models:
-                    extra["first_model"] = models[0].get("id")
-            else:
-                detail = f"Unexpected response: {resp.text[:160]}"
-            return EndpointResult(name=name, url=url, ok=ok, status_code=resp.status_code, latency_ms=latency, detail=detail, extra=extra)
-        except Exception as e:
-            return EndpointResult(name=name, url=url, ok=False, detail=str(e))
 
-    async def _check_simple(self, client: httpx.AsyncClient, name: str, url: str, path: str = "/") -> EndpointResult:
-        full_url = url.rstrip("/") + path
+class InferenceProber:
+    """Synthetic 1-token streaming chat completion measuring time-to-first-token.
+
+    Rate limited so it cannot add meaningful load: at most one probe per service
+    every `min_interval` seconds, run one at a time, and only against services
+    whose /models probe passed in the same round. A first token slower than
+    `cold_factor` x the service's warm TTFT (or `cold_start_seconds` before any
+    warm sample exists) is flagged as a cold model load.
+    """
+
+    def __init__(self, min_interval: float = 300.0, timeout: float = 60.0, model: Optional[str] = None,
+                 cold_start_seconds: float = COLD_START_SECONDS, cold_factor: float = 5.0) -> None:
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.model = model
+        self.cold_start_seconds = cold_start_seconds
+        self.cold_factor = cold_factor
+        self.last_run: Dict[str, float] = {}
+        self.warm_ttft: Dict[str, float] = {}
+
+    def is_due(self, name: str, now: float) -> bool:
+        last = self.last_run.get(name)
+        return last is None or now - last >= self.min_interval
+
+    async def probe(self, client: httpx.AsyncClient, name: str, base_url: str, model: str) -> Dict[str, Any]:
+        url = base_url.rstrip("/") + "/chat/completions"
+        payload = {"model": model, "messages": [{"role": "user", "content": "ping"}], "max_tokens": 1, "stream": True}
         start = time.perf_counter()
+        ttft = None
         try:
-            resp = await client.get(full_url, timeout=DEFAULT_TIMEOUT)
-            latency = (time.perf_counter() - start) * 1000
-            ok = resp.status_code < 500
-            detail = None
-            if not ok:
-                detail = f"Bad status {resp.status_code}"
-            return EndpointResult(name=name, url=full_url, ok=ok, status_code=resp.status_code, latency_ms=latency, detail=detail)
+            async with client.stream("POST", url, json=payload, timeout=self.timeout) as resp:
+                if resp.status_code != 200:
+                    body = (await resp.aread()).decode("utf-8", "replace")
+                    return {"ok": False, "model": model, "status_code": resp.status_code,
+                            "detail": f"Unexpected response: {body[:160]}"}
+                async for line in resp.aiter_lines():
+                    # OpenAI-style streams usually open with a role-only delta: time the first content
+                    if ttft is None and _delta_content(line):
+                        ttft = (time.perf_counter() - start) * 1000
         except Exception as e:
-            return EndpointResult(name=name, url=full_url, ok=False, detail=str(e))
-
-    async def run(self) -> HealthReport:
-        results: List[EndpointResult] = []
-        async with httpx.AsyncClient() as client:
-            tasks = [
-                self._check_openai_compatible(client, "localai_or_openai", self.endpoints["localai"]),
-                self._check_simple(client, "ollama", self.endpoints["ollama"], "/api/tags"),
-                self._check_openai_compatible(client, "vllm", self.endpoints["vllm"]),
-                self._check_simple(client, "flowise", self.endpoints["flowise"]),
-                self._check_simple(client, "prometheus", self.endpoints["prometheus"], "/api/v1/status/runtimeinfo"),
-                self._check_simple(client, "grafana", self.endpoints["grafana"], "/api/health"),
-            ]
-            gathered = await asyncio.gather(*tasks)
-            results.extend(gathered)
-        return HealthReport(timestamp=time.time(), results=results)
+            return {"ok": False, "model": model, "detail": str(e) or type(e).__name__}
+        total = (time.perf_counter() - start) * 1000
+        if ttft is None:
+            return {"ok": False, "model": model, "status_code": 200, "detail": "Stream ended without a token"}
+
+        warm = self.warm_ttft.get(name)
+        cold = ttft > (warm * self.cold_factor if warm is not None else self.cold_start_seconds * 1000)
+        if not cold:
+            self.warm_ttft[name] = ttft if warm is None else warm + 0.2 * (ttft - warm)
+        return {"ok": True, "model": model, "status_code": 200, "ttft_ms": ttft, "total_ms": total, "cold": cold}
+
+    async def run(self, client: httpx.AsyncClient, probes: List[ServiceEndpoint], results: List[EndpointResult], now: float) -> None:
+        """Probe due services in turn, attaching extra["inference"] and failing the service if inference fails."""
+        by_name = {p.name: p for p in probes}
+        for r in results:
+            probe = by_name.get(r.name)
+            if probe is None or probe.kind != "openai" or not r.ok or not self.is_due(r.name, now):
+                continue
+            model = self.model or (r.extra or {}).get("first_model")
+            if not model:
+                continue
+            self.last_run[r.name] = now
+            inference = await self.probe(client, r.name, probe.base_url, model)
+            r.extra["inference"] = inference
+            if not inference["ok"]:
+                r.ok = False
+                r.detail = f"Inference probe failed: {inference['detail']}"
+
+# Services covered by this checker, from the shared registry in service_probes.py
+HEALTH_SERVICES = ("localai", "ollama", "vllm", "flowise", "prometheus", "grafana")
+
+class HealthChecker:
+    def __init__(self, inference: Optional[InferenceProber] = None, engine: Optional[ProbeEngine] = None) -> None:
+        self.inference = inference
+        self.engine = engine or ProbeEngine()
+        self.probes = [self.engine.endpoints[name] for name in HEALTH_SERVICES]
+        self.last_results: Dict[str, EndpointResult] = {}
+
+    async def run(self, client: Optional[httpx.AsyncClient] = None,
+                  scheduler: Optional["ProbeScheduler"] = None) -> HealthReport:
+        """Probe endpoints once, reusing client (and its connection pool) if given.
+
+        With a scheduler, only services that are due are probed, each with its
+        learned timeout; the others carry over their last result and are listed
+        in HealthReport.cached.
+        """
+        if client is None:
+            async with httpx.AsyncClient() as own_client:
+                return await self.run(own_client, scheduler)
+        now = time.time()
+        due = [p for p in self.probes if scheduler is None or scheduler.is_due(p.name, now)]
+        timeouts = {p.name: scheduler.timeout_for(p.name) for p in due} if scheduler else None
+        fresh: List[EndpointResult] = list((await self.engine.probe(client, [p.name for p in due], timeouts)).values())
+        if self.inference is not None:
+            await self.inference.run(client, due, fresh, now)
+        finished = time.time()
+        if scheduler is not None:
+            scheduler.record(fresh, finished)
+        self.last_results.update((r.name, r) for r in fresh)
+
+        probed = {r.name for r in fresh}
+        results = [self.last_results[p.name] for p in self.probes if p.name in self.last_results]
+        cached = [r.name for r in results if r.name not in probed]
+        return HealthReport(timestamp=finished, results=results, cached=cached)
+
+@dataclass
+class ProbeSchedule:
+    next_due: float = 0.0
+    failures: int = 0
+    latency_ewma: Optional[float] = None
+    latency_dev: float = 0.0
+    outcomes: Deque[bool] = field(default_factory=lambda: deque(maxlen=10))
+
+class ProbeScheduler:
+    """Per-service adaptive probe schedule for the daemon.
+
+    - Healthy services are probed every `interval`, with a timeout learned from
+      their observed latency (EWMA + 4 deviations, x3 headroom) instead of the
+      global TIMEOUT_SECONDS.
+    - Down services back off exponentially up to `max_backoff` and are probed
+      with the short `fast_fail_timeout` unless a healthy latency is known, in
+      which case the learned timeout doubles with each consecutive failure.
+    - Flapping services (`flap_threshold` transitions in the last 10 probes)
+      are probed every interval / 4.
+    """
+
+    def __init__(self, interval: float, jitter: float = 0.0, max_backoff: Optional[float] = None,
+                 min_timeout: float = 0.5, fast_fail_timeout: float = 1.0, flap_threshold: int = 3) -> None:
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff if max_backoff is not None else interval * 16
+        self.min_timeout = min_timeout
+        self.fast_fail_timeout = fast_fail_timeout
+        self.flap_threshold = flap_threshold
+        self.schedules: Dict[str, ProbeSchedule] = {}
+
+    def _get(self, name: str) -> ProbeSchedule:
+        return self.schedules.setdefault(name, ProbeSchedule())
+
+    def is_due(self, name: str, now: float) -> bool:
+        return now >= self._get(name).next_due
+
+    def is_flapping(self, name: str) -> bool:
+        outcomes = list(self._get(name).outcomes)
+        return sum(1 for a, b in zip(outcomes, outcomes[1:]) if a != b) >= self.flap_threshold
+
+    def learned_timeout(self, name: str) -> Optional[float]:
+        sched = self._get(name)
+        if sched.latency_ewma is None:
+            return None
+        learned = max(self.min_timeout, 3 * (sched.latency_ewma + 4 * sched.latency_dev) / 1000)
+        # Doubled per consecutive failure, so a service that slowed down is not timed out forever
+        return min(DEFAULT_TIMEOUT, learned * 2 ** sched.failures)
+
+    def timeout_for(self, name: str) -> float:
+        learned = self.learned_timeout(name)
+        if learned is not None:
+            return learned
+        return self.fast_fail_timeout if self._get(name).failures else DEFAULT_TIMEOUT
+
+    def record(self, results: List[EndpointResult], now: float) -> None:
+        for r in results:
+            sched = self._get(r.name)
+            sched.outcomes.append(r.ok)
+            if r.ok:
+                sched.failures = 0
+                if r.latency_ms is not None:
+                    if sched.latency_ewma is None:
+                        sched.latency_ewma = r.latency_ms
+                    else:
+                        diff = r.latency_ms - sched.latency_ewma
+                        sched.latency_ewma += 0.2 * diff
+                        sched.latency_dev += 0.2 * (abs(diff) - sched.latency_dev)
+                delay = self.interval
+            else:
+                sched.failures += 1
+                delay = min(self.interval * 2 ** (sched.failures - 1), self.max_backoff)
+            if self.is_flapping(r.name):
+                delay = min(delay, self.interval / 4)
+            sched.next_due = now + jittered(delay, self.jitter)
+
+    def next_wakeup(self) -> float:
+        return min((s.next_due for s in self.schedules.values()), default=0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "next_due": sched.next_due,
+                "failures": sched.failures,
+                "flapping": self.is_flapping(name),
+                "timeout_s": round(self.timeout_for(name), 3),
+            }
+            for name, sched in self.schedules.items()
+        }
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+def parse_duration(text: str) -> float:
+    """Parse '90', '90s', '5m', '1h' or '1d' into seconds."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+class LatencySketch:
+    """Log-bucketed quantile sketch (DDSketch-style) with bounded relative error.
+
+    Values land in buckets whose width grows geometrically, so memory depends
+    on the value range (about 900 buckets for 0.01ms..1000s at 1% accuracy),
+    not on the number of samples, and sketches merge by adding counts.
+    """
+
+    MIN_VALUE = 0.01
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        index = math.ceil(math.log(max(value, self.MIN_VALUE)) / self.log_gamma)
+        self.bins[index] = self.bins.get(index, 0) + 1
+        self.count += 1
+
+    def merge(self, other: "LatencySketch") -> None:
+        for index, n in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + n
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return None
+
+class WindowedLatency:
+    """Latency sketches in fixed time slots, so quantiles can cover any configured window.
+
+    Memory is bounded by the number of slots in the longest window.
+    """
+
+    def __init__(self, windows: Sequence[float], slots_per_window: int = 30) -> None:
+        self.windows = tuple(windows)
+        self.slot_seconds = max(1.0, min(self.windows) / slots_per_window)
+        self.slots: Deque[Tuple[int, LatencySketch]] = deque(
+            maxlen=math.ceil(max(self.windows) / self.slot_seconds) + 1)
+
+    def add(self, timestamp: float, value: float) -> None:
+        slot = int(timestamp // self.slot_seconds)
+        if not self.slots or self.slots[-1][0] != slot:
+            self.slots.append((slot, LatencySketch()))
+        self.slots[-1][1].add(value)
+
+    def quantiles(self, now: float, window: float, qs: Sequence[float] = QUANTILES) -> Dict[str, Any]:
+        oldest = int((now - window) // self.slot_seconds)
+        merged = LatencySketch()
+        for slot, sketch in self.slots:
+            if slot > oldest:
+                merged.merge(sketch)
+        data: Dict[str, Any] = {"count": merged.count}
+        for q in qs:
+            value = merged.quantile(q)
+            data[f"p{round(q * 100)}"] = round(value, 3) if value is not None else None
+        return data
+
+@dataclass
+class ServiceState:
+    """Rolling per-service state kept in memory between daemon rounds."""
+    name: str
+    up: Optional[bool] = None
+    checks: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    consecutive_successes: int = 0
+    transitions: int = 0
+    last_ok: Optional[float] = None
+    last_change: Optional[float] = None
+    cold_starts: int = 0
+    recent: Deque[bool] = field(default_factory=deque)
+    latency: Optional[WindowedLatency] = None
+    ttft: Optional[WindowedLatency] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {f.name: getattr(self, f.name) for f in fields(self) if f.name not in ("recent", "latency", "ttft")}
+        data["window_checks"] = len(self.recent)
+        data["window_uptime_percent"] = (sum(self.recent) / len(self.recent) * 100) if self.recent else 0.0
+        return data
+
+class HealthState:
+    """Rolling health state across rounds, bounded to the last `window` checks per service."""
+
+    def __init__(self, window: int = 60, latency_windows: Sequence[str] = ("5m", "1h")) -> None:
+        self.window = window
+        self.latency_windows = {label: parse_duration(label) for label in latency_windows}
+        self.rounds = 0
+        self.started = time.time()
+        self.last_update: Optional[float] = None
+        self.services: Dict[str, ServiceState] = {}
+
+    def update(self, report: HealthReport) -> None:
+        self.rounds += 1
+        self.last_update = report.timestamp
+        for r in report.fresh_results():
+            st = self.services.get(r.name)
+            if st is None:
+                st = self.services[r.name] = ServiceState(
+                    name=r.name, recent=deque(maxlen=self.window),
+                    latency=WindowedLatency(self.latency_windows.values()),
+                    ttft=WindowedLatency(self.latency_windows.values()))
+            if r.latency_ms is not None:
+                st.latency.add(report.timestamp, r.latency_ms)
+            inference = (r.extra or {}).get("inference")
+            if inference and inference.get("ttft_ms") is not None:
+                st.ttft.add(report.timestamp, inference["ttft_ms"])
+                st.cold_starts += int(inference["cold"])
+            if st.up is not None and st.up != r.ok:
+                st.transitions += 1
+                st.last_change = report.timestamp
+            elif st.up is None:
+                st.last_change = report.timestamp
+            st.up = r.ok
+            st.checks += 1
+            st.recent.append(r.ok)
+            if r.ok:
+                st.last_ok = report.timestamp
+                st.consecutive_successes += 1
+                st.consecutive_failures = 0
+            else:
+                st.failures += 1
+                st.consecutive_failures += 1
+                st.consecutive_successes = 0
+
+    def latency_quantiles(self, name: str, metric: str = "latency") -> Dict[str, Dict[str, Any]]:
+        """p50/p90/p99 (ms) of a service's probe latency or inference TTFT for each configured window."""
+        windowed = getattr(self.services[name], metric)
+        now = self.last_update or time.time()
+        return {label: windowed.quantiles(now, seconds) for label, seconds in self.latency_windows.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        services = {}
+        for name, st in self.services.items():
+            services[name] = st.to_dict()
+            services[name]["latency_ms"] = self.latency_quantiles(name)
+            if st.ttft.slots:
+                services[name]["ttft_ms"] = self.latency_quantiles(name, "ttft")
+        return {
+            "rounds": self.rounds,
+            "started": self.started,
+            "services": services,
+        }
 
 def generate_prometheus_metrics(report: HealthReport) -> str:
     lines = [
@@ -133,7 +471,172 @@ def generate_prometheus_metrics(report: HealthReport) -> str:
             lines.append(f'service_latency_ms{{service="{r.name}"}} {r.latency_ms:.3f}')
     return "\n".join(lines) + "\n"
 
-async def create_issue(owner_repo: str, token: str, title: str, body: str, labels: List[str]) -> Optional[str]:
+LATENCY_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Inference spans cold model loads, which can take tens of seconds
+INFERENCE_BUCKETS_SECONDS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+class LatencyHistogram:
+    """Cumulative Prometheus-style histogram with fixed buckets."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_SECONDS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> List[tuple]:
+        total = 0
+        out = []
+        for bound, n in zip(self.buckets, self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+class HealthMetrics:
+    """In-memory metric registry fed by daemon rounds and rendered on /metrics."""
+
+    def __init__(self, state: Optional[HealthState] = None) -> None:
+        self.state = state
+        self.up: Dict[str, int] = {}
+        self.model_count: Dict[str, int] = {}
+        self.probes: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.inference_probes: Dict[str, int] = {}
+        self.inference_errors: Dict[str, int] = {}
+        self.cold_starts: Dict[str, int] = {}
+        self.ttft: Dict[str, LatencyHistogram] = {}
+        self.inference_duration: Dict[str, LatencyHistogram] = {}
+        self.rounds = 0
+        self.last_round: Optional[float] = None
+
+    def observe(self, report: HealthReport) -> None:
+        self.rounds += 1
+        self.last_round = report.timestamp
+        for r in report.results:
+            self.up[r.name] = 1 if r.ok else 0
+        for r in report.fresh_results():
+            self.probes[r.name] = self.probes.get(r.name, 0) + 1
+            if not r.ok:
+                self.errors[r.name] = self.errors.get(r.name, 0) + 1
+            else:
+                self.errors.setdefault(r.name, 0)
+            if r.latency_ms is not None:
+                self.latency.setdefault(r.name, LatencyHistogram()).observe(r.latency_ms / 1000)
+            if r.extra and "model_count" in r.extra:
+                self.model_count[r.name] = r.extra["model_count"]
+            inference = (r.extra or {}).get("inference")
+            if inference:
+                self._observe_inference(r.name, inference)
+
+    def _observe_inference(self, name: str, inference: Dict[str, Any]) -> None:
+        self.inference_probes[name] = self.inference_probes.get(name, 0) + 1
+        self.inference_errors[name] = self.inference_errors.get(name, 0) + (0 if inference["ok"] else 1)
+        self.cold_starts[name] = self.cold_starts.get(name, 0) + int(inference.get("cold", False))
+        if inference.get("ttft_ms") is not None:
+            self.ttft.setdefault(name, LatencyHistogram(INFERENCE_BUCKETS_SECONDS)).observe(inference["ttft_ms"] / 1000)
+            self.inference_duration.setdefault(name, LatencyHistogram(INFERENCE_BUCKETS_SECONDS)).observe(
+                inference["total_ms"] / 1000)
+
+    @staticmethod
+    def _histogram_lines(metric: str, help_text: str, histograms: Dict[str, LatencyHistogram]) -> List[str]:
+        lines = [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for name, hist in sorted(histograms.items()):
+            for bound, total in hist.cumulative():
+                lines.append(f'{metric}_bucket{{service="{name}",le="{bound}"}} {total}')
+            lines.append(f'{metric}_bucket{{service="{name}",le="+Inf"}} {hist.count}')
+            lines.append(f'{metric}_sum{{service="{name}"}} {hist.sum:.6f}')
+            lines.append(f'{metric}_count{{service="{name}"}} {hist.count}')
+        return lines
+
+    @staticmethod
+    def _counter_lines(metric: str, help_text: str, kind: str, values: Dict[str, int]) -> List[str]:
+        lines = [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        return lines + [f'{metric}{{service="{name}"}} {v}' for name, v in sorted(values.items())]
+
+    def render(self) -> str:
+        lines = self._counter_lines("service_up", "Was the service marked healthy (1) or not (0)", "gauge", self.up)
+        lines += self._counter_lines("service_probes_total", "Probes sent to the service", "counter", self.probes)
+        lines += self._counter_lines("service_probe_errors_total", "Probes that failed or returned an unhealthy response",
+                                     "counter", self.errors)
+        lines += self._counter_lines("service_model_count", "Models listed by the service", "gauge", self.model_count)
+        lines += self._histogram_lines("service_probe_duration_seconds", "Probe latency", self.latency)
+        if self.inference_probes:
+            lines += self._counter_lines("service_inference_probes_total", "Synthetic inference probes sent",
+                                         "counter", self.inference_probes)
+            lines += self._counter_lines("service_inference_errors_total", "Synthetic inference probes that failed",
+                                         "counter", self.inference_errors)
+            lines += self._counter_lines("service_inference_cold_starts_total",
+                                         "Inference probes whose first token indicated a cold model load",
+                                         "counter", self.cold_starts)
+            lines += self._histogram_lines("service_inference_ttft_seconds", "Synthetic inference time to first token",
+                                           self.ttft)
+            lines += self._histogram_lines("service_inference_duration_seconds", "Synthetic inference total latency",
+                                           self.inference_duration)
+        if self.state is not None:
+            lines += self._quantile_lines("service_probe_latency_quantile_seconds",
+                                          "Rolling probe latency quantiles per window", "latency")
+            if self.inference_probes:
+                lines += self._quantile_lines("service_inference_ttft_quantile_seconds",
+                                              "Rolling inference time-to-first-token quantiles per window", "ttft")
+        lines += [
+            "# HELP health_check_rounds_total Completed daemon rounds",
+            "# TYPE health_check_rounds_total counter",
+            f"health_check_rounds_total {self.rounds}",
+        ]
+        if self.last_round is not None:
+            lines += [
+                "# HELP health_check_last_round_timestamp_seconds Unix time of the last completed round",
+                "# TYPE health_check_last_round_timestamp_seconds gauge",
+                f"health_check_last_round_timestamp_seconds {self.last_round:.3f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def _quantile_lines(self, metric: str, help_text: str, source: str) -> List[str]:
+        lines = [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+        for name in sorted(self.state.services):
+            for label, data in self.state.latency_quantiles(name, source).items():
+                for q in QUANTILES:
+                    value = data[f"p{round(q * 100)}"]
+                    if value is not None:
+                        lines.append(f'{metric}{{service="{name}",window="{label}",quantile="{q}"}} {value / 1000:.6f}')
+        return lines
+
+async def serve_metrics(metrics: HealthMetrics, host: str, port: int) -> asyncio.AbstractServer:
+    """Serve GET /metrics from the in-memory registry (minimal HTTP/1.0, no extra dependencies)."""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] in ("GET", "HEAD") and parts[1].split("?")[0] == "/metrics":
+                status, ctype, body = "200 OK", "text/plain; version=0.0.4; charset=utf-8", metrics.render().encode()
+            else:
+                status, ctype, body = "404 Not Found", "text/plain; charset=utf-8", b"Not Found\n"
+            head = f"HTTP/1.0 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+            writer.write(head.encode("latin-1") + (b"" if parts[:1] == ["HEAD"] else body))
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+async def create_issue(owner_repo: str, token: str, title: str, body: str, labels: List[str],
+                       client: Optional[httpx.AsyncClient] = None) -> Optional[str]:
+    if client is None:
+        async with httpx.AsyncClient(timeout=15) as own_client:
+            return await create_issue(owner_repo, token, title, body, labels, own_client)
     api_url = f"https://api.github.com/repos/{owner_repo}/issues"
     headers = {
         "Authorization": f"Bearer {token}",
@@ -144,11 +647,10 @@ async def create_issue(owner_repo: str, token: str, title: str, body: str, label
     payload = {"title": title, "body": body}
     if labels:
         payload["labels"] = labels
-    async with httpx.AsyncClient(timeout=15) as client:
-        resp = await client.post(api_url, headers=headers, json=payload)
-        if resp.status_code in (200, 201):
-            return resp.json().get("html_url")
-        return None
+    resp = await client.post(api_url, headers=headers, json=payload)
+    if resp.status_code in (200, 201):
+        return resp.json().get("html_url")
+    return None
 
 def signature_for(service_name: str, reason: str) -> str:
     h = hashlib.sha256()
@@ -156,79 +658,153 @@ def signature_for(service_name: str, reason: str) -> str:
     h.update(reason.encode())
     return h.hexdigest()[:20]
 
-def issue_already_reported(sig: str) -> bool:
-    os.makedirs(ISSUE_STATE_DIR, exist_ok=True)
-    marker = os.path.join(ISSUE_STATE_DIR, f"{sig}.mark")
-    return os.path.exists(marker)
+def open_incident_store(path: str = INCIDENT_STATE_FILE, ttl: float = 7 * 86400) -> IncidentStore:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return IncidentStore(path, ttl=ttl)
 
-def mark_issue_reported(sig: str) -> None:
-    os.makedirs(ISSUE_STATE_DIR, exist_ok=True)
-    marker = os.path.join(ISSUE_STATE_DIR, f"{sig}.mark")
-    try:
-        with open(marker, "w", encoding="utf-8") as f:
-            f.write(str(int(time.time())))
-    except OSError:
-        pass
+class IncidentReporter:
+    """Opens GitHub issues for down services over one pooled client.
 
-async def auto_report(report: HealthReport, issue_repo: str, label_prefix: str = "health") -> Dict[str, Any]:
-    token = os.getenv("GITHUB_TOKEN")
-    results: Dict[str, Any] = {"created": [], "skipped": []}
-    if not token:
-        return {"error": "GITHUB_TOKEN missing", "created": [], "skipped": []}
-    tasks = []
-    for r in report.results:
-        if r.ok:
-            continue
-        reason = r.detail or f"Service {r.name} failed"
-        sig = signature_for(r.name, reason)
-        if issue_already_reported(sig):
-            results["skipped"].append(r.name)
-            continue
-        title = f"[Health] {r.name} DOWN"
-        body_lines = [
-            f"Automated health monitor detected a failure for `{r.name}`.",
-            "",
+    New failures seen in one round are reported together: below
+    `group_threshold` each gets its own issue (created concurrently), at or
+    above it they share one grouped issue, so a wide outage costs one API call
+    and one notification. `group_threshold=0` disables grouping.
+    """
+
+    def __init__(self, issue_repo: str, token: str, label_prefix: str = "health",
+                 incidents: Optional[IncidentStore] = None, incident_ttl: float = 7 * 86400,
+                 group_threshold: int = 3, client: Optional[httpx.AsyncClient] = None) -> None:
+        self.issue_repo = issue_repo
+        self.token = token
+        self.labels = [label_prefix, "automated", "incident"]
+        self.group_threshold = group_threshold
+        self._own_incidents = incidents is None
+        self.incidents = incidents if incidents is not None else open_incident_store(ttl=incident_ttl)
+        self._own_client = client is None
+        self.client = client if client is not None else httpx.AsyncClient(
+            timeout=15, limits=httpx.Limits(max_connections=4, max_keepalive_connections=4))
+
+    async def __aenter__(self) -> "IncidentReporter":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._own_client:
+            await self.client.aclose()
+        if self._own_incidents:
+            self.incidents.close()
+
+    @staticmethod
+    def _failure_lines(r: EndpointResult) -> List[str]:
+        return [
             f"- URL: `{r.url}`",
             f"- Status Code: {r.status_code}",
             f"- Detail: {r.detail or 'n/a'}",
-            f"- Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(report.timestamp))} UTC",
+        ]
+
+    def _single_issue(self, r: EndpointResult, sig: str, timestamp: float) -> Tuple[str, str]:
+        body_lines = [
+            f"Automated health monitor detected a failure for `{r.name}`.",
+            "",
+            *self._failure_lines(r),
+            f"- Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(timestamp))} UTC",
             "",
             f"Signature: `{sig}`",
             "",
-            "This issue was auto-generated. Close when resolved; delete the state marker to allow re-reporting if needed."
+            "This issue was auto-generated. The monitor reports this failure again once the service has recovered or the incident has expired."
         ]
-        labels = [label_prefix, "automated", "incident"]
-        async def create_and_mark():
-            url = await create_issue(issue_repo, token, title, "\n".join(body_lines), labels)
-            if url:
-                mark_issue_reported(sig)
-                results["created"].append({"service": r.name, "issue_url": url})
-            else:
+        return f"[Health] {r.name} DOWN", "\n".join(body_lines)
+
+    def _grouped_issue(self, failures: List[Tuple[EndpointResult, str, str]], timestamp: float) -> Tuple[str, str]:
+        names = [r.name for r, _, _ in failures]
+        body_lines = [
+            f"Automated health monitor detected {len(failures)} services failing in the same round.",
+            f"Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(timestamp))} UTC",
+        ]
+        for r, sig, _ in failures:
+            body_lines += ["", f"### `{r.name}`", *self._failure_lines(r), f"- Signature: `{sig}`"]
+        body_lines += [
+            "",
+            "This issue was auto-generated. Each service is reported again once it has recovered or its incident has expired."
+        ]
+        return f"[Health] {len(failures)} services DOWN: {', '.join(names)}", "\n".join(body_lines)
+
+    async def report(self, report: HealthReport) -> Dict[str, Any]:
+        results: Dict[str, Any] = {"created": [], "skipped": [], "resolved": []}
+        results["resolved"] = sorted({i["service"] for i in self.incidents.resolve(
+            (r.name for r in report.fresh_results() if r.ok), report.timestamp)})
+
+        failures = []
+        for r in report.results:
+            if r.ok:
+                continue
+            reason = r.detail or f"Service {r.name} failed"
+            sig = signature_for(r.name, reason)
+            if self.incidents.is_reported(sig, report.timestamp):
                 results["skipped"].append(r.name)
-        tasks.append(create_and_mark())
-    if tasks:
-        await asyncio.gather(*tasks)
-    return results
+            else:
+                failures.append((r, sig, reason))
 
-async def async_main(args) -> int:
-    checker = HealthChecker()
-    report = await checker.run()
-    data = report.to_dict()
+        if self.group_threshold and len(failures) >= self.group_threshold:
+            batches = [failures]
+            issues = [self._grouped_issue(failures, report.timestamp)]
+        else:
+            batches = [[f] for f in failures]
+            issues = [self._single_issue(r, sig, report.timestamp) for r, sig, _ in failures]
+        try:
+            urls = await asyncio.gather(*(self._create_issue(title, body) for title, body in issues))
+            for batch, url in zip(batches, urls):
+                for r, sig, reason in batch:
+                    if url:
+                        self.incidents.mark_reported(sig, r.name, reason, url, report.timestamp)
+                        results["created"].append({"service": r.name, "issue_url": url})
+                    else:
+                        results["skipped"].append(r.name)
+        finally:
+            self.incidents.commit()
+        return results
 
-    if args.save_dir:
-        os.makedirs(args.save_dir, exist_ok=True)
-        fname = f"health_{int(report.timestamp)}.json"
-        fpath = os.path.join(args.save_dir, fname)
-        with open(fpath, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-        if args.retain and args.retain > 0:
-            files = sorted([p for p in os.listdir(args.save_dir) if p.startswith("health_") and p.endswith(".json")])
-            excess = len(files) - args.retain
-            for old in files[:excess]:
-                try:
-                    os.remove(os.path.join(args.save_dir, old))
-                except OSError:
-                    pass
+    async def _create_issue(self, title: str, body: str) -> Optional[str]:
+        """Issue URL, or None if GitHub could not be reached; the failures stay unreported and are retried next round."""
+        try:
+            return await create_issue(self.issue_repo, self.token, title, body, self.labels, self.client)
+        except httpx.HTTPError as e:
+            print(f"Could not create issue {title!r}: {e or type(e).__name__}", file=sys.stderr)
+            return None
+
+async def auto_report(report: HealthReport, issue_repo: str, label_prefix: str = "health",
+                      incidents: Optional[IncidentStore] = None, group_threshold: int = 3) -> Dict[str, Any]:
+    """One-off reporting round; long-running callers should keep an IncidentReporter instead."""
+    token = os.getenv("GITHUB_TOKEN")
+    if not token:
+        return {"error": "GITHUB_TOKEN missing", "created": [], "skipped": [], "resolved": []}
+    async with IncidentReporter(issue_repo, token, label_prefix, incidents=incidents,
+                                group_threshold=group_threshold) as reporter:
+        return await reporter.report(report)
+
+def open_incident_reporter(args) -> Optional[IncidentReporter]:
+    """Reporter kept for the life of the process, or None when reporting is off or unconfigured."""
+    issue_repo = args.issue_repo or os.getenv("GITHUB_REPOSITORY")
+    token = os.getenv("GITHUB_TOKEN")
+    if not (args.auto_report and issue_repo and token):
+        return None
+    return IncidentReporter(issue_repo, token, incident_ttl=parse_duration(args.incident_ttl),
+                            group_threshold=args.group_threshold)
+
+def open_report_store(args) -> Optional[HealthStore]:
+    path = args.store or (os.path.join(args.save_dir, "health.sqlite3") if args.save_dir else None)
+    if not path:
+        return None
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return open_store(path, max_reports=args.retain, max_mb=args.store_max_mb)
+
+async def process_report(args, report: HealthReport, data: Dict[str, Any], store: Optional[HealthStore] = None,
+                         reporter: Optional[IncidentReporter] = None) -> None:
+    """Persist, export and auto-report one round; shared by one-shot and daemon modes."""
+    if store is not None:
+        store.append(report.to_dict())
 
     if args.prometheus_export:
         metrics = generate_prometheus_metrics(report)
@@ -238,11 +814,128 @@ async def async_main(args) -> int:
 
     if args.auto_report:
         issue_repo = args.issue_repo or os.getenv("GITHUB_REPOSITORY")
-        if issue_repo:
-            data["auto_issue"] = await auto_report(report, issue_repo)
+        if reporter is not None:
+            data["auto_issue"] = await reporter.report(report)
+        elif issue_repo:
+            data["auto_issue"] = await auto_report(report, issue_repo, group_threshold=args.group_threshold)
         else:
             data["auto_issue"] = {"error": "No repository specified (use --issue-repo or set GITHUB_REPOSITORY)"}
 
+def make_checker(args) -> HealthChecker:
+    inference = None
+    if args.inference_probe:
+        inference = InferenceProber(min_interval=args.inference_interval, timeout=args.inference_timeout,
+                                    model=args.inference_model or os.getenv("INFERENCE_PROBE_MODEL"))
+    return HealthChecker(inference=inference)
+
+def jittered(interval: float, jitter: float) -> float:
+    """Spread probes by +/- jitter (a fraction of interval) so many daemons do not align."""
+    return max(0.0, interval * (1 + random.uniform(-jitter, jitter)))
+
+async def run_daemon(args, transport: Optional[httpx.AsyncBaseTransport] = None,
+                     metrics: Optional[HealthMetrics] = None) -> int:
+    checker = make_checker(args)
+    scheduler = ProbeScheduler(args.interval, jitter=args.jitter, max_backoff=args.max_backoff or None,
+                               fast_fail_timeout=args.fast_fail_timeout)
+    state = HealthState(window=args.window, latency_windows=args.latency_windows.split(","))
+    metrics = metrics or HealthMetrics()
+    metrics.state = state
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: fall back to KeyboardInterrupt
+
+    # Keep idle connections alive across rounds so each probe reuses its TCP connection
+    limits = httpx.Limits(
+        max_connections=len(checker.probes) * 2,
+        max_keepalive_connections=len(checker.probes) * 2,
+        keepalive_expiry=args.interval * (1 + args.jitter) + DEFAULT_TIMEOUT,
+    )
+    report_file = open(args.report_file, "a", encoding="utf-8") if args.report_file else None
+    store = open_report_store(args)
+    reporter = open_incident_reporter(args)
+    server = await serve_metrics(metrics, args.metrics_host, args.metrics_port) if args.metrics_port else None
+    exit_code = 0
+    try:
+        async with httpx.AsyncClient(limits=limits, transport=transport) as client:
+            while not stop.is_set():
+                report = await checker.run(client, scheduler)
+                state.update(report)
+                metrics.observe(report)
+                data = report.to_dict()
+                data["state"] = state.to_dict()
+                data["schedule"] = scheduler.to_dict()
+                # A failed export or GitHub outage must not stop monitoring
+                try:
+                    await process_report(args, report, data, store, reporter)
+                except Exception as e:
+                    data["process_error"] = str(e) or type(e).__name__
+                    print(f"Report processing failed: {data['process_error']}", file=sys.stderr)
+
+                line = json.dumps(data)
+                print(line, flush=True)
+                if report_file:
+                    report_file.write(line + "\n")
+                    report_file.flush()
+
+                exit_code = 1 if args.fail_on_down and data["summary"]["down"] > 0 else 0
+                if args.rounds and state.rounds >= args.rounds:
+                    break
+                # Wake when the next service is due rather than on a fixed cadence
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=max(0.0, scheduler.next_wakeup() - time.time()))
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        if server:
+            server.close()
+            await server.wait_closed()
+        if store:
+            store.close()
+        if reporter:
+            await reporter.aclose()
+        if report_file:
+            report_file.close()
+    return exit_code
+
+def query_store(args) -> int:
+    store = open_report_store(args)
+    if store is None:
+        print(json.dumps({"error": "No store specified (use --store or --save-dir)"}))
+        return 2
+    try:
+        start = time.time() - parse_duration(args.query)
+        if args.resolution == "raw":
+            rows = store.reports(start=start)
+        else:
+            rows = store.rollups(args.resolution, start=start, service=args.service)
+        print(json.dumps({"since": start, "resolution": args.resolution, "stats": store.stats(), "rows": rows}, indent=2))
+    finally:
+        store.close()
+    return 0
+
+async def async_main(args) -> int:
+    if args.query:
+        return query_store(args)
+    if args.daemon:
+        return await run_daemon(args)
+
+    checker = make_checker(args)
+    report = await checker.run()
+    data = report.to_dict()
+    store = open_report_store(args)
+    reporter = open_incident_reporter(args)
+    try:
+        await process_report(args, report, data, store, reporter)
+    finally:
+        if store:
+            store.close()
+        if reporter:
+            await reporter.aclose()
+
     print(json.dumps(data, indent=2))
 
     if args.fail_on_down and data["summary"]["down"] > 0:
@@ -253,10 +946,32 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Unified health check")
     parser.add_argument("--prometheus-export", help="Write Prometheus metrics to file")
     parser.add_argument("--fail-on-down", action="store_true", help="Exit 1 if any service is down")
-    parser.add_argument("--save-dir", help="Directory to persist JSON reports")
-    parser.add_argument("--retain", type=int, default=0, help="Maximum number of JSON reports to retain (0 = unlimited)")
+    parser.add_argument("--save-dir", help="Directory for the report store (health.sqlite3)")
+    parser.add_argument("--store", help="Path of the SQLite report store (overrides --save-dir)")
+    parser.add_argument("--retain", type=int, default=0, help="Maximum number of raw reports to retain (0 = unlimited)")
+    parser.add_argument("--store-max-mb", type=float, default=0.0, help="Size cap for the report store; oldest raw data goes first (0 = unlimited)")
+    parser.add_argument("--query", metavar="SINCE", help="Print stored history for the last SINCE (e.g. 1h, 7d) and exit")
+    parser.add_argument("--resolution", choices=["raw"] + list(ROLLUP_RESOLUTIONS), default="1m", help="Resolution for --query (default: 1m)")
+    parser.add_argument("--service", help="Restrict --query rollups to one service")
     parser.add_argument("--auto-report", action="store_true", help="Automatically open GitHub issues for down services")
     parser.add_argument("--issue-repo", help="Override target repo (owner/name) for issue reporting")
+    parser.add_argument("--group-threshold", type=int, default=3, help="Report this many or more new failures in one round as a single grouped issue (0 = never group; default: 3)")
+    parser.add_argument("--incident-ttl", default="7d", help="Re-report a still-open incident after this long (e.g. 12h, 7d; default: 7d)")
+    parser.add_argument("--daemon", action="store_true", help="Keep running and probe every --interval seconds")
+    parser.add_argument("--interval", type=float, default=60.0, help="Seconds between daemon rounds (default: 60)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Random spread of the interval as a fraction (default: 0.1)")
+    parser.add_argument("--max-backoff", type=float, default=0.0, help="Longest gap between probes of a down service in seconds (default: 16 x interval)")
+    parser.add_argument("--fast-fail-timeout", type=float, default=1.0, help="Probe timeout for down services with no known healthy latency (default: 1.0)")
+    parser.add_argument("--inference-probe", action="store_true", help="Also send a rate-limited 1-token streaming chat completion to OpenAI-compatible backends and record time-to-first-token")
+    parser.add_argument("--inference-interval", type=float, default=300.0, help="Minimum seconds between inference probes per service (default: 300)")
+    parser.add_argument("--inference-timeout", type=float, default=60.0, help="Timeout for an inference probe, covering cold model loads (default: 60)")
+    parser.add_argument("--inference-model", help="Model for inference probes (default: $INFERENCE_PROBE_MODEL or the first listed model)")
+    parser.add_argument("--window", type=int, default=60, help="Checks per service kept in rolling state (default: 60)")
+    parser.add_argument("--rounds", type=int, default=0, help="Stop the daemon after N rounds (0 = run until signalled)")
+    parser.add_argument("--report-file", help="Append one JSON line per daemon round to this file")
+    parser.add_argument("--latency-windows", default="5m,1h", help="Comma-separated windows for rolling latency percentiles (default: 5m,1h)")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Serve Prometheus /metrics on this port in daemon mode (0 = off)")
+    parser.add_argument("--metrics-host", default="0.0.0.0", help="Bind address for --metrics-port (default: 0.0.0.0)")
     args = parser.parse_args()
     try:
         exit_code = asyncio.run(async_main(args))
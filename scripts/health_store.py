@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+"""
+Append-only time-series store for health reports (SQLite, standard library only)
+
+- One database file instead of one JSON file per run
+- Raw reports and per-service samples indexed by timestamp for range queries
+- Rollups at 1m/1h/1d resolution maintained on every append
+- Retention by report count and by file size, without listing any directory
+- Incident dedup state for auto-reported outages, with expiry and auto-resolve
+"""
+from __future__ import annotations
+import json
+import time
+import sqlite3
+from typing import Optional, Dict, Any, List
+
+ROLLUP_RESOLUTIONS = {"1m": 60, "1h": 3600, "1d": 86400}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    ts REAL PRIMARY KEY,
+    total INTEGER NOT NULL,
+    up INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    ts REAL NOT NULL,
+    service TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    latency_ms REAL,
+    status_code INTEGER
+);
+CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts);
+CREATE INDEX IF NOT EXISTS samples_service_ts ON samples (service, ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution INTEGER NOT NULL,
+    bucket REAL NOT NULL,
+    service TEXT NOT NULL,
+    checks INTEGER NOT NULL,
+    up INTEGER NOT NULL,
+    latency_count INTEGER NOT NULL,
+    latency_sum REAL NOT NULL,
+    latency_max REAL,
+    PRIMARY KEY (resolution, service, bucket)
+);
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO rollups (resolution, bucket, service, checks, up, latency_count, latency_sum, latency_max)
+VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+ON CONFLICT (resolution, service, bucket) DO UPDATE SET
+    checks = checks + 1,
+    up = up + excluded.up,
+    latency_count = latency_count + excluded.latency_count,
+    latency_sum = latency_sum + excluded.latency_sum,
+    latency_max = MAX(COALESCE(latency_max, excluded.latency_max), COALESCE(excluded.latency_max, latency_max))
+"""
+
+class HealthStore:
+    """Health report history in a single SQLite file."""
+
+    # Re-check the file size every N appends rather than on every write
+    SIZE_CHECK_EVERY = 50
+
+    def __init__(self, path: str, max_reports: int = 0, max_bytes: int = 0) -> None:
+        self.path = path
+        self.max_reports = max_reports
+        self.max_bytes = max_bytes
+        self._appends = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        # auto_vacuum only takes effect on a new database, before the first table exists
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def append(self, data: Dict[str, Any]) -> None:
+        """Store one report dict (as produced by HealthReport.to_dict) and update rollups."""
+        ts = data["timestamp"]
+        summary = data["summary"]
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO reports (ts, total, up, data) VALUES (?, ?, ?, ?)",
+                (ts, summary["total"], summary["up"], json.dumps(data, separators=(",", ":"))),
+            )
+            cached = set(data.get("cached", ()))
+            for r in data["results"]:
+                if r["name"] in cached:
+                    continue
+                latency = r.get("latency_ms")
+                self.conn.execute(
+                    "INSERT INTO samples (ts, service, ok, latency_ms, status_code) VALUES (?, ?, ?, ?, ?)",
+                    (ts, r["name"], int(r["ok"]), latency, r.get("status_code")),
+                )
+                for seconds in ROLLUP_RESOLUTIONS.values():
+                    self.conn.execute(ROLLUP_UPSERT, (
+                        seconds, ts - ts % seconds, r["name"], int(r["ok"]),
+                        0 if latency is None else 1, latency or 0.0, latency,
+                    ))
+            if self.max_reports:
+                self._trim_to_count(self.max_reports)
+
+        self._appends += 1
+        if self.max_bytes and self._appends % self.SIZE_CHECK_EVERY == 0:
+            self.enforce_size()
+
+    def _trim_to_count(self, keep: int) -> None:
+        row = self.conn.execute("SELECT ts FROM reports ORDER BY ts DESC LIMIT 1 OFFSET ?", (keep - 1,)).fetchone()
+        if row is not None:
+            self._delete_raw_before(row["ts"])
+
+    def _delete_raw_before(self, ts: float) -> None:
+        self.conn.execute("DELETE FROM reports WHERE ts < ?", (ts,))
+        self.conn.execute("DELETE FROM samples WHERE ts < ?", (ts,))
+
+    def size_bytes(self) -> int:
+        page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        free = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        return (page_count - free) * page_size
+
+    def enforce_size(self) -> None:
+        """Drop the oldest raw data, then the finest rollups, until the file fits max_bytes.
+
+        Hourly and daily rollups are kept so long-term trends survive size pressure.
+        """
+        for _ in range(20):
+            if self.size_bytes() <= self.max_bytes:
+                break
+            with self.conn:
+                count = self.conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+                if count > 1:
+                    cutoff = self.conn.execute(
+                        "SELECT ts FROM reports ORDER BY ts LIMIT 1 OFFSET ?", (max(1, count // 10),)
+                    ).fetchone()["ts"]
+                    self._delete_raw_before(cutoff)
+                else:
+                    oldest = self.conn.execute(
+                        "SELECT MIN(bucket) FROM rollups WHERE resolution = ?", (ROLLUP_RESOLUTIONS["1m"],)
+                    ).fetchone()[0]
+                    if oldest is None:
+                        break
+                    self.conn.execute("DELETE FROM rollups WHERE resolution = ? AND bucket <= ?",
+                                      (ROLLUP_RESOLUTIONS["1m"], oldest + 3600))
+        self.conn.execute("PRAGMA incremental_vacuum")
+
+    def reports(self, start: Optional[float] = None, end: Optional[float] = None, limit: int = 0) -> List[Dict[str, Any]]:
+        """Raw reports with start <= timestamp < end, oldest first."""
+        sql = "SELECT data FROM reports WHERE ts >= ? AND ts < ? ORDER BY ts"
+        params: List[Any] = [start or 0.0, end or float("inf")]
+        if limit:
+            sql = "SELECT data FROM (SELECT data, ts FROM reports WHERE ts >= ? AND ts < ? ORDER BY ts DESC LIMIT ?) ORDER BY ts"
+            params.append(limit)
+        return [json.loads(row["data"]) for row in self.conn.execute(sql, params)]
+
+    def samples(self, service: str, start: Optional[float] = None, end: Optional[float] = None) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT ts, ok, latency_ms, status_code FROM samples WHERE service = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (service, start or 0.0, end or float("inf")),
+        )
+        return [dict(row, ok=bool(row["ok"])) for row in rows]
+
+    def rollups(self, resolution: str = "1m", start: Optional[float] = None, end: Optional[float] = None,
+                service: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Downsampled uptime and latency per service and bucket."""
+        seconds = ROLLUP_RESOLUTIONS[resolution]
+        sql = ("SELECT bucket, service, checks, up, latency_count, latency_sum, latency_max FROM rollups "
+               "WHERE resolution = ? AND bucket >= ? AND bucket < ?")
+        params: List[Any] = [seconds, (start or 0.0) - (start or 0.0) % seconds, end or float("inf")]
+        if service:
+            sql += " AND service = ?"
+            params.append(service)
+        out = []
+        for row in self.conn.execute(sql + " ORDER BY bucket, service", params):
+            out.append({
+                "bucket": row["bucket"],
+                "service": row["service"],
+                "checks": row["checks"],
+                "uptime_percent": row["up"] / row["checks"] * 100,
+                "latency_avg_ms": row["latency_sum"] / row["latency_count"] if row["latency_count"] else None,
+                "latency_max_ms": row["latency_max"],
+            })
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        row = self.conn.execute("SELECT COUNT(*) AS n, MIN(ts) AS oldest, MAX(ts) AS newest FROM reports").fetchone()
+        return {"reports": row["n"], "oldest": row["oldest"], "newest": row["newest"], "size_bytes": self.size_bytes()}
+
+INCIDENT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS incidents (
+    signature TEXT PRIMARY KEY,
+    service TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    issue_url TEXT,
+    reported REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    resolved REAL
+);
+CREATE INDEX IF NOT EXISTS incidents_service ON incidents (service);
+"""
+
+class IncidentStore:
+    """Dedup state for auto-reported incidents in one SQLite file.
+
+    Open incidents are loaded into a dict, so lookups during a round are O(1)
+    and touch no files. Changes are buffered and written in one transaction by
+    commit(). An incident stops suppressing new reports once its service
+    recovers (auto-resolve) or `ttl` seconds after it was reported, so a
+    recurring or long-running outage is reported again.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 86400) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(INCIDENT_SCHEMA)
+        self.open: Dict[str, Dict[str, Any]] = {
+            row["signature"]: dict(row)
+            for row in self.conn.execute("SELECT * FROM incidents WHERE resolved IS NULL")
+        }
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+
+    def close(self) -> None:
+        self.commit()
+        self.conn.close()
+
+    def is_reported(self, signature: str, now: Optional[float] = None) -> bool:
+        """True if an open, unexpired incident exists for this signature; refreshes its last_seen."""
+        incident = self.open.get(signature)
+        if incident is None:
+            return False
+        now = time.time() if now is None else now
+        if now - incident["reported"] >= self.ttl:
+            return False
+        incident["last_seen"] = now
+        self._dirty[signature] = incident
+        return True
+
+    def mark_reported(self, signature: str, service: str, reason: str, issue_url: Optional[str] = None,
+                      now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        incident = {"signature": signature, "service": service, "reason": reason, "issue_url": issue_url,
+                    "reported": now, "last_seen": now, "resolved": None}
+        self.open[signature] = incident
+        self._dirty[signature] = incident
+
+    def resolve(self, healthy_services, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Close open incidents of services that are healthy again and return them."""
+        now = time.time() if now is None else now
+        healthy = set(healthy_services)
+        resolved = []
+        for signature, incident in list(self.open.items()):
+            if incident["service"] in healthy:
+                incident["resolved"] = now
+                self._dirty[signature] = self.open.pop(signature)
+                resolved.append(incident)
+        return resolved
+
+    def commit(self) -> None:
+        """Write buffered changes in one transaction and drop closed incidents older than ttl."""
+        if not self._dirty:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO incidents (signature, service, reason, issue_url, reported, last_seen, resolved) "
+                "VALUES (:signature, :service, :reason, :issue_url, :reported, :last_seen, :resolved)",
+                list(self._dirty.values()),
+            )
+            self.conn.execute("DELETE FROM incidents WHERE resolved IS NOT NULL AND resolved < ?",
+                              (time.time() - self.ttl,))
+        self._dirty.clear()
+
+def open_store(path: str, max_reports: int = 0, max_mb: float = 0.0) -> HealthStore:
+    return HealthStore(path, max_reports=max_reports, max_bytes=int(max_mb * 1024 * 1024))
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Service Probes Module
+One service registry and async probe engine shared by every health checker
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = float(os.getenv("TIMEOUT_SECONDS", "8"))
+
+
+@dataclass
+class ServiceEndpoint:
+    """Data class describing one probed service"""
+    name: str
+    base_url: str
+    path: str = "/"
+    # 'openai': GET /models must list models; 'ollama': GET /api/tags must list models;
+    # 'http': any non-5xx answer means the service is up
+    kind: str = "http"
+
+    @property
+    def url(self) -> str:
+        return self.base_url.rstrip("/") + self.path
+
+
+@dataclass
+class ProbeResult:
+    """Data class for the outcome of one probe"""
+    name: str
+    url: str
+    ok: bool
+    status_code: Optional[int] = None
+    latency_ms: Optional[float] = None
+    detail: Optional[str] = None
+    extra: Dict[str, Any] = None
+
+
+def _env(*names: str, default: str) -> str:
+    for name in names:
+        if os.getenv(name):
+            return os.environ[name]
+    return default
+
+
+def default_endpoints() -> Dict[str, ServiceEndpoint]:
+    """The service registry; base URLs can be overridden with *_BASE_URL environment variables"""
+    endpoints = [
+        ServiceEndpoint("localai", _env("LOCALAI_BASE_URL", "OPENAI_BASE_URL", default="http://localhost:8080/v1"),
+                        "/models", "openai"),
+        ServiceEndpoint("ollama", _env("OLLAMA_BASE_URL", default="http://localhost:11434"), "/api/tags", "ollama"),
+        ServiceEndpoint("vllm", _env("VLLM_BASE_URL", default="http://localhost:8000/v1"), "/models", "openai"),
+        ServiceEndpoint("lmstudio", _env("LMSTUDIO_BASE_URL", default="http://localhost:1234/v1"), "/models", "openai"),
+        ServiceEndpoint("llmstack", _env("LLMSTACK_BASE_URL", default="http://localhost:3000")),
+        ServiceEndpoint("flowise", _env("FLOWISE_BASE_URL", default="http://localhost:3001")),
+        ServiceEndpoint("openhands", _env("OPENHANDS_BASE_URL", default="http://localhost:3002"), "/health"),
+        ServiceEndpoint("grafana", _env("GRAFANA_BASE_URL", default="http://localhost:3003"), "/api/health"),
+        ServiceEndpoint("prometheus", _env("PROMETHEUS_BASE_URL", default="http://localhost:9090"), "/-/ready"),
+    ]
+    return {endpoint.name: endpoint for endpoint in endpoints}
+
+
+def _interpret(endpoint: ServiceEndpoint, resp: httpx.Response) -> Tuple[bool, Optional[str], Dict[str, Any]]:
+    """Apply the endpoint's health semantics to a response"""
+    if endpoint.kind == "http":
+        ok = resp.status_code < 500
+        return ok, None if ok else f"Bad status {resp.status_code}", {}
+
+    key, id_field = ("data", "id") if endpoint.kind == "openai" else ("models", "name")
+    try:
+        body = resp.json() if resp.status_code == 200 else None
+    except ValueError:
+        body = None
+    if not isinstance(body, dict) or key not in body:
+        return False, f"Unexpected response: {resp.text[:160]}", {}
+
+    models = [m.get(id_field) for m in (body[key] or []) if isinstance(m, dict)]
+    extra: Dict[str, Any] = {"model_count": len(models), "models": models}
+    if models:
+        extra["first_model"] = models[0]
+    return True, None, extra
+
+
+async def probe_endpoint(client: httpx.AsyncClient, endpoint: ServiceEndpoint,
+                         timeout: float = DEFAULT_TIMEOUT) -> ProbeResult:
+    """Probe one service once"""
+    url = endpoint.url
+    start = time.perf_counter()
+    try:
+        resp = await client.get(url, timeout=timeout)
+        latency = (time.perf_counter() - start) * 1000
+        ok, detail, extra = _interpret(endpoint, resp)
+        return ProbeResult(endpoint.name, url, ok, resp.status_code, latency, detail, extra)
+    except Exception as e:
+        return ProbeResult(endpoint.name, url, False, detail=str(e) or type(e).__name__, extra={})
+
+
+class ProbeEngine:
+    """Probe services concurrently and share one cached result set.
+
+    Results younger than `ttl` seconds are served from memory instead of
+    re-probing. With a snapshot file (`snapshot_file` or SERVICE_PROBE_SNAPSHOT)
+    results are also written there and read back, so separate processes (the
+    health daemon, the orchestrators, one-off scripts) share a single check.
+    """
+
+    def __init__(self, endpoints: Optional[Dict[str, ServiceEndpoint]] = None, ttl: float = 5.0,
+                 timeout: float = DEFAULT_TIMEOUT, snapshot_file: Optional[str] = None):
+        """Initialize probe engine"""
+        self.endpoints = endpoints if endpoints is not None else default_endpoints()
+        self.ttl = ttl
+        self.timeout = timeout
+        self.snapshot_file = snapshot_file or os.getenv("SERVICE_PROBE_SNAPSHOT") or None
+        self._results: Dict[str, Tuple[float, ProbeResult]] = {}
+        self._lock = threading.Lock()
+
+    def _load_snapshot(self) -> Dict[str, Tuple[float, ProbeResult]]:
+        try:
+            with open(self.snapshot_file, 'r') as f:
+                entries = json.load(f).get('results', {})
+        except (OSError, ValueError):
+            return {}
+        loaded = {}
+        for name, entry in entries.items():
+            try:
+                loaded[name] = (entry.pop('checked_at'), ProbeResult(**entry))
+            except (KeyError, TypeError):
+                continue
+        return loaded
+
+    def _save_snapshot(self) -> None:
+        with self._lock:
+            entries = {name: dict(asdict(result), checked_at=checked_at)
+                       for name, (checked_at, result) in self._results.items()}
+        directory = os.path.dirname(os.path.abspath(self.snapshot_file))
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.service_probes.', suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'results': entries}, f)
+            os.replace(tmp_path, self.snapshot_file)
+        except OSError as e:
+            logger.warning(f"Failed to write probe snapshot {self.snapshot_file}: {e}")
+
+    def cached(self, names: Optional[Iterable[str]] = None, max_age: Optional[float] = None) -> Dict[str, ProbeResult]:
+        """Results checked within max_age (default: ttl) seconds, without probing"""
+        names = list(names) if names is not None else list(self.endpoints)
+        max_age = self.ttl if max_age is None else max_age
+        now = time.time()
+        with self._lock:
+            entries = dict(self._results)
+        if self.snapshot_file and any(n not in entries or now - entries[n][0] > max_age for n in names):
+            for name, entry in self._load_snapshot().items():
+                if name not in entries or entry[0] > entries[name][0]:
+                    entries[name] = entry
+
+        fresh = {}
+        for name in names:
+            entry = entries.get(name)
+            # A result probed against a different URL (other env, other host) is not this service's
+            if entry and now - entry[0] <= max_age and entry[1].url == self.endpoints[name].url:
+                fresh[name] = entry[1]
+        return fresh
+
+    def record(self, results: Iterable[ProbeResult], checked_at: Optional[float] = None) -> None:
+        """Store probe results (from this engine or any other prober) in the shared result set"""
+        checked_at = time.time() if checked_at is None else checked_at
+        with self._lock:
+            for result in results:
+                self._results[result.name] = (checked_at, result)
+        if self.snapshot_file:
+            self._save_snapshot()
+
+    async def probe(self, client: httpx.AsyncClient, names: Optional[Iterable[str]] = None,
+                    timeouts: Optional[Dict[str, float]] = None) -> Dict[str, ProbeResult]:
+        """Probe services now, concurrently, and record the results"""
+        names = list(names) if names is not None else list(self.endpoints)
+        timeouts = timeouts or {}
+        results = await asyncio.gather(*(
+            probe_endpoint(client, self.endpoints[name], timeouts.get(name, self.timeout)) for name in names
+        ))
+        self.record(results)
+        return {result.name: result for result in results}
+
+    async def check(self, names: Optional[Iterable[str]] = None, client: Optional[httpx.AsyncClient] = None,
+                    timeout: Optional[float] = None, max_age: Optional[float] = None) -> Dict[str, ProbeResult]:
+        """Results for names, probing only those without a fresh cached result"""
+        names = list(names) if names is not None else list(self.endpoints)
+        results = self.cached(names, max_age)
+        stale = [name for name in names if name not in results]
+        if stale:
+            timeouts = {name: timeout for name in stale} if timeout is not None else None
+            if client is None:
+                async with httpx.AsyncClient() as own_client:
+                    results.update(await self.probe(own_client, stale, timeouts))
+            else:
+                results.update(await self.probe(client, stale, timeouts))
+        return {name: results[name] for name in names}
+
+    def check_sync(self, names: Optional[Iterable[str]] = None, timeout: Optional[float] = None,
+                   max_age: Optional[float] = None) -> Dict[str, ProbeResult]:
+        """Blocking check() for synchronous callers (must not be called from a running event loop)"""
+        return asyncio.run(self.check(names, timeout=timeout, max_age=max_age))
+
+
+_default_engine: Optional[ProbeEngine] = None
+_default_engine_lock = threading.Lock()
+
+
+def get_engine() -> ProbeEngine:
+    """The process-wide engine, so every consumer in a process shares one result set"""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = ProbeEngine()
+        return _default_engine
+
+
+def status_map(results: Dict[str, ProbeResult]) -> Dict[str, bool]:
+    """Reduce probe results to {service: healthy}"""
+    return {name: result.ok for name, result in results.items()}
@@ -4,6 +4,7 @@ Tests for GitHub Automation functionality
 """
 
 import os
+import subprocess
 import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
@@ -12,6 +13,8 @@ from pathlib import Path
 # Import our modules
 from github_automation import GitHubAPI, BugReport, AutoSubmitter, ReviewRequest
 from merge_automation import MergeAutomation
+import auto_fixers
+from auto_fixers import FixRunner, get_fixer, atomic_write, fix_python_imports
 
 
 class TestGitHubAPI(unittest.TestCase):
@@ -311,6 +314,167 @@ def main():
             
         finally:
             py_path.unlink()
+    
+    def test_fix_python_imports_classification(self):
+        """Test stdlib detection, __future__, multi-line imports and idempotence"""
+        source = """from __future__ import annotations
+import requests_oauthlib
+from autogen import (
+    AssistantAgent,
+    UserProxyAgent,
+)
+from .local import helper
+import json  # config
+
+sys.path.append('.')
+import zeta
+import alpha
+"""
+        fixed = fix_python_imports(source)
+        
+        self.assertEqual(fixed, """from __future__ import annotations
+
+import json  # config
+
+from autogen import (
+    AssistantAgent,
+    UserProxyAgent,
+)
+import requests_oauthlib
+
+from .local import helper
+
+sys.path.append('.')
+import alpha
+import zeta
+""")
+        self.assertIsNone(fix_python_imports(fixed))
+
+
+class TestFixRunner(unittest.TestCase):
+    """Test the parallel fixer framework"""
+    
+    def setUp(self):
+        """Set up a directory of shell scripts"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(10):
+            path = Path(self.tmpdir.name) / f"script_{i}.sh"
+            if i % 2:
+                path.write_text("#!/bin/bash\nset -e\necho ok\n")
+            else:
+                path.write_text("#!/bin/bash\necho ok\n")
+            self.paths.append(str(path))
+        # An unreadable entry is reported as an error, not raised
+        self.paths.append(str(Path(self.tmpdir.name) / "missing.sh"))
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_parallel_run_collects_results(self):
+        """Test chunked process-pool run returns one result per file in order"""
+        runner = FixRunner(max_workers=2, chunk_size=3)
+        results = runner.run(get_fixer('shell'), self.paths)
+        
+        self.assertEqual([r.path for r in results], self.paths)
+        statuses = [r.status for r in results]
+        self.assertEqual(statuses.count('changed'), 5)
+        self.assertEqual(statuses.count('skipped'), 5)
+        self.assertEqual(statuses[-1], 'error')
+        self.assertTrue(all(r.elapsed >= 0 for r in results))
+        
+        self.assertEqual(Path(self.paths[0]).read_text(), "#!/bin/bash\nset -e\necho ok\n")
+    
+    def test_atomic_write_preserves_mode(self):
+        """Test atomic write replaces content, keeps permissions and leaves no temp files"""
+        path = self.paths[0]
+        os.chmod(path, 0o755)
+        atomic_write(path, "#!/bin/sh\n")
+        
+        self.assertEqual(Path(path).read_text(), "#!/bin/sh\n")
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o755)
+        self.assertFalse([p for p in os.listdir(self.tmpdir.name) if p.endswith('.tmp')])
+
+
+class TestFixWorktrees(unittest.TestCase):
+    """Test building fix branches in temporary git worktrees"""
+    
+    def git(self, *args, cwd=None):
+        return subprocess.run(['git', *args], cwd=cwd or self.clone, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    
+    def setUp(self):
+        """Create an origin repository and a user checkout of it"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        origin = os.path.join(self.tmpdir.name, 'origin.git')
+        self.clone = os.path.join(self.tmpdir.name, 'clone')
+        subprocess.run(['git', 'init', '-q', '--bare', '-b', 'main', origin], check=True)
+        subprocess.run(['git', 'clone', '-q', origin, self.clone], check=True, capture_output=True)
+        self.git('config', 'user.email', 'test@example.com')
+        self.git('config', 'user.name', 'Test')
+        self.git('checkout', '-q', '-b', 'main')
+        Path(self.clone, 'run.sh').write_text("#!/bin/bash\necho run\n")
+        self.git('add', 'run.sh')
+        self.git('commit', '-q', '-m', 'init')
+        self.git('push', '-q', 'origin', 'main')
+        self.git('checkout', '-q', '-b', 'user-work')
+        
+        self.cwd = os.getcwd()
+        os.chdir(self.clone)
+        os.environ['DRY_RUN'] = 'false'
+        self.automation = MergeAutomation(github_token="test_token", repo="test/repo")
+    
+    def tearDown(self):
+        os.chdir(self.cwd)
+        os.environ['DRY_RUN'] = 'true'
+        self.tmpdir.cleanup()
+    
+    def test_build_fix_branch_leaves_checkout_alone(self):
+        """Test fix branch is built and pushed without touching the user's checkout"""
+        fixed = self.automation.build_fix_branch('auto-fix/shell', 'shell', "Fix {count} scripts")
+        
+        self.assertEqual(fixed, ['run.sh'])
+        self.assertEqual(self.git('rev-parse', '--abbrev-ref', 'HEAD'), 'user-work')
+        self.assertEqual(Path(self.clone, 'run.sh').read_text(), "#!/bin/bash\necho run\n")
+        self.assertEqual(self.git('log', '-1', '--format=%s', 'origin/auto-fix/shell'), 'Fix 1 scripts')
+        self.assertEqual(len(self.git('worktree', 'list').splitlines()), 1)
+    
+    def test_run_fixer_skips_cached_clean_files(self):
+        """Test a repeated run does not reopen files the fixer already found clean"""
+        self.git('checkout', '-q', 'main')
+        Path(self.clone, 'clean.sh').write_text("#!/bin/bash\nset -e\n")
+        self.git('add', 'clean.sh')
+        self.git('commit', '-q', '-m', 'clean')
+        
+        with patch('auto_fixers.apply_fix', wraps=auto_fixers.apply_fix) as mock_apply:
+            self.automation.run_fixer('shell', paths=['clean.sh'])
+            self.assertEqual(mock_apply.call_count, 1)
+            
+            # A fresh instance reloads the persistent cache from disk
+            automation = MergeAutomation(github_token="test_token", repo="test/repo")
+            automation.run_fixer('shell', paths=['clean.sh'])
+            self.assertEqual(mock_apply.call_count, 1)
+            
+            # Editing the file invalidates its entry
+            Path(self.clone, 'clean.sh').write_text("#!/bin/bash\n")
+            self.assertEqual(automation.run_fixer('shell', paths=['clean.sh']), ['clean.sh'])
+            self.assertEqual(mock_apply.call_count, 2)
+    
+    def test_commit_changes_batches_staging(self):
+        """Test committing many files costs a constant number of git invocations"""
+        files = [f"file {i}*.txt" for i in range(200)]
+        for name in files:
+            Path(self.clone, name).write_text(name)
+        
+        real_run = subprocess.run
+        with patch('merge_automation.subprocess.run', side_effect=real_run) as mock_run:
+            self.assertTrue(self.automation.commit_changes("Add files", files))
+        
+        self.assertEqual(mock_run.call_count, 3)
+        self.assertEqual(len(self.git('show', '--name-only', '--format=', 'HEAD').splitlines()), 200)
+        
+        with patch('merge_automation.subprocess.run', side_effect=real_run):
+            self.assertFalse(self.automation.commit_changes("Nothing", files))
 
 
 def run_tests():
@@ -324,6 +488,8 @@ def run_tests():
     suite.addTest(unittest.makeSuite(TestGitHubAPI))
     suite.addTest(unittest.makeSuite(TestAutoSubmitter))
     suite.addTest(unittest.makeSuite(TestMergeAutomation))
+    suite.addTest(unittest.makeSuite(TestFixRunner))
+    suite.addTest(unittest.makeSuite(TestFixWorktrees))
     
     # Run tests
     runner = unittest.TextTestRunner(verbosity=2)
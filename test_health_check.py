@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Tests for the unified health check utility (scripts/health_check.py)
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent / 'scripts'))
+
+import health_check
+from health_store import HealthStore, IncidentStore
+from health_check import (HealthChecker, HealthMetrics, HealthState, IncidentReporter, InferenceProber, LatencySketch,
+                          ProbeScheduler, WindowedLatency)
+
+
+def fake_backend(down=(), broken_inference=(), silent_inference=(), slow=None):
+    """Mock transport answering every probe path, failing for hosts in `down`
+
+    Hosts in `slow` answer after that many seconds, or time out if the request's timeout is shorter.
+    """
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host in down:
+            raise httpx.ConnectError("connection refused", request=request)
+        delay = (slow or {}).get(request.url.host)
+        if delay is not None:
+            if delay > request.extensions["timeout"]["read"]:
+                raise httpx.ReadTimeout("timed out", request=request)
+            time.sleep(delay)
+        if request.url.path.endswith("/models"):
+            return httpx.Response(200, json={"data": [{"id": "llama3.2"}]})
+        if request.url.path.endswith("/api/tags"):
+            return httpx.Response(200, json={"models": [{"name": "llama3.2:3b"}]})
+        if request.url.path.endswith("/chat/completions"):
+            if request.url.host in broken_inference:
+                return httpx.Response(500, text="model failed to load")
+            chunks = [{"choices": [{"delta": {"role": "assistant"}}]}]
+            if request.url.host not in silent_inference:
+                chunks.append({"choices": [{"delta": {"content": "pong"}}]})
+            body = "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + "data: [DONE]\n\n"
+            return httpx.Response(200, content=body.encode(),
+                                  headers={"Content-Type": "text/event-stream"})
+        return httpx.Response(200, json={})
+    return httpx.MockTransport(handler)
+
+
+FAKE_ENDPOINTS = {
+    "LOCALAI_BASE_URL": "http://localai/v1",
+    "OLLAMA_BASE_URL": "http://ollama",
+    "VLLM_BASE_URL": "http://vllm",
+    "FLOWISE_BASE_URL": "http://flowise",
+    "PROMETHEUS_BASE_URL": "http://prometheus",
+    "GRAFANA_BASE_URL": "http://grafana",
+}
+
+
+def make_args(**overrides):
+    """Build CLI args with defaults matching health_check.main()"""
+    args = dict(prometheus_export=None, fail_on_down=False, save_dir=None, store=None, retain=0, store_max_mb=0.0,
+                query=None, resolution="1m", service=None,
+                auto_report=False, issue_repo=None, daemon=True, interval=0.0, jitter=0.0,
+                max_backoff=0.0, fast_fail_timeout=1.0, inference_probe=False, inference_interval=300.0,
+                inference_timeout=60.0, inference_model=None, incident_ttl="7d", group_threshold=3,
+                window=60, latency_windows="5m,1h", rounds=1, report_file=None, metrics_port=0, metrics_host="127.0.0.1")
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+@patch.dict(os.environ, FAKE_ENDPOINTS)
+class TestHealthChecker(unittest.TestCase):
+    """Test probing and rolling state"""
+
+    def test_run_with_shared_client(self):
+        """Test a round through a caller-owned client"""
+        async def scenario():
+            async with httpx.AsyncClient(transport=fake_backend(down={"vllm"})) as client:
+                return await HealthChecker().run(client)
+
+        report = asyncio.run(scenario())
+        summary = report.summary()
+        self.assertEqual(summary["total"], 6)
+        self.assertEqual(summary["down"], 1)
+        localai = next(r for r in report.results if r.name == "localai")
+        self.assertEqual(localai.extra["model_count"], 1)
+
+    def test_health_state_tracks_transitions(self):
+        """Test rolling state counts failures, transitions and window uptime"""
+        state = HealthState(window=3)
+        for down in ({"ollama"}, set(), set(), set()):
+            async def scenario():
+                async with httpx.AsyncClient(transport=fake_backend(down=down)) as client:
+                    return await HealthChecker().run(client)
+            state.update(asyncio.run(scenario()))
+
+        ollama = state.to_dict()["services"]["ollama"]
+        self.assertEqual(ollama["checks"], 4)
+        self.assertEqual(ollama["failures"], 1)
+        self.assertEqual(ollama["transitions"], 1)
+        self.assertEqual(ollama["consecutive_successes"], 3)
+        self.assertEqual(ollama["window_checks"], 3)
+        self.assertEqual(ollama["window_uptime_percent"], 100.0)
+
+    def test_daemon_appends_report_lines(self):
+        """Test daemon rounds reuse one client and append one JSON line per round"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            report_file = os.path.join(tmpdir, "health.jsonl")
+            args = make_args(rounds=3, report_file=report_file)
+            with patch("builtins.print"):
+                code = asyncio.run(health_check.run_daemon(args, transport=fake_backend()))
+
+            self.assertEqual(code, 0)
+            with open(report_file, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual(len(lines), 3)
+            self.assertEqual(lines[-1]["state"]["rounds"], 3)
+
+    def test_save_dir_uses_single_store(self):
+        """Test --save-dir appends to one SQLite store instead of writing a file per run"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            args = make_args(rounds=3, save_dir=tmpdir, retain=2)
+            with patch("builtins.print"):
+                asyncio.run(health_check.run_daemon(args, transport=fake_backend()))
+
+            self.assertEqual(os.listdir(tmpdir), ["health.sqlite3"])
+            store = HealthStore(os.path.join(tmpdir, "health.sqlite3"))
+            self.assertEqual(store.stats()["reports"], 2)
+            store.close()
+
+
+
+@patch.dict(os.environ, FAKE_ENDPOINTS)
+class TestProbeScheduler(unittest.TestCase):
+    """Test adaptive per-service probe scheduling"""
+
+    def run_round(self, checker, scheduler, down=(), slow=None):
+        async def scenario():
+            async with httpx.AsyncClient(transport=fake_backend(down=down, slow=slow)) as client:
+                return await checker.run(client, scheduler)
+        return asyncio.run(scenario())
+
+    def test_down_service_backs_off_and_fails_fast(self):
+        """Test a down service is skipped until its backoff expires and then probed with a short timeout"""
+        checker = HealthChecker()
+        scheduler = ProbeScheduler(interval=10.0, max_backoff=40.0, fast_fail_timeout=0.25)
+        self.run_round(checker, scheduler, down={"vllm"})
+
+        for name in ("vllm", "ollama"):
+            scheduler.schedules[name].next_due = 0.0
+        report = self.run_round(checker, scheduler, down={"vllm"})
+        self.assertEqual(sorted(report.cached), ["flowise", "grafana", "localai", "prometheus"])
+        self.assertEqual(len(report.results), 6)
+        self.assertEqual(report.summary()["down"], 1)
+
+        vllm = scheduler.schedules["vllm"]
+        self.assertEqual(vllm.failures, 2)
+        self.assertAlmostEqual(vllm.next_due - report.timestamp, 20.0, places=3)
+        self.assertEqual(scheduler.timeout_for("vllm"), 0.25)
+        for _ in range(5):
+            scheduler.record([r for r in report.results if r.name == "vllm"], report.timestamp)
+        self.assertAlmostEqual(vllm.next_due - report.timestamp, 40.0, places=3)
+
+    def test_learned_timeout_and_flapping(self):
+        """Test timeouts follow observed latency and flapping services are probed faster"""
+        scheduler = ProbeScheduler(interval=8.0, min_timeout=0.5)
+        result = health_check.EndpointResult(name="ollama", url="http://ollama", ok=True, latency_ms=100.0)
+        scheduler.record([result], 0.0)
+        self.assertAlmostEqual(scheduler.timeout_for("ollama"), 0.5)
+        self.assertEqual(scheduler.schedules["ollama"].next_due, 8.0)
+
+        for ok in (False, True, False):
+            scheduler.record([health_check.EndpointResult(name="ollama", url="http://ollama", ok=ok, latency_ms=100.0)], 0.0)
+        self.assertTrue(scheduler.is_flapping("ollama"))
+        self.assertEqual(scheduler.schedules["ollama"].next_due, 2.0)
+
+    def test_timeout_widens_while_a_fast_service_is_slow(self):
+        """Test a service that slows past its learned timeout gets longer timeouts and comes back up"""
+        checker = HealthChecker()
+        scheduler = ProbeScheduler(interval=10.0, min_timeout=0.1)
+        self.run_round(checker, scheduler)
+        self.assertAlmostEqual(scheduler.timeout_for("ollama"), 0.1)
+
+        outcomes = []
+        for _ in range(2):
+            scheduler.schedules["ollama"].next_due = 0.0
+            report = self.run_round(checker, scheduler, slow={"ollama": 0.15})
+            outcomes.append(next(r.ok for r in report.results if r.name == "ollama"))
+            if not outcomes[-1]:
+                self.assertAlmostEqual(scheduler.timeout_for("ollama"), 0.2)
+        self.assertEqual(outcomes, [False, True])
+        self.assertEqual(scheduler.schedules["ollama"].failures, 0)
+        self.assertGreater(scheduler.timeout_for("ollama"), 0.15)
+
+    def test_cached_results_not_counted(self):
+        """Test carried-over results do not inflate rolling state or stored samples"""
+        checker = HealthChecker()
+        scheduler = ProbeScheduler(interval=60.0)
+        state = HealthState()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = HealthStore(os.path.join(tmpdir, "health.sqlite3"))
+            for _ in range(2):
+                report = self.run_round(checker, scheduler)
+                state.update(report)
+                store.append(report.to_dict())
+            self.assertEqual(len(report.cached), 6)
+            self.assertEqual(state.to_dict()["services"]["ollama"]["checks"], 1)
+            self.assertEqual(len(store.samples("ollama")), 1)
+            store.close()
+
+
+@patch.dict(os.environ, FAKE_ENDPOINTS)
+class TestInferenceProbe(unittest.TestCase):
+    """Test synthetic time-to-first-token probes"""
+
+    def run_round(self, checker, **backend):
+        async def scenario():
+            async with httpx.AsyncClient(transport=fake_backend(**backend)) as client:
+                return await checker.run(client)
+        return asyncio.run(scenario())
+
+    def test_ttft_feeds_state_and_metrics_and_is_rate_limited(self):
+        """Test inference results reach state and /metrics, and a second round inside the interval skips them"""
+        checker = HealthChecker(inference=InferenceProber(min_interval=300.0))
+        state = HealthState()
+        metrics = HealthMetrics(state)
+        for _ in range(2):
+            report = self.run_round(checker)
+            state.update(report)
+            metrics.observe(report)
+
+        self.assertEqual(metrics.inference_probes, {"localai": 1, "vllm": 1})
+        self.assertNotIn("inference", next(r for r in report.results if r.name == "vllm").extra)
+        vllm = state.to_dict()["services"]["vllm"]
+        self.assertEqual(vllm["ttft_ms"]["5m"]["count"], 1)
+        self.assertEqual(vllm["cold_starts"], 0)
+        self.assertNotIn("ttft_ms", state.to_dict()["services"]["ollama"])
+        text = metrics.render()
+        self.assertIn('service_inference_ttft_seconds_count{service="vllm"} 1', text)
+        self.assertIn('service_inference_cold_starts_total{service="vllm"} 0', text)
+        self.assertIn('service_inference_ttft_quantile_seconds{service="vllm",window="5m",quantile="0.5"}', text)
+
+    def test_failed_inference_marks_service_down_and_slow_first_token_is_cold(self):
+        """Test a backend that lists models but cannot serve them is down, and slow tokens count as cold"""
+        checker = HealthChecker(inference=InferenceProber(cold_start_seconds=0.0))
+        report = self.run_round(checker, broken_inference={"vllm"})
+        results = {r.name: r for r in report.results}
+
+        self.assertFalse(results["vllm"].ok)
+        self.assertTrue(results["vllm"].detail.startswith("Inference probe failed"))
+        self.assertEqual(results["vllm"].extra["inference"]["status_code"], 500)
+        localai = results["localai"]
+        self.assertTrue(localai.ok)
+        self.assertTrue(localai.extra["inference"]["cold"])
+        self.assertEqual(localai.extra["inference"]["model"], "llama3.2")
+        self.assertNotIn("localai", checker.inference.warm_ttft)
+
+    def test_role_only_stream_has_no_first_token(self):
+        """Test a stream whose only delta carries the role, not content, fails the probe"""
+        checker = HealthChecker(inference=InferenceProber())
+        report = self.run_round(checker, silent_inference={"vllm"})
+        results = {r.name: r for r in report.results}
+
+        self.assertFalse(results["vllm"].ok)
+        self.assertEqual(results["vllm"].extra["inference"]["detail"], "Stream ended without a token")
+        self.assertTrue(results["localai"].ok)
+
+
+class TestLatencySketch(unittest.TestCase):
+    """Test rolling latency percentiles"""
+
+    def test_quantiles_within_relative_error(self):
+        """Test sketch quantiles stay within 1% of the exact values"""
+        sketch = LatencySketch(relative_accuracy=0.01)
+        values = [float(v) for v in range(1, 10001)]
+        for v in values:
+            sketch.add(v)
+        for q, exact in ((0.5, 5000.5), (0.9, 9000.1), (0.99, 9900.01)):
+            self.assertAlmostEqual(sketch.quantile(q), exact, delta=exact * 0.01)
+        self.assertLess(len(sketch.bins), 500)
+
+    def test_windows_expire_old_samples(self):
+        """Test a slow burst drops out of the short window but stays in the long one"""
+        latency = WindowedLatency([300, 3600])
+        for t in range(0, 600, 10):
+            latency.add(1000.0 + t, 2000.0 if t < 200 else 50.0)
+
+        now = 1000.0 + 590
+        short = latency.quantiles(now, 300)
+        long = latency.quantiles(now, 3600)
+        self.assertAlmostEqual(short["p99"], 50.0, delta=1.0)
+        self.assertAlmostEqual(long["p99"], 2000.0, delta=40.0)
+        self.assertEqual(long["count"], 60)
+
+
+class TestHealthStore(unittest.TestCase):
+    """Test the SQLite report store"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "health.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @staticmethod
+    def report(ts, ok=True, latency=20.0):
+        return {
+            "timestamp": ts,
+            "summary": {"total": 1, "up": int(ok), "down": int(not ok), "uptime_percent": 100.0 * ok},
+            "results": [{"name": "ollama", "url": "http://ollama/api/tags", "ok": ok,
+                         "status_code": 200 if ok else None, "latency_ms": latency if ok else None,
+                         "detail": None, "extra": None}],
+        }
+
+    def test_range_queries_and_rollups(self):
+        """Test raw range queries and minute/hour rollups"""
+        store = HealthStore(self.path)
+        base = 1_700_000_000 - 1_700_000_000 % 3600
+        for i in range(120):
+            store.append(self.report(base + i * 30, ok=i % 4 != 0, latency=10.0 + i))
+
+        self.assertEqual(len(store.reports(start=base, end=base + 300)), 10)
+        self.assertEqual(len(store.samples("ollama", start=base + 3000)), 20)
+
+        minutes = store.rollups("1m", start=base, end=base + 120)
+        self.assertEqual([row["checks"] for row in minutes], [2, 2])
+        self.assertEqual(minutes[0]["uptime_percent"], 50.0)
+
+        hours = store.rollups("1h", service="ollama")
+        self.assertEqual([row["checks"] for row in hours], [120])
+        self.assertEqual(hours[0]["latency_max_ms"], 129.0)
+        store.close()
+
+    def test_retention_by_count_and_size(self):
+        """Test count and size retention drop the oldest raw reports but keep rollups"""
+        store = HealthStore(self.path, max_reports=50)
+        for i in range(80):
+            store.append(self.report(1000.0 + i))
+        self.assertEqual(store.stats()["reports"], 50)
+        self.assertEqual(store.reports(limit=1)[0]["timestamp"], 1079.0)
+        self.assertEqual(sum(row["checks"] for row in store.rollups("1d")), 80)
+        store.close()
+
+        store = HealthStore(self.path, max_bytes=64 * 1024)
+        for i in range(2000):
+            store.append(self.report(5000.0 + i))
+        store.enforce_size()
+        self.assertLessEqual(store.size_bytes(), 64 * 1024)
+        self.assertEqual(store.reports(limit=1)[0]["timestamp"], 6999.0)
+        store.close()
+
+
+@patch.dict(os.environ, FAKE_ENDPOINTS)
+class TestIncidentState(unittest.TestCase):
+    """Test deduplicated incident reporting"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "incidents.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_expiry_resolve_and_batched_commit(self):
+        """Test incidents expire after ttl, resolve on recovery and persist only on commit"""
+        incidents = IncidentStore(self.path, ttl=3600)
+        incidents.mark_reported("sig-a", "vllm", "connection refused", "https://example/1", now=1000.0)
+        incidents.mark_reported("sig-b", "ollama", "timeout", now=1000.0)
+        self.assertTrue(incidents.is_reported("sig-a", now=2000.0))
+        self.assertFalse(incidents.is_reported("sig-a", now=1000.0 + 3600))
+        self.assertFalse(incidents.is_reported("sig-c", now=2000.0))
+
+        other = IncidentStore(self.path)
+        self.assertEqual(other.open, {})
+        other.conn.close()
+
+        incidents.commit()
+        resolved = incidents.resolve(["ollama", "grafana"], now=3000.0)
+        self.assertEqual([i["signature"] for i in resolved], ["sig-b"])
+        incidents.close()
+
+        reopened = IncidentStore(self.path)
+        self.assertEqual(list(reopened.open), ["sig-a"])
+        self.assertEqual(reopened.open["sig-a"]["last_seen"], 2000.0)
+        reopened.close()
+
+    def test_auto_report_dedups_until_recovery(self):
+        """Test a recurring outage is reported again after the service recovered"""
+        async def round_with(down):
+            async with httpx.AsyncClient(transport=fake_backend(down=down)) as client:
+                report = await HealthChecker().run(client)
+            return await health_check.auto_report(report, "owner/repo", incidents=incidents)
+
+        incidents = IncidentStore(self.path)
+        create = AsyncMock(return_value="https://github.com/owner/repo/issues/1")
+        with patch.dict(os.environ, {"GITHUB_TOKEN": "token"}), patch.object(health_check, "create_issue", create):
+            first = asyncio.run(round_with({"vllm"}))
+            second = asyncio.run(round_with({"vllm"}))
+            recovered = asyncio.run(round_with(set()))
+            again = asyncio.run(round_with({"vllm"}))
+        incidents.close()
+
+        self.assertEqual([c["service"] for c in first["created"]], ["vllm"])
+        self.assertEqual(second["skipped"], ["vllm"])
+        self.assertEqual(recovered["resolved"], ["vllm"])
+        self.assertEqual([c["service"] for c in again["created"]], ["vllm"])
+        self.assertEqual(create.await_count, 2)
+
+    def test_reporter_binds_each_incident_and_groups_wide_outages(self):
+        """Test one pooled client carries every issue, each bound to its own service, and wide outages are grouped"""
+        posted = []
+
+        def github(request: httpx.Request) -> httpx.Response:
+            posted.append(json.loads(request.content))
+            return httpx.Response(201, json={"html_url": f"https://github.com/owner/repo/issues/{len(posted)}"})
+
+        async def scenario():
+            async with httpx.AsyncClient(transport=fake_backend(down={"vllm", "grafana"})) as client:
+                two_down = await HealthChecker().run(client)
+            async with httpx.AsyncClient(transport=fake_backend(down={"ollama", "flowise", "prometheus"})) as client:
+                three_down = await HealthChecker().run(client)
+            async with httpx.AsyncClient(transport=httpx.MockTransport(github)) as api:
+                reporter = IncidentReporter("owner/repo", "token", incidents=IncidentStore(self.path), client=api)
+                async with reporter:
+                    first = await reporter.report(two_down)
+                    second = await reporter.report(three_down)
+                self.assertFalse(api.is_closed)
+                return first, second
+
+        first, second = asyncio.run(scenario())
+        self.assertEqual(sorted(p["title"] for p in posted[:2]), ["[Health] grafana DOWN", "[Health] vllm DOWN"])
+        for payload in posted[:2]:
+            self.assertIn(payload["title"].split()[1], payload["body"])
+        self.assertEqual(len(posted), 3)
+        self.assertEqual(posted[2]["title"], "[Health] 3 services DOWN: ollama, flowise, prometheus")
+        self.assertEqual(first["resolved"], [])
+        self.assertEqual(sorted(second["resolved"]), ["grafana", "vllm"])
+        self.assertEqual({c["issue_url"] for c in second["created"]}, {"https://github.com/owner/repo/issues/3"})
+        self.assertEqual(len(second["created"]), 3)
+
+    def test_github_outage_leaves_incidents_for_next_round(self):
+        """Test a network error creating one issue keeps the others, persists state and is retried next round"""
+        outage = {"vllm"}
+
+        def github(request: httpx.Request) -> httpx.Response:
+            title = json.loads(request.content)["title"]
+            if any(name in title for name in outage):
+                raise httpx.ConnectError("connection refused", request=request)
+            return httpx.Response(201, json={"html_url": "https://github.com/owner/repo/issues/1"})
+
+        async def scenario():
+            async with httpx.AsyncClient(transport=fake_backend(down={"vllm", "grafana"})) as client:
+                report = await HealthChecker().run(client)
+            async with httpx.AsyncClient(transport=httpx.MockTransport(github)) as api:
+                async with IncidentReporter("owner/repo", "token", incidents=IncidentStore(self.path), client=api) as reporter:
+                    first = await reporter.report(report)
+                    outage.clear()
+                    second = await reporter.report(report)
+            return first, second
+
+        with patch("builtins.print"):
+            first, second = asyncio.run(scenario())
+        self.assertEqual([c["service"] for c in first["created"]], ["grafana"])
+        self.assertEqual(first["skipped"], ["vllm"])
+        self.assertEqual([c["service"] for c in second["created"]], ["vllm"])
+        incidents = IncidentStore(self.path)
+        self.assertEqual(sorted(i["service"] for i in incidents.open.values()), ["grafana", "vllm"])
+        incidents.close()
+
+    def test_daemon_survives_failed_report_processing(self):
+        """Test an error while processing one round is logged and the daemon keeps probing"""
+        args = make_args(rounds=2)
+        process = AsyncMock(side_effect=httpx.ConnectError("connection refused"))
+        with patch("builtins.print") as printed, patch.object(health_check, "process_report", process):
+            code = asyncio.run(health_check.run_daemon(args, transport=fake_backend()))
+
+        self.assertEqual(code, 0)
+        self.assertEqual(process.await_count, 2)
+        lines = [json.loads(c.args[0]) for c in printed.call_args_list if "file" not in c.kwargs]
+        self.assertEqual([line["process_error"] for line in lines], ["connection refused"] * 2)
+
+
+@patch.dict(os.environ, FAKE_ENDPOINTS)
+class TestMetricsEndpoint(unittest.TestCase):
+    """Test the in-memory Prometheus exposition"""
+
+    def test_serve_metrics(self):
+        """Test /metrics renders histograms, gauges and counters from memory"""
+        async def scenario():
+            metrics = HealthMetrics()
+            async with httpx.AsyncClient(transport=fake_backend(down={"grafana"})) as client:
+                metrics.observe(await HealthChecker().run(client))
+                metrics.observe(await HealthChecker().run(client))
+
+            server = await health_check.serve_metrics(metrics, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                async with httpx.AsyncClient() as client:
+                    ok = await client.get(f"http://127.0.0.1:{port}/metrics")
+                    missing = await client.get(f"http://127.0.0.1:{port}/other")
+            finally:
+                server.close()
+                await server.wait_closed()
+            return ok, missing
+
+        ok, missing = asyncio.run(scenario())
+        self.assertEqual(ok.status_code, 200)
+        self.assertEqual(missing.status_code, 404)
+        body = ok.text
+        self.assertIn('service_up{service="grafana"} 0', body)
+        self.assertIn('service_probe_errors_total{service="grafana"} 2', body)
+        self.assertIn('service_model_count{service="vllm"} 1', body)
+        self.assertIn('service_probe_duration_seconds_bucket{service="ollama",le="+Inf"} 2', body)
+        self.assertIn('health_check_rounds_total 2', body)
+
+    def test_state_exposes_latency_quantiles(self):
+        """Test rolling quantiles appear in JSON state and in metrics"""
+        async def scenario():
+            state = HealthState(latency_windows=["5m"])
+            metrics = HealthMetrics(state)
+            async with httpx.AsyncClient(transport=fake_backend()) as client:
+                report = await HealthChecker().run(client)
+            state.update(report)
+            metrics.observe(report)
+            return state, metrics
+
+        state, metrics = asyncio.run(scenario())
+        quantiles = state.to_dict()["services"]["ollama"]["latency_ms"]["5m"]
+        self.assertEqual(quantiles["count"], 1)
+        self.assertIsNotNone(quantiles["p99"])
+        self.assertIn('service_probe_latency_quantile_seconds{service="ollama",window="5m",quantile="0.99"}',
+                      metrics.render())
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,863 @@
+#!/usr/bin/env python3
+"""
+Tests for the llmstack orchestrators (llmstack/unified_orchestrator.py and friends)
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "llmstack"))
+# Keep the process-wide response cache out of these tests; cache tests build their own
+os.environ.setdefault("RESPONSE_CACHE", "0")
+
+import unified_orchestrator
+from unified_orchestrator import UnifiedSystemOrchestrator
+from ai_frameworks_integration import AIConfig, UnifiedAIOrchestrator
+from admission import AdmissionController, AdmissionRejected
+from response_cache import ResponseCache
+from semantic_cache import SemanticCache
+from model_router import ModelRouter
+from orchestrator import FreeAgentOrchestrator
+from service_probes import ProbeEngine, ProbeResult, ServiceEndpoint
+from circuit_breaker import BreakerRegistry
+
+try:
+    from unified_asgi import create_app
+    ASGI_AVAILABLE = True
+except ImportError:
+    ASGI_AVAILABLE = False
+
+
+AGENT_DELAY = 0.3
+
+
+class StubCompletions(BaseHTTPRequestHandler):
+    """OpenAI-compatible stub: every chat completion takes AGENT_DELAY seconds"""
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        self.server.calls.append(payload)
+        time.sleep(AGENT_DELAY)
+        if self.server.status != 200:
+            return self.send_error(self.server.status, "stub error")
+        if payload.get("stream"):
+            return self.stream(["Hello", ",", " world"])
+        body = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "stub answer"}}],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        """GET /v1/models, so the stub passes health probes"""
+        body = json.dumps({"object": "list", "data": [{"id": "stub", "object": "model"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream(self, pieces):
+        """Send pieces as chat.completion.chunk events, one every 50ms"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for piece in pieces:
+            chunk = {"id": "stub", "object": "chat.completion.chunk", "created": 0, "model": "stub",
+                     "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(0.05)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, *args):
+        pass
+
+
+def stub_server(test):
+    """Start the stub on a free port for the duration of a test and return its /v1 base URL
+    (request bodies are collected in test.stub_calls; completions answer with test.stub_status)"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubCompletions, bind_and_activate=False)
+    server.status = getattr(test, "stub_status", 200)
+    server.request_queue_size = 128
+    server.daemon_threads = True
+    server.calls = test.stub_calls = []
+    server.server_bind()
+    server.server_activate()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    test.addCleanup(server.server_close)
+    test.addCleanup(server.shutdown)
+    return f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+class TestStatusSnapshot(unittest.TestCase):
+    """Test /status is served from the background-refreshed cache"""
+
+    def setUp(self):
+        self.orchestrator = UnifiedSystemOrchestrator()
+        self.orchestrator.refresh_interval = 0.05
+        self.addCleanup(self.orchestrator.stop_status_refresher)
+
+    def test_status_route_never_probes(self):
+        """Test requests are answered from memory while the refresher probes in the background"""
+        calls = []
+
+        def slow_update(max_age=None):
+            calls.append(max_age)
+            time.sleep(0.2)
+            return {"services": {"ollama": True}, "frameworks": {}, "last_check": None}
+
+        with patch.object(self.orchestrator, "update_status", side_effect=slow_update), \
+                patch.object(unified_orchestrator, "orchestrator", self.orchestrator):
+            client = unified_orchestrator.app.test_client()
+            started = time.monotonic()
+            data = client.get("/status").get_json()
+            self.assertLess(time.monotonic() - started, 0.1)
+            self.assertIn("age_seconds", data)
+            self.assertEqual(data["refresh_interval"], 0.05)
+
+            deadline = time.monotonic() + 2
+            while client.get("/status").get_json()["services"] != {"ollama": True}:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+        self.assertEqual(calls[0], 0.025)
+
+    def test_snapshot_reports_staleness(self):
+        """Test a snapshot older than two refresh intervals is flagged stale"""
+        self.orchestrator._snapshot_at -= 1.0
+        with patch.object(self.orchestrator, "start_status_refresher"):
+            snapshot = self.orchestrator.status_snapshot()
+        self.assertTrue(snapshot["stale"])
+        self.assertGreaterEqual(snapshot["age_seconds"], 1.0)
+        self.assertIn("services", snapshot)
+
+
+class TestMultiAgentCollaboration(unittest.TestCase):
+    """Test agents fan out concurrently under a timeout/deadline/quorum policy"""
+
+    DELAYS = {"autogen": 0.2, "camel": 0.2, "localai": 0.2, "slow": 1.5}
+
+    def setUp(self):
+        self.orchestrator = UnifiedSystemOrchestrator()
+        self.synthesized = []
+
+        def route_task(task, routing_strategy="auto", **kwargs):
+            time.sleep(self.DELAYS[routing_strategy])
+            return {"success": True, "framework": routing_strategy, "result": f"{routing_strategy} answer"}
+
+        def chat(message, framework="localai", **kwargs):
+            self.synthesized.append(message)
+            return "synthesis"
+
+        patcher = patch.object(self.orchestrator, "route_task", side_effect=route_task)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(self.orchestrator.ai_orchestrator, "chat", side_effect=chat)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_latency_is_max_not_sum(self):
+        """Test three 200ms agents finish in about 200ms with a per-agent timing breakdown"""
+        result = self.orchestrator.multi_agent_collaboration("task")
+        self.assertLess(result["timings"]["total_ms"], 500)
+        self.assertEqual(set(result["timings"]["agents"]), {"autogen", "camel", "localai"})
+        self.assertTrue(all(t["status"] == "ok" for t in result["timings"]["agents"].values()))
+        self.assertEqual(result["synthesis"], "synthesis")
+
+    def test_synthesizes_what_finished_by_deadline(self):
+        """Test a straggler past its timeout is dropped and synthesis proceeds without it"""
+        started = time.monotonic()
+        result = self.orchestrator.multi_agent_collaboration(
+            "task", ["localai", "slow"], agent_timeouts={"slow": 0.3}
+        )
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(result["timings"]["agents"]["slow"]["status"], "timeout")
+        self.assertFalse(result["individual_results"]["slow"]["success"])
+        self.assertIn("localai answer", self.synthesized[0])
+        self.assertNotIn("slow answer", self.synthesized[0])
+
+    def test_quorum_stops_waiting(self):
+        """Test synthesis starts once the quorum has answered"""
+        result = self.orchestrator.multi_agent_collaboration("task", ["localai", "slow"], quorum=1)
+        self.assertLess(result["timings"]["total_ms"], 1000)
+        self.assertEqual(result["timings"]["agents"]["slow"]["status"], "skipped")
+
+
+
+class TestAsyncMultiAgent(unittest.TestCase):
+    """Benchmark async_multi_agent against a local stub server: latency should be max, not sum"""
+
+    def setUp(self):
+        self.orchestrator = UnifiedAIOrchestrator(AIConfig(localai_endpoint=stub_server(self)))
+
+        def slow_adapter(message):
+            time.sleep(AGENT_DELAY)
+            return "adapter answer"
+
+        for adapter in (self.orchestrator.autogen, self.orchestrator.camel, self.orchestrator.memgpt):
+            patcher = patch.object(adapter, "chat", side_effect=slow_adapter)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_latency_is_max_not_sum(self):
+        """Test four agents (one native async, three pooled adapters) overlap on one event loop"""
+        agents = ["localai", "autogen", "camel", "memgpt"]
+
+        started = time.monotonic()
+        serial = self.orchestrator.multi_agent_task("task", agents)
+        serial_elapsed = time.monotonic() - started
+
+        started = time.monotonic()
+        concurrent = asyncio.run(self.orchestrator.async_multi_agent("task", agents))
+        concurrent_elapsed = time.monotonic() - started
+
+        self.assertEqual(concurrent, serial)
+        self.assertEqual(concurrent["localai"], "stub answer")
+        self.assertGreater(serial_elapsed, len(agents) * AGENT_DELAY)
+        self.assertLess(concurrent_elapsed, 2 * AGENT_DELAY)
+
+    def test_timeout_and_cancellation(self):
+        """Test a per-call timeout yields None and cancelling the caller cancels the fan-out"""
+        results = asyncio.run(self.orchestrator.async_multi_agent("task", ["localai", "camel"], timeout=0.1))
+        self.assertEqual(results, {"localai": None, "camel": None})
+
+        async def cancel_midway():
+            task = asyncio.create_task(self.orchestrator.async_multi_agent("task", ["localai"]))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await task
+
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(cancel_midway())
+
+
+
+class TestExecuteStream(unittest.TestCase):
+    """Test /execute/stream relays backend tokens as Server-Sent Events"""
+
+    def setUp(self):
+        self.orchestrator = UnifiedSystemOrchestrator()
+        self.orchestrator.ai_orchestrator = UnifiedAIOrchestrator(AIConfig(localai_endpoint=stub_server(self)))
+        patcher = patch.object(unified_orchestrator, "orchestrator", self.orchestrator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def events(self, framework):
+        response = unified_orchestrator.app.test_client().post(
+            "/execute/stream", json={"task": "hi", "framework": framework}
+        )
+        self.assertEqual(response.mimetype, "text/event-stream")
+        events = []
+        for raw in response.get_data(as_text=True).strip().split("\n\n"):
+            event, data = raw.split("\n")
+            events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+        return events
+
+    def test_tokens_then_stats(self):
+        """Test each streamed piece is its own event, followed by ttft and tokens/sec"""
+        events = self.events("localai")
+        self.assertEqual(events[0][0], "admitted")
+        self.assertEqual(events[1:4], [("token", "Hello"), ("token", ","), ("token", " world")])
+        event, stats = events[4]
+        self.assertEqual(event, "done")
+        self.assertEqual(stats["tokens"], 3)
+        self.assertGreaterEqual(stats["ttft_ms"], AGENT_DELAY * 1000)
+        self.assertGreater(stats["total_ms"], stats["ttft_ms"])
+        self.assertGreater(stats["tokens_per_second"], 0)
+
+    def test_non_streaming_framework(self):
+        """Test frameworks without a token stream send their answer as one event"""
+        with patch.object(self.orchestrator.ai_orchestrator.camel, "chat", return_value="camel answer"):
+            events = self.events("camel")
+        self.assertEqual(events[1], ("token", "camel answer"))
+        self.assertEqual(events[2][1]["tokens"], 1)
+        self.assertIsNone(events[2][1]["tokens_per_second"])
+
+
+
+@unittest.skipUnless(ASGI_AVAILABLE, "fastapi is not installed")
+class TestAsgiServer(unittest.TestCase):
+    """Test the ASGI app keeps the Flask routes and serves slow chats as coroutines"""
+
+    def setUp(self):
+        self.orchestrator = UnifiedSystemOrchestrator()
+        self.orchestrator.ai_orchestrator = UnifiedAIOrchestrator(AIConfig(localai_endpoint=stub_server(self)))
+        self.addCleanup(self.orchestrator.stop_status_refresher)
+        self.app = create_app(self.orchestrator, "<html>ui</html>")
+
+    def run_client(self, scenario):
+        async def main():
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://orchestrator") as client:
+                return await scenario(client)
+        return asyncio.run(main())
+
+    def test_routes_match_flask(self):
+        """Test the UI, status snapshot, execute and stream routes"""
+        async def scenario(client):
+            index = await client.get("/")
+            status = await client.get("/status")
+            executed = await client.post("/execute", json={"task": "hi", "framework": "localai"})
+            streamed = await client.post("/execute/stream", json={"task": "hi", "framework": "localai"})
+            return index, status.json(), executed.json(), streamed.text
+
+        index, status, executed, streamed = self.run_client(scenario)
+        self.assertEqual(index.text, "<html>ui</html>")
+        self.assertIn("stale", status)
+        self.assertEqual((executed["success"], executed["result"]), (True, "stub answer"))
+        self.assertIn('event: token\ndata: "Hello"', streamed)
+        self.assertIn("event: done", streamed)
+
+    def test_concurrent_chats_are_coroutines(self):
+        """Test 100 concurrent slow chats overlap on one event loop (serially this takes 30s)"""
+        self.orchestrator.admission = AdmissionController(max_concurrent=100)
+
+        async def scenario(client):
+            return await asyncio.gather(*(
+                client.post("/execute", json={"task": "hi", "framework": "localai"}) for _ in range(100)
+            ))
+
+        started = time.monotonic()
+        responses = self.run_client(scenario)
+        self.assertLess(time.monotonic() - started, 15 * AGENT_DELAY)
+        self.assertTrue(all(r.json()["result"] == "stub answer" for r in responses))
+
+    def test_rejection_matches_flask(self):
+        """Test a saturated backend gets the same 429 body and Retry-After as the Flask server"""
+        self.orchestrator.admission = AdmissionController(max_concurrent=1, max_queue=0)
+        flask_client = unified_orchestrator.app.test_client()
+
+        async def scenario(client):
+            return await client.post("/execute", json={"task": "hi", "framework": "localai"})
+
+        with self.orchestrator.admission.acquire("localai"), \
+                patch.object(unified_orchestrator, "orchestrator", self.orchestrator):
+            response = self.run_client(scenario)
+            expected = flask_client.post("/execute", json={"task": "hi", "framework": "localai"})
+
+        self.assertEqual((response.status_code, response.headers["Retry-After"]), (429, "1"))
+        self.assertEqual((expected.status_code, expected.headers["Retry-After"]), (429, "1"))
+        self.assertEqual(response.json(), expected.get_json())
+
+    def test_async_collaboration_deadline(self):
+        """Test the async collaboration applies the same timeout policy"""
+        def slow_adapter(message):
+            time.sleep(1.0)
+            return "late"
+
+        with patch.object(self.orchestrator.ai_orchestrator.camel, "chat", side_effect=slow_adapter):
+            result = self.run_client(lambda client: client.post("/collaborate", json={
+                "task": "hi", "agents": ["localai", "camel"], "agent_timeouts": {"camel": 0.5}
+            }))
+        timings = result.json()["timings"]["agents"]
+        self.assertEqual(timings["localai"]["status"], "ok")
+        self.assertEqual(timings["camel"]["status"], "timeout")
+        self.assertEqual(result.json()["synthesis"], "stub answer")
+
+
+
+class TestAdmissionControl(unittest.TestCase):
+    """Test per-backend limits, bounded priority queues and 429 rejection"""
+
+    def test_limit_queue_and_fast_rejection(self):
+        """Test requests beyond the limit queue, and beyond the queue cap are rejected at once"""
+        limiter = AdmissionController(max_concurrent=2, max_queue=1, queue_timeout=5).limiter("ollama")
+        held = [limiter.acquire(), limiter.acquire()]
+
+        queued = []
+        waiter = threading.Thread(target=lambda: queued.append(limiter.acquire("batch")))
+        waiter.start()
+        while limiter.queued() == 0:
+            time.sleep(0.01)
+
+        started = time.monotonic()
+        with self.assertRaises(AdmissionRejected):
+            limiter.acquire()
+        self.assertLess(time.monotonic() - started, 0.1)
+
+        held[0].release()
+        waiter.join(1)
+        self.assertEqual(limiter.active, 2)
+        self.assertGreater(queued[0].wait_seconds, 0)
+        for slot in (held[1], queued[0]):
+            slot.release()
+        self.assertEqual(limiter.active, 0)
+
+    def test_interactive_lane_goes_first(self):
+        """Test a freed slot goes to queued interactive work before earlier batch work"""
+        limiter = AdmissionController(max_concurrent=1, max_queue=10, queue_timeout=5).limiter("localai")
+        order = []
+
+        async def request(lane):
+            async with await limiter.aacquire(lane):
+                order.append(lane)
+
+        async def scenario():
+            slot = await limiter.aacquire()
+            tasks = [asyncio.create_task(request(lane)) for lane in ("batch", "batch", "interactive")]
+            await asyncio.sleep(0.05)
+            slot.release()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(scenario())
+        self.assertEqual(order, ["interactive", "batch", "batch"])
+
+    def test_queue_timeout_and_cancellation(self):
+        """Test waiting past the queue timeout is rejected and cancelled waiters leave the queue"""
+        limiter = AdmissionController(max_concurrent=1, max_queue=10, queue_timeout=0.1).limiter("localai")
+
+        async def scenario():
+            slot = await limiter.aacquire()
+            with self.assertRaises(AdmissionRejected):
+                await limiter.aacquire()
+            waiter = asyncio.create_task(limiter.aacquire())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            slot.release()
+
+        asyncio.run(scenario())
+        self.assertEqual((limiter.active, limiter.queued(), limiter.rejected["interactive"]), (0, 0, 1))
+
+    def test_execute_returns_429_and_exports_queue_wait(self):
+        """Test /execute answers 429 with Retry-After when the backend is saturated"""
+        orchestrator = UnifiedSystemOrchestrator()
+        orchestrator.admission = AdmissionController(max_concurrent=1, max_queue=0)
+        client = unified_orchestrator.app.test_client()
+
+        with patch.object(unified_orchestrator, "orchestrator", orchestrator), \
+                patch.object(orchestrator.ai_orchestrator, "chat", return_value="answer"):
+            self.assertEqual(client.post("/execute", json={"task": "hi", "framework": "localai"}).status_code, 200)
+            with orchestrator.admission.acquire("localai"):
+                response = client.post("/execute", json={"task": "hi", "framework": "camel", "priority": "batch"})
+                streamed = client.post("/execute/stream", json={"task": "hi"})
+            metrics = client.get("/metrics").get_data(as_text=True)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        self.assertTrue(response.get_json()["rejected"])
+        self.assertEqual(streamed.status_code, 429)
+        self.assertIn('orchestrator_queue_wait_seconds_count{backend="localai",lane="interactive"} 2', metrics)
+        self.assertIn('orchestrator_admission_rejected_total{backend="localai",lane="batch"} 1', metrics)
+
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test the exact-match response cache and its use for deterministic completions"""
+
+    def test_lru_disk_and_ttl(self):
+        """Test LRU eviction falls back to disk, the file outlives the process and entries expire"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "responses.sqlite3")
+            cache = ResponseCache(path, max_entries=2, ttl=60)
+            self.assertFalse(os.path.exists(path))
+            for key in ("a", "b", "c"):
+                cache.put(key, key.upper())
+            self.assertEqual(list(cache._entries), ["b", "c"])
+            self.assertEqual(cache.get("a"), "A")
+            self.assertEqual(cache.hits, {"memory": 0, "disk": 1})
+            cache.close()
+
+            reopened = ResponseCache(path, max_entries=2, ttl=60)
+            self.assertEqual(reopened.get("b"), "B")
+            reopened.ttl = 0
+            self.assertIsNone(reopened.get("b"))
+            reopened.close()
+
+    def test_deterministic_completions_hit_cache(self):
+        """Test temperature-0 requests are cached, others only on opt-in, with a hit ratio"""
+        ai = UnifiedAIOrchestrator(AIConfig(localai_endpoint=stub_server(self)))
+        client = ai.localai
+        client.cache = ResponseCache()
+        messages = [{"role": "user", "content": "Count to 5"}]
+
+        self.assertEqual(client.chat_completion(messages, temperature=0), "stub answer")
+        self.assertEqual(asyncio.run(client.achat_completion(messages, temperature=0)), "stub answer")
+        client.chat_completion(messages)
+        client.chat_completion(messages)
+        client.chat_completion(messages, cache=True)
+        client.chat_completion(messages, cache=True)
+        client.chat_completion(messages, temperature=0, cache=False)
+
+        self.assertEqual(len(self.stub_calls), 5)
+        self.assertEqual(client.cache.stats()["hit_ratio"], 0.5)
+
+    def test_cache_hit_skips_admission(self):
+        """Test a cached answer is served even while the backend queue is full"""
+        orchestrator = UnifiedSystemOrchestrator()
+        orchestrator.ai_orchestrator = UnifiedAIOrchestrator(AIConfig(localai_endpoint=stub_server(self)))
+        orchestrator.ai_orchestrator.localai.cache = ResponseCache()
+        orchestrator.admission = AdmissionController(max_concurrent=1, max_queue=0)
+
+        cache = orchestrator.ai_orchestrator.localai.cache
+        with patch.object(cache, "get", wraps=cache.get) as lookup:
+            first = orchestrator.route_task("hi", "localai", cache=True)
+            asyncio.run(orchestrator.aroute_task("bye", "localai", cache=True))
+        self.assertEqual(lookup.call_count, 2)
+        with orchestrator.admission.acquire("localai"):
+            second = orchestrator.route_task("hi", "localai", cache=True)
+            with self.assertRaises(AdmissionRejected):
+                orchestrator.route_task("hi", "localai")
+
+        self.assertNotIn("cached", first)
+        self.assertEqual((second["result"], second["cached"]), ("stub answer", True))
+        self.assertIn("orchestrator_response_cache_hit_ratio 0.3333", "\n".join(orchestrator.metrics_lines()))
+
+
+class StubEmbedder:
+    """Embeds known prompts to fixed vectors; paraphrases share a direction"""
+
+    VECTORS = {
+        "What is the capital of France?": [1.0, 0.0, 0.0],
+        "Which city is France's capital?": [0.98, 0.1, 0.0],
+        "How do I sort a list in Python?": [0.0, 1.0, 0.0],
+        "Explain TCP slow start": [0.0, 0.0, 1.0],
+    }
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        if text not in self.VECTORS:
+            raise ConnectionError("embedding model unavailable")
+        return self.VECTORS[text]
+
+
+class TestSemanticCache(unittest.TestCase):
+    """Test the opt-in semantic cache for paraphrased prompts"""
+
+    def test_nearest_neighbour_above_threshold(self):
+        """Test a paraphrase hits, an unrelated prompt or another route misses"""
+        cache = SemanticCache(StubEmbedder(), threshold=0.95)
+        cache.store("What is the capital of France?", "localai", "Paris")
+
+        self.assertEqual(cache.lookup("Which city is France's capital?", "localai")[0], "Paris")
+        self.assertIsNone(cache.lookup("How do I sort a list in Python?", "localai")[0])
+        self.assertIsNone(cache.lookup("Which city is France's capital?", "memgpt")[0])
+        self.assertEqual(cache.lookup("not embeddable", "localai"), (None, None))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_lru_and_ttl_eviction(self):
+        """Test the least recently used prompt goes first and old entries expire"""
+        cache = SemanticCache(StubEmbedder(), max_entries=2)
+        cache.store("What is the capital of France?", "localai", "Paris")
+        cache.store("How do I sort a list in Python?", "localai", "sorted()")
+        cache.lookup("What is the capital of France?", "localai")
+        cache.store("Explain TCP slow start", "localai", "cwnd doubles")
+
+        self.assertEqual(cache.lookup("What is the capital of France?", "localai")[0], "Paris")
+        self.assertIsNone(cache.lookup("How do I sort a list in Python?", "localai")[0])
+        cache.ttl = 0
+        self.assertIsNone(cache.lookup("Explain TCP slow start", "localai")[0])
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertEqual(cache.evictions, 3)
+
+    def test_per_route_enablement(self):
+        """Test paraphrases skip the backend on enabled routes, with per-request override"""
+        orchestrator = UnifiedSystemOrchestrator()
+        orchestrator.ai_orchestrator = UnifiedAIOrchestrator(AIConfig(localai_endpoint=stub_server(self)))
+        orchestrator.semantic_cache = SemanticCache(StubEmbedder(), routes={"localai"})
+
+        first = orchestrator.route_task("What is the capital of France?", "localai")
+        second = orchestrator.route_task("Which city is France's capital?", "localai")
+        third = asyncio.run(orchestrator.aroute_task("Which city is France's capital?", "localai"))
+        bypassed = orchestrator.route_task("Which city is France's capital?", "localai", semantic=False)
+
+        self.assertNotIn("cached", first)
+        self.assertEqual((second["result"], second["cached"]), ("stub answer", "semantic"))
+        self.assertEqual(third["cached"], "semantic")
+        self.assertNotIn("cached", bypassed)
+        self.assertEqual(len(self.stub_calls), 2)
+        self.assertFalse(orchestrator.semantic_cache.enabled_for("memgpt"))
+        self.assertTrue(orchestrator.semantic_cache.enabled_for("memgpt", True))
+        self.assertIn('orchestrator_semantic_cache_lookups_total{result="hit"} 2',
+                      "\n".join(orchestrator.metrics_lines()))
+
+
+class TestModelRouter(unittest.TestCase):
+    """Test latency-aware routing across equivalent inference servers"""
+
+    def setUp(self):
+        self.ollama = stub_server(self)
+        self.ollama_calls = self.stub_calls
+        self.lmstudio = stub_server(self)
+        self.lmstudio_calls = self.stub_calls
+        self.probes = ProbeEngine({
+            "ollama": ServiceEndpoint("ollama", self.ollama[:-len("/v1")], "/api/tags", "ollama"),
+            "lmstudio": ServiceEndpoint("lmstudio", self.lmstudio, "/models", "openai"),
+            "vllm": ServiceEndpoint("vllm", "http://127.0.0.1:9/v1", "/models", "openai"),
+        })
+        self.probes.record([ProbeResult(name, endpoint.url, name != "vllm")
+                            for name, endpoint in self.probes.endpoints.items()])
+        self.router = ModelRouter({"general": [("ollama", "llama3.1:8b"), ("vllm", "phi-3"), ("lmstudio", "auto")]},
+                                  probes=self.probes, admission=AdmissionController(max_concurrent=1))
+
+    def ranked(self):
+        return [c.backend for c in self.router.rank("general")]
+
+    def test_fastest_healthy_candidate_first(self):
+        """Test measured latency and errors reorder candidates, down backends are skipped"""
+        ollama, vllm, lmstudio = self.router.routes["general"]
+        self.assertEqual(self.ranked(), ["ollama", "lmstudio"])
+        self.assertEqual(self.router.base_url("ollama"), self.ollama)
+
+        self.router.record(ollama, 0.8, True)
+        self.router.record(lmstudio, 0.2, True)
+        self.assertEqual(self.ranked(), ["lmstudio", "ollama"])
+        for _ in range(5):
+            self.router.record(lmstudio, 0.2, False)
+        self.assertEqual(self.ranked(), ["ollama", "lmstudio"])
+        self.assertEqual(self.router.rank("unknown task"), self.router.rank("general"))
+
+    def test_spills_over_when_queue_grows(self):
+        """Test concurrent requests spread over both servers instead of queueing on one"""
+        orchestrator = FreeAgentOrchestrator()
+        orchestrator.admission = self.router.admission
+        orchestrator.router = self.router
+
+        async def burst():
+            try:
+                return await asyncio.gather(*(orchestrator.route_request("hi") for _ in range(4)))
+            finally:
+                await orchestrator.close()
+
+        started = time.monotonic()
+        answers = asyncio.run(burst())
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(answers, ["stub answer"] * 4)
+        self.assertEqual((len(self.ollama_calls), len(self.lmstudio_calls)), (2, 2))
+        self.assertLess(elapsed, 3 * AGENT_DELAY)
+        self.assertEqual(self.ollama_calls[0]["model"], "llama3.1:8b")
+        self.assertEqual({c["backend"]: c["requests"] for c in self.router.stats()["general"]},
+                         {"ollama": 2, "vllm": 0, "lmstudio": 2})
+
+
+class TestCircuitBreakers(unittest.TestCase):
+    """Test per-backend circuit breakers and failover"""
+
+    DEAD = "http://127.0.0.1:9/v1"
+
+    def test_open_probe_half_open_close(self):
+        """Test failures open the circuit, a recovery probe half-opens it, a trial closes it"""
+        probes = ProbeEngine({"ollama": ServiceEndpoint("ollama", stub_server(self), "/models", "openai")})
+        registry = BreakerRegistry(failure_threshold=2, probe_interval=60, reset_timeout=30, probes=probes)
+        breaker = registry.breaker("ollama")
+        unknown = registry.breaker("elsewhere")
+
+        for b in (breaker, unknown):
+            b.record_failure()
+            self.assertTrue(b.allow())
+            b.record_failure()
+            self.assertEqual((b.state, b.allow()), ("open", False))
+
+        # Not probeable: half-opens once reset_timeout has passed
+        unknown.opened_at -= 30
+        registry.recover_once()
+        self.assertEqual((breaker.state, unknown.state), ("half_open", "half_open"))
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        unknown.allow()
+        unknown.record_failure()
+        self.assertEqual((breaker.state, unknown.state), ("closed", "open"))
+        self.assertIn('orchestrator_circuit_opened_total{backend="elsewhere"} 2', "\n".join(registry.metrics_lines()))
+
+    def test_localai_fails_over_without_waiting(self):
+        """Test requests go to the failover server and stop trying LocalAI once its circuit opens"""
+        ai = UnifiedAIOrchestrator(AIConfig(localai_endpoint=self.DEAD))
+        client = ai.localai
+        client.cache = ResponseCache()
+        client.breakers = BreakerRegistry(failure_threshold=2, probe_interval=60)
+        client.failover = [("ollama", stub_server(self), "llama3.1:8b")]
+        messages = [{"role": "user", "content": "hi"}]
+
+        self.assertEqual(client.chat_completion(messages, temperature=0), "stub answer")
+        self.assertEqual(asyncio.run(client.achat_completion(messages, temperature=0)), "stub answer")
+        self.assertEqual(client.breakers.breaker("localai").state, "open")
+        with patch.object(client.client.chat.completions, "create") as create:
+            self.assertEqual(client.chat_completion(messages), "stub answer")
+            self.assertEqual("".join(client.stream_chat_completion(messages)), "Hello, world")
+        create.assert_not_called()
+
+        self.assertEqual([call["model"] for call in self.stub_calls], ["llama3.1:8b"] * 4)
+        self.assertIsNone(client.cached_response(messages, temperature=0))
+
+    def test_free_agent_fails_over(self):
+        """Test route_request answers from the next server when the preferred one is down"""
+        probes = ProbeEngine({
+            "ollama": ServiceEndpoint("ollama", self.DEAD[:-len("/v1")], "/api/tags", "ollama"),
+            "lmstudio": ServiceEndpoint("lmstudio", stub_server(self), "/models", "openai"),
+        })
+        probes.record([ProbeResult(name, endpoint.url, True) for name, endpoint in probes.endpoints.items()])
+        orchestrator = FreeAgentOrchestrator()
+        orchestrator.router = ModelRouter({"general": [("ollama", "llama3.1:8b"), ("lmstudio", "auto")]},
+                                          probes=probes, admission=orchestrator.admission)
+        orchestrator.breakers = BreakerRegistry(failure_threshold=1, probe_interval=60, probes=probes)
+
+        async def requests():
+            try:
+                return [await orchestrator.route_request("hi") for _ in range(2)]
+            finally:
+                await orchestrator.close()
+
+        self.assertEqual(asyncio.run(requests()), ["stub answer"] * 2)
+        self.assertEqual(orchestrator.breakers.breaker("ollama").state, "open")
+        self.assertEqual(len(self.stub_calls), 2)
+
+    def test_client_errors_close_trials_without_failover(self):
+        """Test a 4xx answers a half-open trial and is returned without failing over, in both clients"""
+        failover = stub_server(self)
+        failover_calls = self.stub_calls
+        self.stub_status = 400
+        rejecting = stub_server(self)
+        registry = BreakerRegistry(failure_threshold=1, probe_interval=60)
+        for backend in ("localai", "ollama"):
+            registry.breaker(backend).record_failure()
+            registry.breaker(backend).half_open()
+
+        ai = UnifiedAIOrchestrator(AIConfig(localai_endpoint=rejecting))
+        client = ai.localai
+        client.breakers = registry
+        client.failover = [("ollama", failover, "llama3.1:8b")]
+        self.assertIsNone(client.chat_completion([{"role": "user", "content": "hi"}]))
+
+        probes = ProbeEngine({
+            "ollama": ServiceEndpoint("ollama", rejecting[:-len("/v1")], "/api/tags", "ollama"),
+            "lmstudio": ServiceEndpoint("lmstudio", failover, "/models", "openai"),
+        })
+        probes.record([ProbeResult(name, endpoint.url, True) for name, endpoint in probes.endpoints.items()])
+        orchestrator = FreeAgentOrchestrator()
+        orchestrator.router = ModelRouter({"general": [("ollama", "llama3.1:8b"), ("lmstudio", "auto")]},
+                                          probes=probes, admission=orchestrator.admission)
+        orchestrator.breakers = registry
+
+        async def request():
+            try:
+                return await orchestrator.route_request("hi")
+            finally:
+                await orchestrator.close()
+
+        self.assertTrue(asyncio.run(request()).startswith("Error: ollama: Client error '400"))
+        self.assertEqual(failover_calls, [])
+        self.assertEqual((registry.breaker("localai").state, registry.breaker("ollama").state), ("closed", "closed"))
+
+    def test_rejected_trial_is_released(self):
+        """Test a half-open trial that is not admitted lets the next request try the backend"""
+        orchestrator = FreeAgentOrchestrator()
+        orchestrator.breakers = BreakerRegistry(failure_threshold=1, probe_interval=60)
+        breaker = orchestrator.breakers.breaker("flowise")
+        breaker.record_failure()
+        breaker.half_open()
+        rejected = AdmissionRejected("flowise", "interactive", "queue full")
+
+        async def request():
+            try:
+                with patch.object(orchestrator.admission, "aacquire", side_effect=rejected):
+                    return await orchestrator.route_request("hi", task_type="workflow")
+            finally:
+                await orchestrator.close()
+
+        self.assertIn("queue full", asyncio.run(request()))
+        self.assertEqual(breaker.state, "half_open")
+        self.assertTrue(breaker.allow())
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test identical in-flight requests share one upstream generation"""
+
+    CALLERS = 8
+
+    def setUp(self):
+        self.client = UnifiedAIOrchestrator(AIConfig(localai_endpoint=stub_server(self))).localai
+        self.client.cache = None
+        self.messages = [{"role": "user", "content": "What is on the dashboard?"}]
+
+    def concurrently(self, call):
+        """Run call from CALLERS threads released together and return their results"""
+        barrier = threading.Barrier(self.CALLERS)
+        results = [None] * self.CALLERS
+
+        def run(i):
+            barrier.wait()
+            results[i] = call()
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(self.CALLERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_threads_share_one_completion(self):
+        """Test concurrent identical completions make one backend call, different ones do not"""
+        started = time.monotonic()
+        answers = self.concurrently(lambda: self.client.chat_completion(self.messages))
+        self.assertEqual(answers, ["stub answer"] * self.CALLERS)
+        self.assertLess(time.monotonic() - started, 2 * AGENT_DELAY)
+        self.assertEqual(len(self.stub_calls), 1)
+        self.assertEqual((self.client.flights.calls, self.client.flights.coalesced), (1, self.CALLERS - 1))
+
+        self.client.chat_completion(self.messages)
+        self.client.chat_completion(self.messages, temperature=0)
+        self.assertEqual(len(self.stub_calls), 3)
+
+    def test_streams_fan_out(self):
+        """Test every concurrent identical stream gets all tokens from one backend stream"""
+        streams = self.concurrently(lambda: "".join(self.client.stream_chat_completion(self.messages)))
+        self.assertEqual(streams, ["Hello, world"] * self.CALLERS)
+        self.assertEqual([call.get("stream") for call in self.stub_calls], [True])
+
+    def test_coroutines_share_and_cancel(self):
+        """Test coroutine callers share one call, one cancelled waiter leaves the rest unaffected"""
+        async def callers():
+            completions = [asyncio.ensure_future(self.client.achat_completion(self.messages))
+                           for _ in range(self.CALLERS)]
+            await asyncio.sleep(AGENT_DELAY / 3)
+            completions[0].cancel()
+            streams = [self.client.astream_chat_completion(self.messages) for _ in range(self.CALLERS)]
+
+            async def join(stream):
+                return "".join([piece async for piece in stream])
+
+            texts = await asyncio.gather(*(join(stream) for stream in streams))
+            answers = await asyncio.gather(*completions[1:])
+            await self.client.aclose()
+            return answers, texts
+
+        answers, texts = asyncio.run(callers())
+        self.assertEqual(answers, ["stub answer"] * (self.CALLERS - 1))
+        self.assertEqual(texts, ["Hello, world"] * self.CALLERS)
+        self.assertEqual(len(self.stub_calls), 2)
+        self.assertEqual(self.client.flights._flights, {})
+
+    def test_errors_reach_every_waiter(self):
+        """Test a failed upstream call fails all attached callers, once"""
+        def fail(*args, **kwargs):
+            time.sleep(AGENT_DELAY)
+            raise ConnectionError("backend down")
+
+        with patch.object(self.client, "_create", side_effect=fail) as create:
+            answers = self.concurrently(lambda: self.client.chat_completion(self.messages))
+        self.assertEqual(answers, [None] * self.CALLERS)
+        self.assertEqual(create.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
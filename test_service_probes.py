@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared service registry and probe engine (service_probes.py)
+"""
+
+import os
+import asyncio
+import tempfile
+import unittest
+
+import httpx
+
+from service_probes import ProbeEngine, ServiceEndpoint, status_map
+
+
+ENDPOINTS = {
+    "localai": ServiceEndpoint("localai", "http://localai/v1", "/models", "openai"),
+    "ollama": ServiceEndpoint("ollama", "http://ollama", "/api/tags", "ollama"),
+    "flowise": ServiceEndpoint("flowise", "http://flowise"),
+    "prometheus": ServiceEndpoint("prometheus", "http://prometheus", "/-/ready"),
+    "grafana": ServiceEndpoint("grafana", "http://grafana", "/api/health"),
+}
+
+
+def backend(calls):
+    """Mock transport with one healthy, one not-found, one not-ready and one unreachable service"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.host)
+        if request.url.host == "localai":
+            return httpx.Response(200, json={"data": [{"id": "gpt-3.5-turbo"}, {"id": "phi-2"}]})
+        if request.url.host == "ollama":
+            return httpx.Response(200, json={"models": [{"name": "llama3.1:8b"}]})
+        if request.url.host == "flowise":
+            return httpx.Response(404)
+        if request.url.host == "prometheus":
+            return httpx.Response(503)
+        raise httpx.ConnectError("connection refused", request=request)
+    return httpx.MockTransport(handler)
+
+
+class TestProbeEngine(unittest.TestCase):
+    """Test probe semantics and the shared result set"""
+
+    def check(self, engine, calls, names=None):
+        async def scenario():
+            async with httpx.AsyncClient(transport=backend(calls)) as client:
+                return await engine.check(names, client=client)
+        return asyncio.run(scenario())
+
+    def test_semantics_per_kind(self):
+        """Test model listings, non-5xx reachability and connection errors"""
+        results = self.check(ProbeEngine(dict(ENDPOINTS)), [])
+
+        self.assertEqual(status_map(results), {
+            "localai": True, "ollama": True, "flowise": True, "prometheus": False, "grafana": False,
+        })
+        self.assertEqual(results["localai"].extra["models"], ["gpt-3.5-turbo", "phi-2"])
+        self.assertEqual(results["ollama"].extra["first_model"], "llama3.1:8b")
+        self.assertEqual(results["prometheus"].detail, "Bad status 503")
+        self.assertIsNone(results["grafana"].status_code)
+        self.assertEqual(results["localai"].url, "http://localai/v1/models")
+
+    def test_recent_results_are_shared(self):
+        """Test a second consumer within the ttl gets the cached result instead of re-probing"""
+        calls = []
+        engine = ProbeEngine(dict(ENDPOINTS), ttl=60.0)
+        self.check(engine, calls, ["ollama", "flowise"])
+        self.check(engine, calls, ["ollama", "flowise", "localai"])
+        self.assertEqual(sorted(calls), ["flowise", "localai", "ollama"])
+
+        engine.ttl = 0.0
+        self.check(engine, calls, ["ollama"])
+        self.assertEqual(calls.count("ollama"), 2)
+
+    def test_snapshot_shares_results_across_processes(self):
+        """Test a separate engine reads a fresh snapshot and ignores entries for another URL"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            snapshot = os.path.join(tmpdir, "probes.json")
+            self.check(ProbeEngine(dict(ENDPOINTS), snapshot_file=snapshot), [])
+
+            calls = []
+            other = ProbeEngine(dict(ENDPOINTS), ttl=60.0, snapshot_file=snapshot)
+            results = self.check(other, calls, ["localai", "ollama"])
+            self.assertEqual(calls, [])
+            self.assertEqual(results["localai"].extra["model_count"], 2)
+
+            moved = dict(ENDPOINTS, ollama=ServiceEndpoint("ollama", "http://elsewhere", "/api/tags", "ollama"))
+            self.check(ProbeEngine(moved, ttl=60.0, snapshot_file=snapshot), calls, ["ollama"])
+            self.assertEqual(calls, ["elsewhere"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)